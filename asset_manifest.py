@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль имен файлов с хэшем содержимого (v18.14)
+Статические файлы вывода (изображения, шрифты, JSON сцен, style.css,
+renderer.js) получают в имени хэш содержимого:
+
+    images/slide3_img2.png -> images/slide3_img2.1f0c9a7e2b.png
+
+Ссылки в страницах строятся сразу по новым именам, поэтому такие файлы
+можно кэшировать навсегда: изменившийся файл получит другое имя.
+Страницы (index.html, pages/pageN.html) ссылаются друг на друга и
+остаются с постоянными именами - их кэш проверяется при каждом запросе.
+
+    assets-manifest.json  - {исходный путь: путь с хэшем}
+    _headers              - заголовки Cache-Control (формат Netlify /
+                            Cloudflare Pages; папка вывода - корень сайта)
+
+Хэш - SHA-1 (как MediaIndex), первые FINGERPRINT_LENGTH символов.
+"""
+
+import hashlib
+import posixpath
+import threading
+
+
+FINGERPRINT_LENGTH = 10
+
+MANIFEST_PATH = 'assets-manifest.json'
+HEADERS_PATH = '_headers'
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Папки, в которых при хэшировании все файлы получают имена с хэшем
+FINGERPRINTED_DIRS = ('images', 'fonts', 'data')
+
+# Файлы с постоянными именами: проверка актуальности при каждом запросе
+REVALIDATED_PATHS = ('/', '/index.html', '/pages/*', '/metadata.json', '/stats.json', '/' + MANIFEST_PATH)
+
+
+def content_digest(data):
+    """SHA-1 содержимого (bytes или str в UTF-8)"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def fingerprinted(path, digest):
+    """'images/a.png' + хэш -> 'images/a.<хэш>.png'"""
+    directory, name = posixpath.split(path)
+    stem, ext = posixpath.splitext(name)
+    return posixpath.join(directory, f"{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}")
+
+
+class AssetManifest:
+    """
+    Соответствие исходных путей и путей с хэшем
+
+    При enabled=False name() и url() возвращают путь без изменений -
+    вызывающему коду не нужно проверять режим.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.assets = {}
+        self._lock = threading.Lock()
+
+    def name(self, path, data=None, digest=None):
+        """
+        Путь файла для записи и ссылок
+
+        Args:
+            path: Исходный относительный путь ('style.css')
+            data: Содержимое (bytes или str) - если digest не известен
+            digest: Готовый хэш содержимого (MediaIndex)
+        """
+        if not self.enabled:
+            return path
+        hashed = fingerprinted(path, digest or content_digest(data))
+        with self._lock:
+            self.assets[path] = hashed
+        return hashed
+
+    def url(self, path):
+        """Путь с хэшем для ранее названного файла (иначе исходный)"""
+        with self._lock:
+            return self.assets.get(path, path)
+
+    def merge(self, previous):
+        """Записи прежнего манифеста для файлов, не созданных заново (--slides)"""
+        with self._lock:
+            for path, hashed in previous.items():
+                self.assets.setdefault(path, hashed)
+
+    def manifest(self):
+        """Содержимое assets-manifest.json"""
+        with self._lock:
+            return dict(sorted(self.assets.items()))
+
+    def headers(self, revalidated=()):
+        """
+        Содержимое _headers: хэшированные файлы - immutable, страницы - no-cache
+
+        Args:
+            revalidated: Дополнительные пути с no-cache ('/sw.js')
+        """
+        with self._lock:
+            hashed = sorted(self.assets.values())
+        rules = [f"/{directory}/*" for directory in FINGERPRINTED_DIRS
+                 if any(path.startswith(directory + '/') for path in hashed)]
+        rules += [f"/{path}" for path in hashed if '/' not in path]
+
+        lines = ['# Файлы с хэшем содержимого в имени не меняются', '']
+        for rule in rules:
+            lines += [rule, f"  Cache-Control: {IMMUTABLE}", '']
+        lines += ['# Страницы и отчеты с постоянными именами', '']
+        for rule in REVALIDATED_PATHS + tuple(revalidated):
+            lines += [rule, f"  Cache-Control: {REVALIDATE}", '']
+        return '\n'.join(lines)
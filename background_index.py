@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль индекса кандидатов на фон слайда (v18.5)
+Один проход по дереву фигур (shape_tree) собирает все, что может быть
+фоном: FREEFORM на весь слайд, крупные изображения (включая вложенные
+в группы) и изображение заливки p:bg. Площади и позиции считаются один
+раз; process_slide, save_background_image и пропуск фоновой фигуры
+обращаются к готовому индексу.
+"""
+
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+# FREEFORM считается фоном, если занимает > 95% слайда и начинается в (0, 0) ± 5px
+FULL_BLEED_AREA_PERCENT = 95
+FULL_BLEED_OFFSET_PX = 5
+
+
+def _px(emu):
+    """EMU -> пиксели (как PPTXToHTMLConverter.emu_to_px)"""
+    return round(emu / 9525)
+
+
+class PictureCandidate:
+    """Изображение слайда с площадью и позицией в пикселях"""
+
+    __slots__ = ('node', 'area', 'left', 'top')
+
+    def __init__(self, node, area, left, top):
+        self.node = node
+        self.area = area
+        self.left = left
+        self.top = top
+
+
+class BackgroundCandidates:
+    """
+    Кандидаты на фон одного слайда
+
+    full_bleed   - FREEFORM верхнего уровня на весь слайд (в порядке наложения)
+    pictures     - все изображения, включая группы, по убыванию площади
+    top_pictures - изображения верхнего уровня (используемые фигурами)
+    bg_blip_rid  - r:embed изображения заливки фона слайда (p:bg) или None
+    """
+
+    __slots__ = ('slide_area', 'full_bleed', 'pictures', 'top_pictures', 'bg_blip_rid', '_full_bleed_ids')
+
+    def __init__(self, slide_area):
+        self.slide_area = slide_area
+        self.full_bleed = []
+        self.pictures = []
+        self.top_pictures = []
+        self.bg_blip_rid = None
+        self._full_bleed_ids = set()
+
+    def is_full_bleed(self, node):
+        """Является ли фигура FREEFORM на весь слайд (верхнего уровня)"""
+        return id(node) in self._full_bleed_ids
+
+    def area_percent(self, area):
+        return (area / self.slide_area) * 100
+
+
+class BackgroundScanner:
+    """Строит BackgroundCandidates за один проход по дереву фигур"""
+
+    def scan(self, tree, slide, slide_width, slide_height):
+        """
+        Args:
+            tree: Результат shape_tree_reader.read(slide)
+            slide: Слайд python-pptx (для p:bg)
+            slide_width, slide_height: Размеры слайда в пикселях
+
+        Returns:
+            BackgroundCandidates
+        """
+        candidates = BackgroundCandidates(slide_width * slide_height)
+        self._scan_nodes(tree, candidates, top_level=True)
+        candidates.pictures.sort(key=lambda picture: picture.area, reverse=True)
+
+        bg = slide._element.cSld.find(_P + 'bg')
+        if bg is not None:
+            for blip in bg.iter(_A + 'blip'):
+                if blip.get(_R + 'embed'):
+                    candidates.bg_blip_rid = blip.get(_R + 'embed')
+                    break
+
+        return candidates
+
+    def _scan_nodes(self, nodes, candidates, top_level):
+        for node in nodes:
+            if node.shape_type == MSO_SHAPE_TYPE.GROUP:
+                self._scan_nodes(node.children, candidates, top_level=False)
+                continue
+
+            if None in (node.left, node.top, node.width, node.height):
+                continue
+
+            if node.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                picture = PictureCandidate(
+                    node, _px(node.width) * _px(node.height), _px(node.left), _px(node.top))
+                candidates.pictures.append(picture)
+                if top_level:
+                    candidates.top_pictures.append(picture)
+
+            elif node.shape_type == MSO_SHAPE_TYPE.FREEFORM and top_level:
+                area = _px(node.width) * _px(node.height)
+                if (candidates.area_percent(area) > FULL_BLEED_AREA_PERCENT
+                        and _px(node.left) < FULL_BLEED_OFFSET_PX
+                        and _px(node.top) < FULL_BLEED_OFFSET_PX):
+                    candidates.full_bleed.append(node)
+                    candidates._full_bleed_ids.add(id(node))
+
+
+# Singleton instance
+background_scanner = BackgroundScanner()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Кэш результатов конвертации (v18.9)
+Ключ - SHA-256 входного .pptx, версия конвертера (номер и хэш исходников
+модулей) и параметры вывода. Запись кэша - дерево файлов результата:
+
+    <root>/entries/<ключ>/pages/page1.html ...
+    <root>/index.json   - размер, число файлов и время использования
+                          записей + статистика (hits, misses, stores, evictions)
+
+v18.13: запись может нести meta - итог исходной конвертации (для
+расчета сэкономленного времени в stats.json).
+
+Индекс читается и переписывается под блокировкой <root>/.lock (flock),
+поэтому один каталог кэша могут использовать несколько процессов
+(параллельные запуски CLI, задания CI). На Windows блокировка только
+между потоками одного процесса.
+
+При попадании файлы переносятся в приемник вывода без повторной
+конвертации (папка на диске - жесткими ссылками). Общий размер
+ограничен: при превышении удаляются давно не использованные записи.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from output_sink import write_atomic
+
+
+# Ограничение размера кэша по умолчанию
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+CHUNK_SIZE = 1024 * 1024
+
+_code_digest = None
+
+
+def code_digest():
+    """Хэш исходников модулей конвертера (меняется при любой правке кода)"""
+    global _code_digest
+    if _code_digest is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                digest.update(name.encode('utf-8'))
+                with open(os.path.join(directory, name), 'rb') as f:
+                    digest.update(f.read())
+        _code_digest = digest.hexdigest()[:16]
+    return _code_digest
+
+
+def source_digest(source):
+    """SHA-256 входного файла (путь или двоичный поток)"""
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    else:
+        position = source.tell()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """Кэш деревьев вывода на диске с вытеснением по размеру (LRU)"""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(root, 'entries')
+        self.index_path = os.path.join(root, 'index.json')
+        self.lock_path = os.path.join(root, '.lock')
+        self._lock = threading.Lock()
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Чтение-изменение-запись индекса: потоки этого процесса и другие процессы"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def key(source, version, options):
+        """
+        Ключ записи
+
+        Args:
+            source: Путь к .pptx или двоичный поток
+            version: Версия конвертера
+            options: Словарь параметров, влияющих на вывод
+        """
+        digest = hashlib.sha256()
+        digest.update(source_digest(source).encode('ascii'))
+        digest.update(f"{version}+{code_digest()}".encode('utf-8'))
+        digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()[:40]
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('entries', {})
+        stats = index.setdefault('stats', {})
+        for name in ('hits', 'misses', 'stores', 'evictions'):
+            stats.setdefault(name, 0)
+        return index
+
+    def _save_index(self, index):
+        write_atomic(self.index_path, lambda f: json.dump(index, f, indent=2, ensure_ascii=False))
+
+    def restore(self, key, sink):
+        """
+        Переносит запись в приемник
+
+        Returns:
+            int или None: Количество файлов (None - промах)
+        """
+        with self._locked():
+            index = self._load_index()
+            entry = index['entries'].get(key)
+            entry_dir = os.path.join(self.entries_dir, key)
+            if entry is None or not os.path.isdir(entry_dir):
+                index['stats']['misses'] += 1
+                self._save_index(index)
+                return None
+
+            try:
+                for path in entry['files']:
+                    sink.import_file(path, os.path.join(entry_dir, *path.split('/')))
+            except OSError as e:
+                # Запись повреждена (удалена вручную) - считаем промахом
+                print(f"  ⚠️ Запись кэша {key[:12]} повреждена: {e}")
+                index['entries'].pop(key, None)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                index['stats']['misses'] += 1
+                self._save_index(index)
+                return None
+
+            entry['last_used'] = time.time()
+            index['stats']['hits'] += 1
+            self._save_index(index)
+            return len(entry['files'])
+
+    def store(self, key, sink, paths, meta=None):
+        """
+        Сохраняет записанные файлы (после sink.close())
+
+        Args:
+            paths: Относительные пути результата (OutputWriter.paths)
+            meta: Сведения о конвертации (JSON), возвращаются meta()
+        """
+        paths = sorted(set(paths))
+        staging = os.path.join(self.root, f'.staging-{uuid.uuid4().hex}')
+        size = 0
+        try:
+            for path in paths:
+                dest = os.path.join(staging, *path.split('/'))
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                sink.export_file(path, dest)
+                size += os.path.getsize(dest)
+        except (OSError, KeyError) as e:
+            print(f"  ⚠️ Результат не сохранен в кэш: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+
+        with self._locked():
+            entry_dir = os.path.join(self.entries_dir, key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(staging, entry_dir)
+
+            index = self._load_index()
+            now = time.time()
+            index['entries'][key] = {'size': size, 'files': paths, 'created': now, 'last_used': now}
+            if meta is not None:
+                index['entries'][key]['meta'] = meta
+            index['stats']['stores'] += 1
+            self._evict(index, keep=key)
+            self._remove_orphans(index)
+            self._save_index(index)
+        return True
+
+    def meta(self, key):
+        """Сведения, сохраненные с записью (store(meta=...)), или None"""
+        with self._locked():
+            entry = self._load_index()['entries'].get(key)
+        return entry.get('meta') if entry else None
+
+    def _evict(self, index, keep=None):
+        """Удаляет давно не использованные записи, пока размер больше предела"""
+        entries = index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries.pop(key)['size']
+            shutil.rmtree(os.path.join(self.entries_dir, key), ignore_errors=True)
+            index['stats']['evictions'] += 1
+
+    def _remove_orphans(self, index):
+        """Папки записей, которых нет в индексе (сбой до записи индекса, запуски без блокировки)"""
+        try:
+            names = os.listdir(self.entries_dir)
+        except OSError:
+            return
+        for name in names:
+            if name not in index['entries']:
+                shutil.rmtree(os.path.join(self.entries_dir, name), ignore_errors=True)
+
+    def stats(self):
+        """Статистика и занятый объем"""
+        with self._locked():
+            index = self._load_index()
+        stats = dict(index['stats'])
+        stats['entries'] = len(index['entries'])
+        stats['bytes'] = sum(entry['size'] for entry in index['entries'].values())
+        stats['max_bytes'] = self.max_bytes
+        return stats
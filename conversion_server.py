@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP-сервис конвертации (v18.8)
+Принимает .pptx в теле POST-запроса и конвертирует его в пуле
+заранее запущенных процессов (импорт python-pptx, lxml и модулей
+конвертера выполняется один раз на процесс, а не на каждый запрос).
+Результат хранится в памяти (sink='memory') и отдается целиком zip-архивом
+или отдельными файлами. Одинаковые загрузки с одинаковыми параметрами
+получают один и тот же job_id (SHA-256 содержимого) и конвертируются один раз.
+
+Только стандартная библиотека:
+
+    POST /jobs?format=json&shapes=svg    тело - файл .pptx
+         -> 202 {"id": ..., "status": "queued", ...}  (200 - уже известен)
+    GET  /jobs/<id>                       статус задания
+    GET  /jobs/<id>/result.zip            весь результат архивом
+    GET  /jobs/<id>/files/<путь>          отдельный файл (pages/page1.html)
+
+Запуск: python pptx_to_html.py --serve 8000 [--host 0.0.0.0] [--pool 4]
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import mimetypes
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+
+# Предел размера загрузки
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+# Сколько завершенных заданий держать в памяти (старые вытесняются)
+MAX_FINISHED_JOBS = 32
+
+# Предел заданий в очереди и в работе: каждое держит загрузку в памяти
+# (до MAX_UPLOAD_BYTES), сверх предела - 503 с Retry-After
+MAX_PENDING_JOBS = 16
+RETRY_AFTER_SECONDS = 10
+
+# Параметры конвертера, которые можно передать в строке запроса
+JOB_OPTIONS = {
+    'format': ('output_format', ('html', 'json'), 'html'),
+    'json_layout': ('json_layout', ('slide', 'deck'), 'slide'),
+    'shapes': ('shape_render', ('html', 'svg'), 'html'),
+}
+
+
+def _warm_worker():
+    """Инициализатор процесса пула: импорт конвертера до первого задания"""
+    import pptx_to_html  # noqa: F401
+
+
+def convert_upload(data, name, options):
+    """
+    Конвертирует презентацию в процессе пула
+
+    Args:
+        data: Содержимое .pptx (bytes)
+        name: Имя файла для журнала и metadata.json
+        options: Именованные параметры PPTXToHTMLConverter
+
+    Returns:
+        tuple: ({относительный путь: bytes}, журнал конвертации)
+    """
+    from pptx_to_html import PPTXToHTMLConverter
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        # Запись в словарь - потоки-писатели не нужны
+        stream = io.BytesIO(data)
+        stream.name = name
+        converter = PPTXToHTMLConverter(stream, sink='memory', writers=0, **options)
+        files = converter.convert()
+    return files, log.getvalue()
+
+
+class ConversionJob:
+    """Задание конвертации: параметры, future пула и результат"""
+
+    __slots__ = ('id', 'options', 'size', 'future', 'files', 'log', 'error', '_zip', '_lock')
+
+    def __init__(self, job_id, options, size):
+        self.id = job_id
+        self.options = options
+        self.size = size
+        self.future = None
+        self.files = None
+        self.log = ''
+        self.error = None
+        self._zip = None
+        self._lock = threading.Lock()
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return 'failed'
+        if self.files is not None:
+            return 'done'
+        if self.future is not None and self.future.running():
+            return 'running'
+        return 'queued'
+
+    def finish(self, future):
+        """Колбэк future: сохраняет результат или ошибку"""
+        try:
+            self.files, self.log = future.result()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    def describe(self):
+        info = {'id': self.id, 'status': self.status, 'size': self.size, 'options': self.options}
+        if self.files is not None:
+            info['files'] = sorted(self.files)
+            info['result'] = f"/jobs/{self.id}/result.zip"
+            info['index'] = f"/jobs/{self.id}/files/index.html"
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+    def archive(self):
+        """Результат zip-архивом (собирается один раз)"""
+        with self._lock:
+            if self._zip is None:
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    for path in sorted(self.files):
+                        zf.writestr(path, self.files[path])
+                self._zip = buffer.getvalue()
+            return self._zip
+
+
+class ServiceBusy(Exception):
+    """Очередь заданий заполнена (MAX_PENDING_JOBS)"""
+
+
+class ConversionService:
+    """Очередь заданий поверх пула процессов с дедупликацией по хэшу"""
+
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size
+        self.pool = self._new_pool()
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _new_pool(self):
+        # spawn: процессы не наследуют потоки HTTP-сервера (fork из потока небезопасен)
+        return ProcessPoolExecutor(max_workers=self.pool_size, initializer=_warm_worker,
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    def _replace_pool(self, broken):
+        """
+        Новый пул вместо сломанного
+
+        Если процесс пула погиб посреди задания (OOM killer, сбой на
+        поврежденном файле), пул навсегда отклоняет новые задания.
+        Задания сломанного пула завершаются ошибкой BrokenProcessPool
+        и могут быть отправлены заново.
+        """
+        with self._lock:
+            if self.pool is not broken:
+                return
+            print("⚠️ Процесс пула конвертации аварийно завершился - пул перезапущен")
+            self.pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_to_pool(self, data, job):
+        pool = self.pool
+        try:
+            return pool.submit(convert_upload, data, f"{job.id}.pptx", job.options)
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            return self.pool.submit(convert_upload, data, f"{job.id}.pptx", job.options)
+
+    @staticmethod
+    def job_id(data, options):
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()[:32]
+
+    def submit(self, data, options):
+        """
+        Ставит загрузку в очередь
+
+        Returns:
+            tuple: (ConversionJob, True если задание новое)
+
+        Raises:
+            ServiceBusy: В очереди и в работе уже MAX_PENDING_JOBS заданий
+            BrokenProcessPool: Перезапущенный пул тоже не принял задание
+                (задание помечается как failed)
+        """
+        job_id = self.job_id(data, options)
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status != 'failed':
+                self.jobs.move_to_end(job_id)
+                return job, False
+
+            pending = sum(1 for other in self.jobs.values() if other.status in ('queued', 'running'))
+            if pending >= MAX_PENDING_JOBS:
+                raise ServiceBusy(f"Заданий в очереди: {pending}")
+
+            job = ConversionJob(job_id, options, len(data))
+            self.jobs[job_id] = job
+            self._evict()
+
+        try:
+            job.future = self._submit_to_pool(data, job)
+        except BrokenProcessPool as e:
+            job.error = f"{type(e).__name__}: {e}"
+            raise
+        job.future.add_done_callback(job.finish)
+        return job, True
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """Маршруты /jobs; сервис - в self.server.service"""
+
+    server_version = 'PPTXToHTML/18.8'
+
+    def _send(self, status, body, content_type='application/json; charset=utf-8', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, {'error': message}, headers=headers)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            return self._error(404, 'Неизвестный путь')
+
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            return self._error(411, 'Нужен заголовок Content-Length')
+        if length <= 0:
+            return self._error(400, 'Пустое тело запроса')
+        if length > MAX_UPLOAD_BYTES:
+            return self._error(413, f'Файл больше {MAX_UPLOAD_BYTES // 1048576} МБ')
+
+        data = self.rfile.read(length)
+        if not zipfile.is_zipfile(io.BytesIO(data)):
+            return self._error(400, 'Тело запроса не является файлом .pptx')
+
+        query = parse_qs(url.query)
+        options = {}
+        for name, (option, choices, default) in JOB_OPTIONS.items():
+            value = query.get(name, [default])[0]
+            if value not in choices:
+                return self._error(400, f"Параметр {name}: допустимо {', '.join(choices)}")
+            options[option] = value
+
+        try:
+            job, created = self.server.service.submit(data, options)
+        except ServiceBusy as e:
+            return self._error(503, f'Сервис занят ({e}), повторите запрос позже',
+                               {'Retry-After': str(RETRY_AFTER_SECONDS)})
+        except BrokenProcessPool:
+            return self._error(503, 'Пул процессов конвертации недоступен, повторите запрос позже',
+                               {'Retry-After': str(RETRY_AFTER_SECONDS)})
+        self._send(202 if created else 200, job.describe())
+
+    def do_GET(self):
+        parts = [unquote(part) for part in urlsplit(self.path).path.strip('/').split('/')]
+        if len(parts) < 2 or parts[0] != 'jobs':
+            return self._error(404, 'Неизвестный путь')
+
+        job = self.server.service.get(parts[1])
+        if job is None:
+            return self._error(404, 'Задание не найдено')
+
+        if len(parts) == 2:
+            return self._send(200, job.describe())
+
+        if job.status != 'done':
+            return self._error(409 if job.status != 'failed' else 500, f"Задание {job.status}")
+
+        if parts[2:] == ['result.zip']:
+            return self._send(200, job.archive(), 'application/zip')
+
+        if parts[2:] == ['log']:
+            return self._send(200, job.log.encode('utf-8'), 'text/plain; charset=utf-8')
+
+        if parts[2] == 'files' and len(parts) > 3:
+            path = '/'.join(parts[3:])
+            body = job.files.get(path)
+            if body is None:
+                return self._error(404, f'Файл не найден: {path}')
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type in ('application/json', 'application/javascript'):
+                content_type += '; charset=utf-8'
+            return self._send(200, body, content_type)
+
+        return self._error(404, 'Неизвестный путь')
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}")
+
+
+def serve(host='127.0.0.1', port=8000, pool_size=None):
+    """Запускает сервис (блокирует до Ctrl+C)"""
+    service = ConversionService(pool_size)
+    server = ThreadingHTTPServer((host, port), ConversionRequestHandler)
+    server.service = service
+    workers = pool_size or os.cpu_count() or 1
+    print(f"🚀 Сервис конвертации: http://{host}:{server.server_address[1]}/jobs ({workers} процессов)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Остановка сервиса")
+    finally:
+        server.server_close()
+        service.shutdown()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль метрик конвертации (v18.13)
+Собирает за одну конвертацию данные для stats.json - отчета о стоимости
+конвертации для систем мониторинга:
+
+    deck    - гистограмма типов фигур, изображения по классам
+              классификатора, байты и файлы по классам вывода, оценка
+              числа DOM-узлов, время этапов, доли попаданий кэшей и
+              повторно использованных медиа
+    slides  - то же на каждый слайд (байты - страница, изображения и JSON
+              слайда) и время разбора
+
+Файлы вывода учитываются колбэком OutputWriter.on_written, поэтому
+запись из потоков-писателей безопасна (блокировка).
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from progress_events import asset_kind
+
+
+# Файл вывода, относящийся к слайду: pages/page3.html, images/slide3_img1.png, data/slide3.json
+SLIDE_ASSET_PATTERN = re.compile(r'^(?:pages/page|images/slide|data/slide)(\d+)[._]')
+
+STATS_VERSION = 1
+
+
+def ratio(part, total):
+    """Доля с 4 знаками; None, если знаменатель 0"""
+    return round(part / total, 4) if total else None
+
+
+def estimate_dom_nodes(slide):
+    """
+    Оценка числа DOM-узлов слайда (элементы разметки, без текстовых узлов)
+
+    Считается по модели слайда одинаково для HTML и JSON-режима:
+    блок фигуры, абзацы и runs текста, строки и ячейки таблиц, части
+    QR-групп, контуры SVG.
+    """
+    nodes = 1  # .slide
+    for shape in slide.shapes:
+        kind = shape.kind
+        if kind == 'text':
+            nodes += 1 + sum(1 + len(paragraph.runs) for paragraph in shape.content)
+        elif kind == 'image':
+            nodes += 2
+        elif kind == 'qr-group':
+            nodes += 1 + sum(2 if part.kind == 'picture' else 1 for part in shape.parts or ())
+        elif kind == 'table':
+            nodes += 2 + sum(1 + len(cells) for cells in shape.content)
+        elif kind == 'shape':
+            nodes += 2
+        elif kind == 'vector':
+            nodes += len(shape.content.get('d', ())) + 1
+    return nodes
+
+
+class ConversionStats:
+    """Метрики одной конвертации"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}  # Этап -> секунды
+        self.slides = {}  # Номер слайда -> метрики слайда
+        self.assets = {}  # Класс файла -> {'files', 'bytes'}
+        self.slide_bytes = Counter()
+        self.media_parts = Counter()  # Часть пакета -> сколько раз записана
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Замер этапа: with stats.stage('html'): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(self.stages.get(name, 0) + time.perf_counter() - started, 4)
+
+    def record_slide(self, slide, seconds, degraded=None):
+        """Метрики слайда после разбора"""
+        kinds = Counter(shape.kind for shape in slide.shapes)
+        images = Counter(shape.image_type or 'unknown' for shape in slide.shapes
+                         if shape.kind in ('image', 'qr-group'))
+        if slide.background_image:
+            background = 'image'
+        elif slide.background:
+            background = 'color'
+        else:
+            background = 'none'
+        entry = {
+            'seconds': round(seconds, 4),
+            'shapes': len(slide.shapes),
+            'shape_types': dict(sorted(kinds.items())),
+            'images': dict(sorted(images.items())),
+            'background': background,
+            'dom_nodes': estimate_dom_nodes(slide),
+        }
+        if degraded:
+            entry['degraded'] = degraded
+        self.slides[slide.num] = entry
+
+    def record_media(self, partname):
+        """Медиа-часть пакета скопирована в вывод (для доли повторов)"""
+        with self._lock:
+            self.media_parts[partname] += 1
+
+    def record_asset(self, path, size):
+        """Файл вывода записан (колбэк OutputWriter, любой поток)"""
+        kind = asset_kind(path)
+        match = SLIDE_ASSET_PATTERN.match(path)
+        with self._lock:
+            totals = self.assets.setdefault(kind, {'files': 0, 'bytes': 0})
+            totals['files'] += 1
+            totals['bytes'] += size
+            if match:
+                self.slide_bytes[int(match.group(1))] += size
+
+    def report(self, style_cache, media_summary, conversion_cache=None):
+        """
+        Содержимое stats.json
+
+        Args:
+            style_cache: style_extractor.memo.stats()
+            media_summary: MediaIndex.summary()
+            conversion_cache: ConversionCache.stats() с hit и hit_ratio или None
+        """
+        with self._lock:
+            assets = {kind: dict(totals) for kind, totals in sorted(self.assets.items())}
+            slide_bytes = dict(self.slide_bytes)
+            media_parts = Counter(self.media_parts)
+
+        slides = []
+        shape_types = Counter()
+        images = Counter()
+        dom_nodes = []
+        for num in sorted(self.slides):
+            entry = dict({'slide_num': num}, **self.slides[num], bytes=slide_bytes.get(num, 0))
+            shape_types.update(entry['shape_types'])
+            images.update(entry['images'])
+            dom_nodes.append(entry['dom_nodes'])
+            slides.append(entry)
+
+        lookups = style_cache['hits'] + style_cache['misses']
+        duplicate_media = sum(len(names) - 1 for names in media_summary['duplicates'])
+        media_writes = sum(media_parts.values())
+        stages = dict(self.stages, total=round(time.perf_counter() - self.started, 4))
+
+        deck = {
+            'slides': len(slides),
+            'shapes': sum(shape_types.values()),
+            'shape_types': dict(sorted(shape_types.items())),
+            'images': dict(sorted(images.items())),
+            'assets': assets,
+            'bytes': sum(totals['bytes'] for totals in assets.values()),
+            'files': sum(totals['files'] for totals in assets.values()),
+            'dom_nodes': {
+                'total': sum(dom_nodes),
+                'max': max(dom_nodes, default=0),
+                'mean': round(sum(dom_nodes) / len(dom_nodes), 1) if dom_nodes else 0,
+            },
+            'stages': stages,
+            'slide_seconds': {
+                'total': round(sum(entry['seconds'] for entry in slides), 4),
+                'max': max((entry['seconds'] for entry in slides), default=0),
+            },
+            'style_cache': dict(style_cache, hit_ratio=ratio(style_cache['hits'], lookups)),
+            'media': {
+                'package_files': media_summary['files'],
+                'package_duplicates': duplicate_media,
+                'package_duplicate_ratio': ratio(duplicate_media, media_summary['files']),
+                'written': media_writes,
+                'distinct_parts': len(media_parts),
+                'reuse_ratio': ratio(media_writes - len(media_parts), media_writes),
+            },
+        }
+        if conversion_cache is not None:
+            deck['conversion_cache'] = conversion_cache
+
+        return {'version': STATS_VERSION, 'cached': False, 'deck': deck, 'slides': slides}
+
+
+def cached_report(stats, files, conversion_cache, original=None):
+    """
+    stats.json при попадании в кэш конвертаций
+
+    Args:
+        stats: ConversionStats этого запуска (время восстановления)
+        files: Количество восстановленных файлов
+        conversion_cache: Сведения о кэше (ConversionCache.stats() и hit)
+        original: Итог исходной конвертации из записи кэша
+            {'slides', 'files', 'bytes', 'seconds'} или None
+    """
+    seconds = round(time.perf_counter() - stats.started, 4)
+    deck = {
+        'files': files,
+        'stages': {'restore': seconds, 'total': seconds},
+        'conversion_cache': conversion_cache,
+    }
+    if original:
+        deck['slides'] = original['slides']
+        deck['bytes'] = original['bytes']
+        deck['original_seconds'] = original['seconds']
+        deck['saved_seconds'] = round(max(0.0, original['seconds'] - seconds), 4)
+    return {'version': STATS_VERSION, 'cached': True, 'deck': deck, 'slides': []}
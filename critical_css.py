@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль извлечения критического CSS (v17.1)
+Для каждой страницы оставляет только правила, селекторы которых
+реально встречаются в её разметке. Полный style.css подгружается отложенно.
+"""
+
+import re
+
+
+class CriticalCSSExtractor:
+    """Выбирает из общей таблицы стилей подмножество правил для одной страницы"""
+
+    # Интерактивные состояния не нужны для первой отрисовки -
+    # они придут вместе с отложенным style.css
+    DEFERRED_PSEUDO = (':hover', ':active', ':focus')
+
+    _comment_re = re.compile(r'/\*.*?\*/', re.DOTALL)
+    _class_attr_re = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']')
+    _tag_re = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+    _selector_class_re = re.compile(r'\.([\w-]+)')
+    _selector_tag_re = re.compile(r'(?:^|[\s>+~])([a-zA-Z][a-zA-Z0-9]*)')
+
+    def __init__(self, css_text):
+        """
+        Args:
+            css_text: Полный текст таблицы стилей (результат generate_css)
+        """
+        self.blocks = self._parse_blocks(self._comment_re.sub('', css_text))
+        self.keyframes = {
+            block['name']: block for block in self.blocks if block['kind'] == 'keyframes'
+        }
+
+    def _parse_blocks(self, css_text):
+        """Разбирает CSS на блоки: обычные правила, @media и @keyframes"""
+        blocks = []
+        pos = 0
+        length = len(css_text)
+
+        while pos < length:
+            brace = css_text.find('{', pos)
+            if brace == -1:
+                break
+
+            prelude = css_text[pos:brace].strip()
+
+            # Ищем парную закрывающую скобку
+            depth = 1
+            end = brace + 1
+            while end < length and depth:
+                if css_text[end] == '{':
+                    depth += 1
+                elif css_text[end] == '}':
+                    depth -= 1
+                end += 1
+
+            body = css_text[brace + 1:end - 1]
+            pos = end
+
+            if prelude.startswith('@media'):
+                blocks.append({
+                    'kind': 'media',
+                    'prelude': ' '.join(prelude.split()),
+                    'rules': self._parse_blocks(body),
+                })
+            elif prelude.startswith('@keyframes'):
+                blocks.append({
+                    'kind': 'keyframes',
+                    'name': prelude.split()[1],
+                    'text': f"{' '.join(prelude.split())}{{{self._minify(body)}}}",
+                })
+            elif prelude.startswith('@'):
+                # @supports и прочие at-правила оставляем как есть
+                blocks.append({'kind': 'other', 'text': f"{prelude}{{{self._minify(body)}}}"})
+            else:
+                blocks.append({
+                    'kind': 'rule',
+                    'selectors': [s.strip() for s in prelude.split(',') if s.strip()],
+                    'body': self._minify_declarations(body),
+                })
+
+        return blocks
+
+    @staticmethod
+    def _minify(text):
+        """Схлопывает пробелы во вложенном блоке"""
+        text = ' '.join(text.split())
+        return re.sub(r'\s*([{};:,])\s*', r'\1', text)
+
+    @staticmethod
+    def _minify_declarations(body):
+        """Нормализует список деклараций: 'a: b; c: d' -> 'a:b;c:d'"""
+        declarations = []
+        for declaration in body.split(';'):
+            if ':' not in declaration:
+                continue
+            prop, value = declaration.split(':', 1)
+            declarations.append(f"{prop.strip()}:{' '.join(value.split())}")
+        return ';'.join(declarations)
+
+    def collect_usage(self, html):
+        """
+        Собирает классы и теги, использованные в разметке страницы
+
+        Returns:
+            tuple: (set классов, set тегов)
+        """
+        classes = set()
+        for match in self._class_attr_re.finditer(html):
+            classes.update(match.group(1).split())
+        tags = {tag.lower() for tag in self._tag_re.findall(html)}
+        return classes, tags
+
+    def _selector_matches(self, selector, classes, tags):
+        """Проверяет, может ли селектор сработать на странице"""
+        if any(pseudo in selector for pseudo in self.DEFERRED_PSEUDO):
+            return False
+
+        # Псевдоэлементы и псевдоклассы не влияют на проверку классов/тегов
+        plain = re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector)
+
+        for cls in self._selector_class_re.findall(plain):
+            if cls not in classes:
+                return False
+
+        for tag in self._selector_tag_re.findall(plain):
+            if tag.lower() not in tags:
+                return False
+
+        return True
+
+    def _filter_rules(self, blocks, classes, tags, used_animations):
+        """Отбирает правила, применимые к странице"""
+        output = []
+
+        for block in blocks:
+            kind = block['kind']
+
+            if kind == 'rule':
+                selectors = [s for s in block['selectors'] if self._selector_matches(s, classes, tags)]
+                if selectors and block['body']:
+                    output.append(f"{','.join(selectors)}{{{block['body']}}}")
+                    for name in self.keyframes:
+                        if re.search(rf'animation[\w-]*:[^;]*\b{re.escape(name)}\b', block['body']):
+                            used_animations.add(name)
+
+            elif kind == 'media':
+                # Печатные стили не блокируют отрисовку на экране
+                if 'print' in block['prelude'] and 'screen' not in block['prelude']:
+                    continue
+                inner = self._filter_rules(block['rules'], classes, tags, used_animations)
+                if inner:
+                    output.append(f"{block['prelude']}{{{''.join(inner)}}}")
+
+            elif kind == 'other':
+                output.append(block['text'])
+
+        return output
+
+    def extract(self, html, extra_usage=None):
+        """
+        Возвращает критический CSS для страницы
+
+        Args:
+            html: Разметка страницы (достаточно <body>)
+            extra_usage: (классы, теги), которые появятся в DOM позже,
+                         например из клиентского рендерера scene graph
+
+        Returns:
+            str: Минимизированный CSS с правилами, нужными для первой отрисовки
+        """
+        classes, tags = self.collect_usage(html)
+        if extra_usage:
+            classes |= set(extra_usage[0])
+            tags |= set(extra_usage[1])
+        used_animations = set()
+        rules = self._filter_rules(self.blocks, classes, tags, used_animations)
+
+        for name in sorted(used_animations):
+            rules.append(self.keyframes[name]['text'])
+
+        return '\n'.join(rules)
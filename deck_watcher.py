@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Режим наблюдения за презентацией (v18.12)
+Следит за .pptx и после каждого сохранения пересобирает только
+изменившиеся слайды (выборочная конвертация v18.1), а открытые в
+браузере страницы обновляются без ручной перезагрузки:
+
+    http://127.0.0.1:8001/            папка вывода (HTML без кэширования)
+    GET /__livereload                 поток событий (Server-Sent Events)
+    GET /__livereload.js              клиент, подключается к каждой HTML-странице
+
+Изменения определяются по отпечаткам слайдов - CRC членов zip-архива
+(сам слайд, его связи, макет, образец, тема и медиа) без разбора XML
+презентации. Изменение presentation.xml (порядок, размер, число
+слайдов) - полная пересборка.
+
+Клиент получает {"slides": [...], "full": false} и, если открыта
+страница изменившегося слайда, загружает ее заново и заменяет только
+отличающиеся фигуры по data-shape-id (id из cNvPr). Если изменилось
+что-то кроме фигур (фон, состав фигур, SVG-слой, критический CSS,
+JSON-режим) - страница перезагружается целиком.
+
+Только стандартная библиотека и lxml.
+"""
+
+import contextlib
+import functools
+import io
+import json
+import os
+import posixpath
+import threading
+import time
+import zipfile
+import zlib
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+
+from lxml import etree
+
+
+# Период опроса файла, с
+POLL_INTERVAL = 0.2
+
+# Пустое событие SSE, чтобы прокси не закрывали соединение, с
+KEEPALIVE_SECONDS = 15
+
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PR = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Связи, не влияющие на слайд: заметки, обратные ссылки, все макеты образца
+SKIPPED_RELATIONSHIPS = ('/notesSlide', '/notesMaster', '/slide', '/slideLayout', '/slideMaster')
+
+LIVE_RELOAD_JS = r"""(function () {
+    'use strict';
+    var match = location.pathname.match(/page(\d+)\.html$/);
+    var slideNum = match ? parseInt(match[1], 10) : null;
+    var slide = document.querySelector('.slide[data-slide]');
+    // Страница в том виде, в каком ее прислал сервер (до работы скриптов)
+    var pristine = slide ? slide.cloneNode(true) : null;
+
+    function skeleton(root) {
+        var copy = root.cloneNode(true);
+        copy.querySelectorAll('[data-shape-id]').forEach(function (node) {
+            node.replaceWith(document.createComment(node.getAttribute('data-shape-id')));
+        });
+        return copy.outerHTML;
+    }
+
+    function inlineStyles(doc) {
+        return Array.prototype.map.call(doc.head.querySelectorAll('style'), function (node) {
+            return node.textContent;
+        }).join('\n');
+    }
+
+    function patch() {
+        return fetch(location.pathname, {cache: 'no-store'}).then(function (response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            return response.text();
+        }).then(function (text) {
+            var next = new DOMParser().parseFromString(text, 'text/html');
+            var fresh = next.querySelector('.slide[data-slide]');
+            if (!pristine || !fresh || fresh.hasAttribute('data-scene')) {
+                throw new Error('no shape markup');
+            }
+            if (skeleton(pristine) !== skeleton(fresh) || inlineStyles(document) !== inlineStyles(next)) {
+                throw new Error('slide structure changed');
+            }
+            var patched = 0;
+            fresh.querySelectorAll('[data-shape-id]').forEach(function (node) {
+                var selector = '[data-shape-id="' + node.getAttribute('data-shape-id') + '"]';
+                var before = pristine.querySelector(selector);
+                if (before.outerHTML === node.outerHTML) {
+                    return;
+                }
+                slide.querySelector(selector).replaceWith(document.importNode(node, true));
+                patched++;
+            });
+            pristine = fresh.cloneNode(true);
+            console.log('[live-reload] slide ' + slideNum + ': ' + patched + ' shape(s) updated');
+        });
+    }
+
+    var source = new EventSource('/__livereload');
+    source.onmessage = function (message) {
+        var update = JSON.parse(message.data);
+        if (update.error) {
+            console.warn('[live-reload] ' + update.error);
+            return;
+        }
+        if (update.full) {
+            location.reload();
+            return;
+        }
+        if (slideNum === null || update.slides.indexOf(slideNum) < 0) {
+            return;
+        }
+        patch().catch(function (error) {
+            console.log('[live-reload] reload: ' + error.message);
+            location.reload();
+        });
+    };
+})();
+"""
+
+LIVE_RELOAD_TAG = b'<script src="/__livereload.js"></script>\n'
+
+
+def _rels_name(name):
+    """Имя файла связей части: ppt/slides/slide1.xml -> ppt/slides/_rels/slide1.xml.rels"""
+    directory, base = posixpath.split(name)
+    return posixpath.join(directory, '_rels', base + '.rels')
+
+
+def _relationships(archive, name):
+    """Внутренние связи части: [(тип связи, имя члена архива, rId)]"""
+    try:
+        data = archive.read(_rels_name(name))
+    except KeyError:
+        return []
+    directory = posixpath.dirname(name)
+    result = []
+    for rel in etree.fromstring(data).iter(_PR + 'Relationship'):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            member = target.lstrip('/')
+        else:
+            member = posixpath.normpath(posixpath.join(directory, target))
+        result.append((rel.get('Type', ''), member, rel.get('Id')))
+    return result
+
+
+def deck_fingerprint(pptx_path):
+    """
+    Отпечатки презентации
+
+    Returns:
+        tuple: (отпечаток презентации, [отпечаток слайда 1, ...])
+    """
+    with zipfile.ZipFile(pptx_path) as archive:
+        infos = {info.filename: info for info in archive.infolist()}
+
+        def member_digest(name):
+            info = infos.get(name)
+            return f"{name}:{info.CRC}:{info.file_size}" if info else f"{name}:-"
+
+        presentation = 'ppt/presentation.xml'
+        relationships = {rel_id: member for _type, member, rel_id in _relationships(archive, presentation)}
+        order = [relationships.get(sld_id.get(_R + 'id'))
+                 for sld_id in etree.fromstring(archive.read(presentation)).iter(_P + 'sldId')]
+        deck = zlib.crc32('|'.join([member_digest(presentation), member_digest(_rels_name(presentation))]
+                                   + [str(name) for name in order]).encode('utf-8'))
+
+        def slide_digest(name):
+            parts = []
+            pending = [(name, True)]
+            seen = set()
+            while pending:
+                member, is_slide = pending.pop()
+                if member in seen:
+                    continue
+                seen.add(member)
+                parts.append(member_digest(member))
+                parts.append(member_digest(_rels_name(member)))
+                if not member.endswith('.xml'):
+                    continue
+                for rel_type, target, _rel_id in _relationships(archive, member):
+                    # Макет - только собственный; образец - только через макет
+                    if rel_type.endswith('/slideLayout') and is_slide:
+                        pending.append((target, False))
+                    elif rel_type.endswith('/slideMaster') and member.startswith('ppt/slideLayouts/'):
+                        pending.append((target, False))
+                    elif not rel_type.endswith(SKIPPED_RELATIONSHIPS):
+                        pending.append((target, False))
+            return zlib.crc32('|'.join(sorted(parts)).encode('utf-8'))
+
+        return deck, [slide_digest(name) if name else None for name in order]
+
+
+class LiveReloadChannel:
+    """Последнее событие пересборки и ожидание следующего (для потоков SSE)"""
+
+    def __init__(self):
+        self.version = 0
+        self.message = None
+        self._condition = threading.Condition()
+
+    def publish(self, message):
+        with self._condition:
+            self.version += 1
+            self.message = dict(message, version=self.version)
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Событие новее version или None по таймауту: (событие, его версия)"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.version > version, timeout)
+            if self.version > version:
+                return self.message, self.version
+            return None, version
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """Файлы папки вывода + /__livereload; HTML дополняется клиентом live-reload"""
+
+    server_version = 'PPTXToHTML-watch/18.12'
+
+    def end_headers(self):
+        # Страницы меняются при каждом сохранении презентации
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def do_GET(self):
+        path = unquote(urlsplit(self.path).path)
+        if path == '/__livereload':
+            return self._event_stream()
+        if path == '/__livereload.js':
+            return self._send(LIVE_RELOAD_JS.encode('utf-8'), 'application/javascript; charset=utf-8')
+
+        local = self.translate_path(self.path)
+        if os.path.isdir(local):
+            local = os.path.join(local, 'index.html')
+        if local.endswith('.html') and os.path.isfile(local):
+            with open(local, 'rb') as f:
+                html = f.read()
+            position = html.rfind(b'</body>')
+            if position < 0:
+                position = len(html)
+            return self._send(html[:position] + LIVE_RELOAD_TAG + html[position:], 'text/html; charset=utf-8')
+        return super().do_GET()
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event_stream(self):
+        channel = self.server.channel
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        version = channel.version
+        try:
+            while True:
+                message, version = channel.wait(version, KEEPALIVE_SECONDS)
+                if message is None:
+                    self.wfile.write(b': keepalive\n\n')
+                else:
+                    self.wfile.write(f"data: {json.dumps(message, ensure_ascii=False)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DeckWatcher:
+    """Наблюдение за .pptx: пересборка изменившихся слайдов и уведомление страниц"""
+
+    def __init__(self, pptx_path, output_dir, options=None, interval=POLL_INTERVAL):
+        """
+        Args:
+            pptx_path: Путь к .pptx
+            output_dir: Папка вывода (приемник - только папка на диске)
+            options: Прочие именованные параметры PPTXToHTMLConverter
+            interval: Период опроса файла, с
+        """
+        self.pptx_path = pptx_path
+        self.output_dir = output_dir
+        self.options = dict(options or {})
+        self.interval = interval
+        self.channel = LiveReloadChannel()
+        self.fingerprint = None
+        self._stat = None
+
+    def build(self, slides=None):
+        """
+        Конвертация (slides - номера слайдов; None - полная)
+
+        Подробный вывод конвертера скрывается; печатаются предупреждения
+        и итог. Ошибка не прерывает наблюдение.
+
+        Returns:
+            bool: Успешно ли завершилась конвертация
+        """
+        from pptx_to_html import PPTXToHTMLConverter
+
+        started = time.perf_counter()
+        log = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(log):
+                PPTXToHTMLConverter(self.pptx_path, self.output_dir, slides=slides, **self.options).convert()
+        except Exception as e:
+            print(f"❌ Ошибка конвертации: {e}")
+            self.channel.publish({'error': f"{type(e).__name__}: {e}"})
+            return False
+        finally:
+            for line in log.getvalue().splitlines():
+                if '⚠️' in line:
+                    print(line)
+
+        seconds = time.perf_counter() - started
+        if slides is None:
+            print(f"🔁 {time.strftime('%H:%M:%S')} Полная сборка за {seconds:.2f} с")
+        else:
+            print(f"🔁 {time.strftime('%H:%M:%S')} Слайды {', '.join(map(str, slides))} "
+                  f"пересобраны за {seconds:.2f} с")
+        self.channel.publish({'full': slides is None, 'slides': slides or [], 'seconds': round(seconds, 3)})
+        return True
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.pptx_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """Один опрос: пересобирает изменившиеся слайды, если файл сохранен заново"""
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return
+        try:
+            fingerprint = deck_fingerprint(self.pptx_path)
+        except (OSError, zipfile.BadZipFile, KeyError, etree.XMLSyntaxError):
+            # Файл еще записывается - повтор на следующем опросе
+            return
+        self._stat = stat
+
+        previous = self.fingerprint
+        deck, slides = fingerprint
+        if previous is None or previous[0] != deck or len(previous[1]) != len(slides):
+            changed = None
+        else:
+            changed = [num for num, (old, new) in enumerate(zip(previous[1], slides), 1) if old != new]
+            if not changed:
+                # Изменились только свойства документа и т.п.
+                self.fingerprint = fingerprint
+                return
+
+        if self.build(changed):
+            self.fingerprint = fingerprint
+        else:
+            # Следующее сохранение пересоберет презентацию целиком
+            self.fingerprint = None
+
+    def run(self, host='127.0.0.1', port=8001):
+        """Первая сборка, сервер live-reload и цикл опроса (до Ctrl+C)"""
+        handler = functools.partial(LiveReloadHandler, directory=os.path.abspath(self.output_dir))
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        server.channel = self.channel
+        thread = threading.Thread(target=server.serve_forever, name='live-reload', daemon=True)
+
+        self.check()
+        thread.start()
+        print(f"👀 Наблюдение за {self.pptx_path}: http://{host}:{server.server_address[1]}/ (Ctrl+C - выход)")
+        try:
+            while True:
+                time.sleep(self.interval)
+                self.check()
+        except KeyboardInterrupt:
+            print("\n⏹️ Наблюдение остановлено")
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль инвентаризации шрифтов (v17.9)
+Собирает шрифты, реально использованные на каждой странице, извлекает
+встроенные в презентацию шрифты (p:embeddedFontLst, .fntdata в формате EOT)
+и формирует для страницы только нужные @font-face (font-display: swap)
+и <link rel="preload">.
+"""
+
+import os
+import posixpath
+import re
+import struct
+
+
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+# Варианты начертаний p:embeddedFont -> (font-weight, font-style)
+EMBEDDED_VARIANTS = {
+    'regular': ('400', 'normal'),
+    'bold': ('700', 'normal'),
+    'italic': ('400', 'italic'),
+    'boldItalic': ('700', 'italic'),
+}
+
+# Флаги заголовка EOT
+EOT_MAGIC = 0x504C
+EOT_FLAG_COMPRESSED = 0x4            # MicroType Express - распаковка не поддерживается
+EOT_FLAG_XOR_ENCRYPTED = 0x10000000  # Данные шрифта зашифрованы XOR 0x50
+
+SFNT_SIGNATURES = (b'\x00\x01\x00\x00', b'true', b'OTTO')
+
+
+def extract_eot_font_data(blob):
+    """
+    Извлекает TrueType/OpenType данные из встроенного шрифта
+
+    Args:
+        blob: Содержимое части шрифта (.fntdata - EOT, либо обычный sfnt)
+
+    Returns:
+        tuple: (bytes данных шрифта или None, причина отказа или None)
+    """
+    if blob[:4] in SFNT_SIGNATURES:
+        return blob, None
+
+    if len(blob) < 36:
+        return None, 'слишком короткий заголовок'
+
+    eot_size, font_data_size, _version, flags = struct.unpack_from('<IIII', blob, 0)
+    if struct.unpack_from('<H', blob, 34)[0] != EOT_MAGIC:
+        return None, 'неизвестный формат'
+
+    if flags & EOT_FLAG_COMPRESSED:
+        return None, 'сжатие MicroType Express'
+
+    # FontData всегда расположены в конце структуры EOT
+    eot_size = min(eot_size, len(blob))
+    start = eot_size - font_data_size
+    if font_data_size == 0 or start < 36:
+        return None, 'некорректный размер данных'
+    data = blob[start:eot_size]
+
+    if flags & EOT_FLAG_XOR_ENCRYPTED:
+        data = (int.from_bytes(data, 'big') ^ int.from_bytes(b'\x50' * len(data), 'big')).to_bytes(len(data), 'big')
+
+    if data[:4] not in SFNT_SIGNATURES:
+        return None, 'данные шрифта не распознаны'
+    return data, None
+
+
+class FontInventory:
+    """Учет шрифтов презентации и генерация их подключения для страниц"""
+
+    def __init__(self):
+        # family -> {(weight, style): {'file': 'fonts/...', 'format': 'truetype'|'opentype'}}
+        self.faces = {}
+
+    @staticmethod
+    def _slug(family):
+        return re.sub(r'[^\w-]+', '-', family).strip('-').lower() or 'font'
+
+    def load_embedded(self, prs, fonts_dir, writer=None, assets=None):
+        """
+        Извлекает встроенные шрифты в fonts_dir
+
+        Args:
+            writer: output_writer.OutputWriter для фоновой записи (v18.6);
+                None - файлы пишутся сразу. С writer fonts_dir - путь внутри
+                приемника вывода ('fonts', v18.7)
+            assets: asset_manifest.AssetManifest - имя файла с хэшем (v18.14)
+
+        Returns:
+            int: Количество сохраненных начертаний
+        """
+        font_lst = prs.part._element.find(_P + 'embeddedFontLst')
+        if font_lst is None:
+            return 0
+
+        saved = 0
+        for embedded in font_lst.findall(_P + 'embeddedFont'):
+            font = embedded.find(_P + 'font')
+            family = font.get('typeface') if font is not None else None
+            if not family:
+                continue
+
+            variants = []
+            for variant, (weight, style) in EMBEDDED_VARIANTS.items():
+                ref = embedded.find(_P + variant)
+                if ref is None or not ref.get(_R + 'id'):
+                    continue
+
+                try:
+                    blob = prs.part.related_part(ref.get(_R + 'id')).blob
+                except KeyError:
+                    continue
+
+                data, reason = extract_eot_font_data(blob)
+                if data is None:
+                    print(f"  ⚠️ Шрифт {family} ({variant}) пропущен: {reason}")
+                    continue
+
+                is_otf = data[:4] == b'OTTO'
+                filename = f"{self._slug(family)}-{variant.lower()}.{'otf' if is_otf else 'ttf'}"
+                font_path = f"fonts/{filename}"
+                if writer is not None:
+                    if assets is not None:
+                        font_path = assets.name(font_path, data)
+                    writer.write_bytes(f"{fonts_dir}/{posixpath.basename(font_path)}", data)
+                else:
+                    os.makedirs(fonts_dir, exist_ok=True)
+                    with open(os.path.join(fonts_dir, filename), 'wb') as f:
+                        f.write(data)
+
+                self.faces.setdefault(family, {})[(weight, style)] = {
+                    'file': font_path,
+                    'format': 'opentype' if is_otf else 'truetype',
+                }
+                variants.append(variant)
+                saved += 1
+
+            if variants:
+                print(f"  🔤 Встроенный шрифт: {family} ({', '.join(variants)})")
+
+        return saved
+
+    @staticmethod
+    def page_faces(shapes):
+        """
+        Начертания, использованные на странице
+
+        Returns:
+            set: {(family, weight, style)}
+        """
+        used = set()
+        for shape in shapes:
+            if shape.kind != 'text':
+                continue
+            for paragraph in shape.content:
+                for run in paragraph.runs:
+                    family = run.style.get('font-family')
+                    if family and run.text.strip():
+                        used.add((
+                            family,
+                            '700' if run.style.get('font-weight') == 'bold' else '400',
+                            run.style.get('font-style', 'normal'),
+                        ))
+        return used
+
+    def face_for(self, family, weight, style):
+        """Встроенное начертание для (family, weight, style) с откатом к обычному"""
+        variants = self.faces.get(family)
+        if not variants:
+            return None, None
+        for key in ((weight, style), ('400', style), (weight, 'normal'), ('400', 'normal')):
+            if key in variants:
+                return key, variants[key]
+        return None, None
+
+    def head_html(self, used_faces, prefix=''):
+        """
+        <link rel="preload"> и @font-face только для начертаний страницы
+
+        Args:
+            used_faces: Результат page_faces
+            prefix: Путь от страницы к корню вывода ('../' для pages/)
+        """
+        needed = {}
+        for family, weight, style in used_faces:
+            key, face = self.face_for(family, weight, style)
+            if face is not None:
+                needed[(family,) + key] = face
+
+        if not needed:
+            return ''
+
+        lines = []
+        rules = []
+        for (family, weight, style), face in sorted(needed.items()):
+            href = prefix + face['file']
+            font_type = 'font/otf' if face['format'] == 'opentype' else 'font/ttf'
+            lines.append(f'    <link rel="preload" href="{href}" as="font" type="{font_type}" crossorigin>')
+            rules.append(
+                f"@font-face{{font-family:'{family}';src:url('{href}') format('{face['format']}');"
+                f"font-weight:{weight};font-style:{style};font-display:swap}}"
+            )
+
+        lines.append('    <style id="font-faces">')
+        lines.extend(rules)
+        lines.append('    </style>')
+        return '\n'.join(lines)
+
+    def summary(self, pages):
+        """
+        Сводка для metadata.json
+
+        Args:
+            pages: {номер слайда: page_faces(...)}
+        """
+        fonts = {}
+        for slide_num, used in sorted(pages.items()):
+            for family, _weight, _style in used:
+                entry = fonts.setdefault(family, {
+                    'embedded': family in self.faces,
+                    'files': sorted(face['file'] for face in self.faces.get(family, {}).values()),
+                    'slides': [],
+                })
+                if slide_num not in entry['slides']:
+                    entry['slides'].append(slide_num)
+        return dict(sorted(fonts.items()))
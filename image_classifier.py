@@ -7,7 +7,7 @@
 
 from PIL import Image, ImageStat
 import numpy as np
-from typing import Tuple, Dict, Literal
+from typing import Tuple, Dict, Literal, Union, BinaryIO
 
 ImageType = Literal['qr-code', 'icon', 'logo', 'photo', 'diagram', 'unknown']
 
@@ -28,13 +28,13 @@ class ImageClassifier:
     def __init__(self):
         pass
     
-    def classify(self, image_path: str, position: Tuple[float, float], 
+    def classify(self, image_path: Union[str, BinaryIO], position: Tuple[float, float], 
                  size_in_pptx: Tuple[int, int]) -> Dict:
         """
         Классифицирует изображение
         
         Args:
-            image_path: Путь к файлу изображения
+            image_path: Путь к файлу изображения или открытый двоичный поток
             position: Позиция на слайде (left_percent, top_percent)
             size_in_pptx: Размер в PPTX (width_px, height_px)
             
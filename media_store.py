@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль копирования медиа из пакета PPTX (v18.3)
+Части, которые не требуют преобразования (изображения, видео), копируются
+из члена zip-архива в файл вывода блоками фиксированного размера - без
+обращения к part.blob и без промежуточных копий в памяти.
+
+v18.4: MediaIndex - один предварительный проход по ppt/media/* и всем
+связям пакета: хэш содержимого, размер, формат, габариты и ссылающиеся
+части для каждого медиа-файла.
+
+v18.6: copy_to() пишет в открытый файл (атомарная запись потоками
+output_writer); открытие архива защищено блокировкой.
+"""
+
+import hashlib
+import io
+import shutil
+import threading
+import zipfile
+
+from PIL import Image
+
+
+# Размер блока потокового копирования
+CHUNK_SIZE = 1024 * 1024
+
+# Каноническое расширение по типу содержимого (как pptx.parts.image.Image.ext)
+CONTENT_TYPE_EXTENSIONS = {
+    'image/bmp': 'bmp',
+    'image/gif': 'gif',
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/tiff': 'tiff',
+    'image/x-wmf': 'wmf',
+    'image/x-emf': 'emf',
+    'image/svg+xml': 'svg',
+}
+
+
+def media_ext(part):
+    """Расширение файла для медиа-части (без точки)"""
+    return CONTENT_TYPE_EXTENSIONS.get(part.content_type) or part.partname.ext.lower()
+
+
+class MediaStore:
+    """Потоковый доступ к членам zip-пакета презентации по имени части"""
+
+    def __init__(self, pptx_path):
+        self.pptx_path = pptx_path
+        self._zip = None
+        self._members = None
+        self._lock = threading.Lock()
+
+    def _archive(self):
+        with self._lock:
+            if self._zip is None:
+                archive = zipfile.ZipFile(self.pptx_path, 'r')
+                self._members = {'/' + info.filename: info for info in archive.infolist()}
+                self._zip = archive
+            return self._zip
+
+    def close(self):
+        """Закрывает архив (повторное обращение откроет его снова)"""
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+                self._members = None
+
+    def member(self, part):
+        """ZipInfo члена архива для части или None"""
+        try:
+            self._archive()
+        except (OSError, zipfile.BadZipFile):
+            return None
+        return self._members.get(str(part.partname))
+
+    def open(self, part):
+        """Поток чтения данных части (член zip или part.blob в памяти)"""
+        info = self.member(part)
+        if info is None:
+            return io.BytesIO(part.blob)
+        return self._zip.open(info, 'r')
+
+    def copy(self, part, dest_path):
+        """
+        Копирует часть в файл блоками CHUNK_SIZE
+
+        Если часть не найдена в архиве (пакет открыт из потока или
+        изменен в памяти), записывается part.blob.
+
+        Returns:
+            int: Количество записанных байт
+        """
+        with open(dest_path, 'wb') as dst:
+            return self.copy_to(part, dst)
+
+    def copy_to(self, part, dst):
+        """Копирует часть в открытый двоичный файл; возвращает число байт"""
+        info = self.member(part)
+        if info is None:
+            blob = part.blob
+            dst.write(blob)
+            return len(blob)
+
+        with self._zip.open(info, 'r') as src:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        return info.file_size
+
+
+class MediaEntry:
+    """Медиа-файл пакета и части, которые на него ссылаются"""
+
+    __slots__ = ('partname', 'part', 'digest', 'size', 'format', 'width', 'height', 'refs')
+
+    def __init__(self, partname, part):
+        self.partname = partname
+        self.part = part
+        self.digest = None
+        self.size = 0
+        self.format = None
+        self.width = None
+        self.height = None
+        self.refs = []  # [(имя ссылающейся части, rId, тип связи)]
+
+
+class MediaIndex:
+    """
+    Индекс медиа пакета: имя части -> MediaEntry
+
+    Строится один раз после открытия презентации; извлекатели сравнивают
+    изображения по digest (SHA-1 содержимого), а не по blob или размеру.
+    """
+
+    MEDIA_PREFIX = '/ppt/media/'
+
+    def __init__(self):
+        self.entries = {}
+        self._related = {}  # имя части -> [(rId, тип связи, MediaEntry)]
+
+    def build(self, package, store):
+        """
+        Проход по всем частям и их связям
+
+        Args:
+            package: Пакет python-pptx (prs.part.package)
+            store: MediaStore - данные читаются потоком из zip
+        """
+        self.entries = {}
+        self._related = {}
+
+        for source in package.iter_parts():
+            related = []
+            for rId, rel in source.rels.items():
+                if rel.is_external:
+                    continue
+                target = rel.target_part
+                partname = str(target.partname)
+                if not partname.startswith(self.MEDIA_PREFIX):
+                    continue
+
+                entry = self.entries.get(partname)
+                if entry is None:
+                    entry = self.entries[partname] = self._describe(MediaEntry(partname, target), store)
+                entry.refs.append((str(source.partname), rId, rel.reltype))
+                related.append((rId, rel.reltype, entry))
+
+            if related:
+                self._related[str(source.partname)] = related
+
+        return self
+
+    @staticmethod
+    def _describe(entry, store):
+        """Хэш, размер, формат и габариты - заголовок изображения без декодирования"""
+        digest = hashlib.sha1()
+        with store.open(entry.part) as src:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                entry.size += len(chunk)
+        entry.digest = digest.hexdigest()
+
+        entry.format = media_ext(entry.part)
+        try:
+            with store.open(entry.part) as src, Image.open(src) as img:
+                entry.width, entry.height = img.size
+        except Exception:
+            # Векторные форматы, видео и аудио - без габаритов
+            pass
+        return entry
+
+    def entry(self, part):
+        """MediaEntry для части изображения или None"""
+        return self.entries.get(str(part.partname))
+
+    def related(self, part):
+        """Медиа-связи части в порядке rId: [(rId, тип связи, MediaEntry)]"""
+        return self._related.get(str(part.partname), [])
+
+    def summary(self):
+        """Сводка для metadata.json"""
+        digests = {}
+        for entry in self.entries.values():
+            digests.setdefault(entry.digest, []).append(entry.partname)
+        return {
+            'files': len(self.entries),
+            'bytes': sum(entry.size for entry in self.entries.values()),
+            'duplicates': sorted(names for names in digests.values() if len(names) > 1),
+        }
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль приемников вывода (v18.7)
+Все файлы результата адресуются относительным путем ('pages/page1.html',
+'images/slide1_img1.png') и записываются через приемник:
+
+    DirectorySink - привычная структура папок на диске (атомарная запись)
+    ZipSink       - один .zip, члены пишутся потоком по мере готовности
+    MemorySink    - словарь {путь: bytes}, без обращения к диску
+
+Запись: sink.write(path, produce, binary) - produce получает открытый
+файл (текстовый UTF-8 или двоичный) и пишет в него содержимое.
+
+v18.9: import_file / export_file - обмен готовыми файлами с кэшем
+конвертаций (conversion_cache); папка на диске использует жесткие ссылки.
+
+v18.11: write() возвращает размер записанного файла в байтах.
+
+v18.15: revision(path) - ревизия содержимого записанного файла
+(service_worker): SHA-1 в папке и в памяти, CRC и размер члена zip.
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+
+
+# umask процесса читается один раз: os.umask() меняет его глобально и
+# небезопасен при параллельной записи
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def write_atomic(path, produce, binary=False):
+    """
+    Записывает файл через временный файл и переименование
+
+    Args:
+        path: Целевой путь
+        produce: Функция, получающая открытый файл и пишущая содержимое
+        binary: Открыть временный файл в режиме 'wb' (иначе текст UTF-8)
+
+    Returns:
+        int: Размер файла в байтах
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+    try:
+        if binary:
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8')
+        with f:
+            produce(f)
+        # mkstemp создает файл с правами 0600 - выравниваем с обычным open()
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        size = os.stat(tmp_path).st_size
+        os.replace(tmp_path, path)
+        return size
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def link_or_copy(source, dest):
+    """
+    Жесткая ссылка source -> dest (атомарно заменяет dest), иначе копия
+
+    Ссылка безопасна: конвертер никогда не дописывает файлы на месте -
+    каждая запись создает новый файл и переименовывает его (write_atomic).
+    """
+    directory, name = os.path.split(dest)
+    tmp_path = os.path.join(directory, f'.{name}.{os.getpid()}.{threading.get_ident()}.lnk')
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        # Разные файловые системы или ссылки не поддерживаются
+        write_atomic(dest, lambda dst: _copy_from(source, dst), binary=True)
+        return
+    os.replace(tmp_path, dest)
+
+
+def _copy_from(source, dst):
+    with open(source, 'rb') as src:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _text_writer(binary_file):
+    """Текстовая обертка UTF-8 над двоичным потоком (не закрывает его)"""
+    return io.TextIOWrapper(binary_file, encoding='utf-8', write_through=True)
+
+
+class DirectorySink:
+    """Файлы в папке на диске (структура вывода до v18.7)"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def location(self, path):
+        """Путь для сообщений пользователю"""
+        return os.path.join(self.root, path)
+
+    def mkdir(self, path):
+        """Создает подпапку заранее (пустые images/ и pages/ как раньше)"""
+        os.makedirs(os.path.join(self.root, path), exist_ok=True)
+
+    def write(self, path, produce, binary=False):
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return write_atomic(full_path, produce, binary)
+
+    def read(self, path):
+        """Содержимое ранее записанного файла или None"""
+        try:
+            with open(os.path.join(self.root, path), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def revision(self, path):
+        """SHA-1 содержимого файла или None"""
+        digest = hashlib.sha1()
+        try:
+            with open(os.path.join(self.root, path), 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def import_file(self, path, source):
+        """Помещает готовый файл source по пути path (жесткая ссылка)"""
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        link_or_copy(source, full_path)
+
+    def export_file(self, path, dest):
+        """Записанный файл path -> файл dest (жесткая ссылка); после close()"""
+        link_or_copy(os.path.join(self.root, path), dest)
+
+    def close(self):
+        return self.root
+
+
+class ZipSink:
+    """
+    Один zip-архив вывода
+
+    Члены пишутся потоком (ZipFile.open(name, 'w')) под блокировкой:
+    в архив одновременно пишет только один поток. Архив создается заново -
+    выборочная конвертация (--slides) не переносит прежние страницы.
+    """
+
+    def __init__(self, zip_path, compression=zipfile.ZIP_DEFLATED):
+        self.zip_path = zip_path
+        directory = os.path.dirname(zip_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._zip = zipfile.ZipFile(zip_path, 'w', compression)
+        self._names = set()
+        self._lock = threading.Lock()
+
+    def location(self, path):
+        return f"{self.zip_path}!/{path}"
+
+    def mkdir(self, path):
+        pass
+
+    def write(self, path, produce, binary=False):
+        with self._lock:
+            if path in self._names:
+                # Повторная запись того же пути - последняя версия побеждает
+                # при распаковке, но дубликаты в архиве не нужны
+                print(f"  ⚠️ {path} уже записан в архив, повтор пропущен")
+                return 0
+            self._names.add(path)
+            with self._zip.open(path, 'w', force_zip64=True) as dst:
+                if binary:
+                    produce(dst)
+                else:
+                    text = _text_writer(dst)
+                    produce(text)
+                    text.detach()
+            return self._zip.getinfo(path).file_size
+
+    def read(self, path):
+        return None
+
+    def revision(self, path):
+        """CRC-32 и размер члена архива (без повторного чтения) или None"""
+        with self._lock:
+            if path not in self._names or self._zip is None:
+                return None
+            info = self._zip.getinfo(path)
+        return f"{info.CRC:08x}-{info.file_size}"
+
+    def import_file(self, path, source):
+        self.write(path, lambda dst: _copy_from(source, dst), binary=True)
+
+    def export_file(self, path, dest):
+        """Член архива -> файл dest; после close()"""
+        with zipfile.ZipFile(self.zip_path, 'r') as archive, archive.open(path) as src:
+            write_atomic(dest, lambda dst: shutil.copyfileobj(src, dst, 1024 * 1024), binary=True)
+
+    def close(self):
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+        return self.zip_path
+
+
+class MemorySink:
+    """Словарь {относительный путь: bytes}; диск не используется"""
+
+    def __init__(self):
+        self.files = {}
+        self._lock = threading.Lock()
+
+    def location(self, path):
+        return f"memory:{path}"
+
+    def mkdir(self, path):
+        pass
+
+    def write(self, path, produce, binary=False):
+        buffer = io.BytesIO()
+        if binary:
+            produce(buffer)
+        else:
+            text = _text_writer(buffer)
+            produce(text)
+            text.detach()
+        data = buffer.getvalue()
+        with self._lock:
+            self.files[path] = data
+        return len(data)
+
+    def read(self, path):
+        with self._lock:
+            return self.files.get(path)
+
+    def revision(self, path):
+        data = self.read(path)
+        return None if data is None else hashlib.sha1(data).hexdigest()
+
+    def import_file(self, path, source):
+        with open(source, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            self.files[path] = data
+
+    def export_file(self, path, dest):
+        data = self.read(path)
+        write_atomic(dest, lambda dst: dst.write(data), binary=True)
+
+    def close(self):
+        return self.files
+
+
+def open_sink(kind, target):
+    """
+    Приемник по имени
+
+    Args:
+        kind: 'dir', 'zip' или 'memory'
+        target: Папка вывода (dir) или путь к архиву (zip; '.zip' добавляется)
+    """
+    if kind == 'dir':
+        return DirectorySink(target)
+    if kind == 'zip':
+        if not target.lower().endswith('.zip'):
+            target += '.zip'
+        return ZipSink(target)
+    if kind == 'memory':
+        return MemorySink()
+    raise ValueError(f"Неизвестный приемник вывода: {kind}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль фоновой записи файлов вывода (v18.6)
+Страницы, CSS, JSON, метаданные, изображения и шрифты ставятся в
+ограниченную очередь и записываются потоками-писателями, пока основной
+поток разбирает следующие слайды. Каждый файл пишется атомарно: во
+временный файл рядом с целевым, затем os.replace - читатель никогда не
+увидит недописанную страницу. flush() дожидается опустошения очереди.
+(v18.7: атомарная запись - в output_sink.DirectorySink)
+
+v18.7: Запись выполняет приемник (output_sink) - папка, zip или память;
+пути заданий относительные.
+
+v18.11: on_written(path, size) вызывается после каждой успешной записи
+(в потоке-писателе) - события прогресса asset_written.
+"""
+
+import queue
+import threading
+
+from output_sink import DirectorySink
+
+
+# Писателей по умолчанию и предел заданий в очереди (ограничивает память)
+DEFAULT_WORKERS = 2
+MAX_PENDING = 64
+
+
+class OutputWriter:
+    """
+    Очередь записи файлов с пулом потоков
+
+    sink - приемник вывода (output_sink) или путь к папке для DirectorySink;
+    workers=0 - синхронная запись в вызывающем потоке.
+    on_written - необязательный callable(путь, размер в байтах).
+    Ошибки записи не прерывают конвертацию: они печатаются и собираются
+    в errors, flush() возвращает их количество.
+    """
+
+    def __init__(self, sink, workers=DEFAULT_WORKERS, max_pending=MAX_PENDING, on_written=None):
+        self.sink = DirectorySink(sink) if isinstance(sink, str) else sink
+        self.workers = max(0, int(workers))
+        self.errors = []  # [(путь, исключение)]
+        self.paths = []  # Успешно записанные пути (v18.9: для кэша конвертаций)
+        self.bytes_written = 0
+        self.on_written = on_written
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending) if self.workers else None
+        self._threads = []
+
+    def _start(self):
+        if self._threads or not self.workers:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._drain, name=f'output-writer-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _drain(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._run(*job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, path, produce, binary):
+        try:
+            size = self.sink.write(path, produce, binary) or 0
+        except Exception as e:
+            print(f"  ⚠️ Не удалось записать {self.sink.location(path)}: {e}")
+            with self._lock:
+                self.errors.append((path, e))
+            return
+        with self._lock:
+            self.paths.append(path)
+            self.bytes_written += size
+        if self.on_written is not None:
+            self.on_written(path, size)
+
+    def submit(self, path, produce, binary=False):
+        """Ставит запись относительного пути в очередь (блокируется, если очередь заполнена)"""
+        if not self.workers:
+            self._run(path, produce, binary)
+            return
+        self._start()
+        self._queue.put((path, produce, binary))
+
+    def write_text(self, path, text):
+        """Текстовый файл UTF-8"""
+        self.submit(path, lambda f: f.write(text))
+
+    def write_bytes(self, path, data):
+        """Двоичный файл"""
+        self.submit(path, lambda f: f.write(data), binary=True)
+
+    def flush(self):
+        """
+        Дожидается записи всех поставленных файлов
+
+        Returns:
+            int: Количество ошибок записи (за все время работы писателя)
+        """
+        if self._queue is not None:
+            self._queue.join()
+        return len(self.errors)
+
+    def close(self):
+        """flush() и остановка потоков (повторная запись снова их запустит)"""
+        count = self.flush()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        return count
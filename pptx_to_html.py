@@ -1,5 +1,5 @@
 """
-PPTX to HTML Converter (v17.0)
+PPTX to HTML Converter (v18.15)
 Конвертирует презентации PowerPoint в веб-страницы с сохранением форматирования
 
 Версия 15: Улучшенная классификация изображений (QR-коды, иконки, логотипы)
@@ -8,6 +8,31 @@ PPTX to HTML Converter (v17.0)
 Версия 16.2: Исправлена прозрачность PNG изображений
 Версия 16.3: Добавлена поддержка композитных QR-кодов из групп фигур
 Версия 17.0: Каждый слайд сохраняется в отдельный HTML файл (папка pages/)
+Версия 17.1: Критический CSS встраивается в страницу, style.css загружается отложенно
+Версия 17.2: Режим вывода JSON scene graph с клиентским рендерером (renderer.js)
+Версия 17.3: Режим SVG-слоя: фигуры без текста рисуются реальными контурами в одном <svg>
+Версия 17.4: Стили фигуры извлекаются за один проход по spPr
+Версия 17.5: Цвета и шрифты темы разрешаются по кэшу схемы образца слайдов
+Версия 17.6: LRU-кэш стилей по каноническому XML spPr / bodyPr
+Версия 17.7: Соседние runs с одинаковым стилем объединяются в один <span>
+Версия 17.8: Унаследованные стили текста (образец, макет, плейсхолдер) с кэшем
+Версия 17.9: Инвентаризация шрифтов: встроенные шрифты, @font-face и preload по страницам
+Версия 18.0: Компактная модель слайда на __slots__ (slide_model) вместо словарей
+Версия 18.1: Выборочная конвертация слайдов (--slides 40-55,60), прочие страницы сохраняются
+Версия 18.2: Дерево фигур читается напрямую из p:spTree (shape_tree), без прокси python-pptx
+Версия 18.3: Медиа копируются из zip-пакета в файлы потоково, без чтения blob
+Версия 18.4: Индекс медиа пакета (хэш, размер, формат, габариты, ссылки) строится одним проходом
+Версия 18.5: Кандидаты на фон слайда (FREEFORM, крупные изображения, blipFill) собираются одним проходом
+Версия 18.6: Файлы вывода пишутся потоками-писателями из очереди, атомарно (временный файл + rename)
+Версия 18.7: Приемники вывода - папка, один .zip или словарь в памяти (--sink dir|zip)
+Версия 18.8: HTTP-сервис конвертации с пулом процессов и дедупликацией загрузок (--serve PORT)
+Версия 18.9: Кэш результатов конвертации по хэшу входа, версии и параметрам (--cache DIR)
+Версия 18.10: Бюджет времени и памяти слайда в процессе-исполнителе, упрощенный режим при превышении
+Версия 18.11: События прогресса (загрузка, слайды, файлы, завершение) - подписчик или итератор
+Версия 18.12: Режим наблюдения (--watch PORT): пересборка изменившихся слайдов и live-reload страниц
+Версия 18.13: Отчет stats.json: типы фигур, классы изображений, байты по классам файлов, этапы, кэши
+Версия 18.14: Хэш содержимого в именах статических файлов, assets-manifest.json и _headers (--fingerprint)
+Версия 18.15: Service worker для просмотра без сети: sw.js с кэшем всех файлов презентации (--offline)
 """
 
 from pptx import Presentation
@@ -21,6 +46,7 @@ import base64
 from pathlib import Path
 import json
 import re
+import time
 
 # Импортируем классификатор изображений
 from image_classifier import ImageClassifier
@@ -28,37 +54,259 @@ from image_classifier import ImageClassifier
 # v16: Импортируем извлекатель продвинутых стилей
 from style_extractor import style_extractor
 
+# v17.1: Критический CSS для каждой страницы
+from critical_css import CriticalCSSExtractor
+
+# v17.2: Сериализация слайдов в JSON scene graph
+from scene_graph import SceneGraphSerializer, RENDERER_JS
+
+# v17.5: Цвета и шрифты темы
+from theme_resolver import theme_resolver
+
+# v17.8: Наследование стилей текста
+from text_styles import text_style_resolver, TEXT_STYLE_ORDER
+
+# v17.9: Шрифты страниц и встроенные шрифты презентации
+from font_inventory import FontInventory
+
+# v18.0: Модель слайда
+from slide_model import Slide, Shape, ShapeStyle, Paragraph, Run, TableCell, QRPart, StyleTable
+
+# v18.3: Потоковое копирование медиа из пакета
+from media_store import MediaStore, MediaIndex, media_ext
+
+# v18.2: Чтение дерева фигур слайда через lxml
+from shape_tree import shape_tree_reader
+
+# v18.5: Индекс кандидатов на фон слайда
+from background_index import background_scanner
+
+# v18.6: Фоновая атомарная запись файлов вывода
+from output_writer import OutputWriter, DEFAULT_WORKERS
+
+# v18.7: Приемники вывода (папка, zip, память)
+from output_sink import open_sink, DirectorySink
+
+# v18.9: Кэш результатов конвертации
+from conversion_cache import ConversionCache, DEFAULT_MAX_BYTES
+
+# v18.10: Бюджеты слайда в процессе-исполнителе
+from slide_budget import SlideBudget, SlideWorker
+
+# v18.11: Структурированные события прогресса
+from progress_events import ProgressReporter, iterate_events, json_lines_listener, asset_kind
+
+# v18.13: Метрики конвертации (stats.json)
+from conversion_stats import ConversionStats, cached_report
+
+# v18.14: Имена статических файлов с хэшем содержимого
+from asset_manifest import AssetManifest, MANIFEST_PATH, HEADERS_PATH
+
+# v18.15: Service worker для просмотра без сети
+from service_worker import (PrecacheList, registration_script,
+                            SERVICE_WORKER_PATH, PRECACHE_MANIFEST_PATH)
+
+# v17.3: SVG-геометрия фигур
+from svg_geometry import svg_geometry
+
+
+# Пространство имен DrawingML (a:) для прямого чтения XML
+DRAWINGML_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+
+# Версия конвертера - входит в ключ кэша результатов (вместе с хэшем исходников)
+# и в баннер CLI; повышается вместе с записью «Версия» и заголовком модуля
+CONVERTER_VERSION = '18.15'
+
+# v18.13: Отчет о метриках конвертации
+STATS_PATH = 'stats.json'
+
+
+def parse_slide_ranges(spec, total):
+    """
+    Разбирает выбор слайдов вида '40-55,60,70-' (v18.1)
+    
+    Args:
+        spec: Строка с номерами и диапазонами через запятую; '-N' - с начала,
+            'N-' - до конца презентации
+        total: Количество слайдов в презентации
+    
+    Returns:
+        list: Отсортированные номера слайдов (с 1)
+    """
+    selected = set()
+    for item in str(spec).split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            if '-' in item:
+                start, end = item.split('-', 1)
+                start = int(start) if start.strip() else 1
+                end = int(end) if end.strip() else total
+            else:
+                start = end = int(item)
+        except ValueError:
+            raise ValueError(f"Некорректный выбор слайдов: '{item}'")
+        
+        if start < 1 or end > total or start > end:
+            raise ValueError(f"Диапазон слайдов вне презентации (1-{total}): '{item}'")
+        selected.update(range(start, end + 1))
+    
+    if not selected:
+        raise ValueError(f"Не выбрано ни одного слайда: '{spec}'")
+    return sorted(selected)
+
 
 class PPTXToHTMLConverter:
-    def __init__(self, pptx_path, output_dir='pptx_output'):
+    def __init__(self, pptx_path, output_dir='pptx_output', critical_css=True,
+                 output_format='html', json_layout='slide', shape_render='html',
+                 slides=None, writers=DEFAULT_WORKERS, sink='dir', cache_dir=None,
+                 cache_size=DEFAULT_MAX_BYTES, slide_cpu=None, slide_memory=None,
+                 progress=None, fingerprint=False, offline=False):
         """
         Инициализация конвертера
         
         Args:
-            pptx_path: Путь к PPTX файлу
+            pptx_path: Путь к PPTX файлу или двоичный поток (v18.8; имя для
+                сообщений и metadata.json - атрибут name потока)
             output_dir: Папка для сохранения HTML и изображений
+            critical_css: Встраивать в каждую страницу только используемые ею
+                правила, а полный style.css загружать отложенно (v17.1)
+            output_format: 'html' - разметка слайда в каждой странице,
+                'json' - scene graph в data/ + клиентский renderer.js (v17.2)
+            json_layout: Для output_format='json': 'slide' - data/slideN.json
+                на каждый слайд, 'deck' - один data/deck.json на презентацию
+            shape_render: 'html' - каждая фигура отдельным <div>,
+                'svg' - фигуры без текста и изображений рисуются контурами
+                в общем inline <svg> слайда (v17.3)
+            slides: Выбор слайдов ('40-55,60' или список номеров); None - все.
+                Остальные слайды не обрабатываются, их ранее созданные
+                страницы сохраняются (v18.1)
+            writers: Количество потоков записи файлов; 0 - запись в основном
+                потоке (v18.6)
+            sink: Приемник вывода (v18.7): 'dir' - папка output_dir, 'zip' -
+                архив output_dir(.zip), 'memory' - словарь {путь: bytes},
+                который возвращает convert(); либо готовый объект output_sink
+            cache_dir: Папка кэша результатов (v18.9); None - без кэша
+            cache_size: Предел размера кэша в байтах
+            slide_cpu: Процессорное время на слайд, с (v18.10); None - без лимита
+            slide_memory: Дополнительная память на слайд, МБ; None - без лимита.
+                С любым из лимитов слайды разбираются в процессе-исполнителе,
+                а не уложившиеся в бюджет строятся в упрощенном режиме
+            progress: Подписчик событий прогресса - callable(ProgressEvent)
+                (v18.11, см. progress_events)
+            fingerprint: Хэш содержимого в именах изображений, шрифтов, JSON,
+                style.css и renderer.js + assets-manifest.json и _headers (v18.14)
+            offline: sw.js и регистрация на страницах - презентация
+                открывается без сети после первого посещения (v18.15)
         """
+        if output_format not in ('html', 'json'):
+            raise ValueError(f"Неизвестный формат вывода: {output_format}")
+        if json_layout not in ('slide', 'deck'):
+            raise ValueError(f"Неизвестная раскладка JSON: {json_layout}")
+        if shape_render not in ('html', 'svg'):
+            raise ValueError(f"Неизвестный режим отрисовки фигур: {shape_render}")
+        # Выборочная конвертация дополняет прежний вывод - zip и память
+        # создаются заново, страницы невыбранных слайдов пропали бы
+        if slides is not None and (sink != 'dir' if isinstance(sink, str) else not isinstance(sink, DirectorySink)):
+            raise ValueError("Выбор слайдов (--slides) работает только с выводом в папку (sink='dir')")
+        
         self.pptx_path = pptx_path
+        self.source_name = pptx_path if isinstance(pptx_path, str) else getattr(pptx_path, 'name', 'stream.pptx')
         self.output_dir = output_dir
-        self.images_dir = os.path.join(output_dir, 'images')
-        self.pages_dir = os.path.join(output_dir, 'pages')
+        # v18.7: Пути файлов вывода - относительно приемника
+        self.images_dir = 'images'
+        self.pages_dir = 'pages'
+        self.data_dir = 'data'
+        self.fonts_dir = 'fonts'
+        self.output_format = output_format
+        self.json_layout = json_layout
+        self.shape_render = shape_render
         self.prs = None
-        self.slide_data = []
+        self.slides = slides
+        self.selected_slides = None  # v18.1: номера выбранных слайдов (None - все)
+        self.total_slides = 0  # Всего слайдов в презентации (для навигации и списка)
+        self.slide_data = []  # v18.0: список slide_model.Slide
+        self.styles = StyleTable()  # Общие словари стилей текста и ячеек
         self.current_slide_bg_color = None  # Для определения дефолтного цвета текста
         
         # v15: Инициализируем классификатор изображений
         self.image_classifier = ImageClassifier()
         
-        # Создаем директории
-        os.makedirs(self.output_dir, exist_ok=True)
-        os.makedirs(self.images_dir, exist_ok=True)
-        os.makedirs(self.pages_dir, exist_ok=True)
+        # v17.1: Извлекатель критического CSS (таблица стилей разбирается один раз)
+        self.critical_css = CriticalCSSExtractor(self.get_css_content()) if critical_css else None
+        
+        # v17.2: Сериализатор scene graph и уже построенные сцены по номеру слайда
+        self.scene_serializer = SceneGraphSerializer()
+        self.scenes = {}
+        
+        # v17.9: Встроенные шрифты и начертания, использованные на страницах
+        self.fonts = FontInventory()
+        
+        # v18.3: Медиа копируются из zip-пакета напрямую
+        self.media = MediaStore(pptx_path)
+        # v18.4: Индекс медиа пакета (заполняется в load_presentation)
+        self.media_index = MediaIndex()
+        # v18.7: Приемник вывода; v18.6: очередь записи (дописывается в конце convert())
+        self.sink = open_sink(sink, output_dir) if isinstance(sink, str) else sink
+        # v18.11: События прогресса (asset_written - из потоков-писателей)
+        self.progress = ProgressReporter()
+        if progress is not None:
+            self.progress.subscribe(progress)
+        self.writer = OutputWriter(self.sink, writers, on_written=self._asset_written)
+        # v18.13: Метрики для stats.json
+        self.stats = ConversionStats()
+        # v18.14: Пути файлов с хэшем (без fingerprint - исходные пути)
+        self.assets = AssetManifest(fingerprint)
+        # v18.15: Service worker
+        self.offline = offline
+        # v18.9: Кэш результатов конвертации
+        self.cache = ConversionCache(cache_dir, cache_size) if cache_dir else None
+        # v18.10: Бюджет слайда и упрощенные слайды {номер: причина}
+        self.budget = SlideBudget(slide_cpu, slide_memory)
+        self.degraded = {}
+        self.deferred_media = None  # В исполнителе: [(имя файла, имя части)]
+        self.stats_summary = None  # v18.13: Итог конвертации для записи кэша
+        self._parts_by_name = None
+        
+        # Создаем директории (только у папки на диске)
+        self.sink.mkdir(self.images_dir)
+        self.sink.mkdir(self.pages_dir)
+        if self.output_format == 'json':
+            self.sink.mkdir(self.data_dir)
     
     def load_presentation(self):
         """Загружает презентацию"""
-        print(f"Загрузка презентации: {self.pptx_path}")
+        print(f"Загрузка презентации: {self.source_name}")
         self.prs = Presentation(self.pptx_path)
-        print(f"Найдено слайдов: {len(self.prs.slides)}")
+        self.total_slides = len(self.prs.slides)
+        print(f"Найдено слайдов: {self.total_slides}")
+        
+        # v18.1: Выбор слайдов проверяется по реальному количеству
+        if self.slides is not None:
+            if isinstance(self.slides, str):
+                self.selected_slides = parse_slide_ranges(self.slides, self.total_slides)
+            else:
+                self.selected_slides = parse_slide_ranges(','.join(str(n) for n in self.slides), self.total_slides)
+            print(f"Выбрано слайдов: {len(self.selected_slides)} из {self.total_slides}")
+        
+        # v17.9: Встроенные шрифты сохраняются в fonts/
+        self.fonts.load_embedded(self.prs, self.fonts_dir, self.writer, self.assets)
+        
+        # v18.4: Один проход по медиа и связям всех частей пакета
+        self.media_index.build(self.prs.part.package, self.media)
+        media_summary = self.media_index.summary()
+        print(f"🗂️ Медиа: {media_summary['files']} файлов, {media_summary['bytes'] / 1048576:.1f} МБ, "
+              f"дубликатов: {len(media_summary['duplicates'])}")
+        
+        self.progress.emit('deck_loaded', source=self.source_name, total_slides=self.total_slides,
+                           selected=len(self.selected_slides) if self.selected_slides else self.total_slides,
+                           media_files=media_summary['files'], media_bytes=media_summary['bytes'])
+    
+    def _asset_written(self, path, size):
+        """Колбэк OutputWriter: событие asset_written (v18.11), метрики (v18.13)"""
+        self.stats.record_asset(path, size)
+        self.progress.emit('asset_written', path=path, kind=asset_kind(path), bytes=size)
     
     def get_default_text_color(self):
         """Определяет дефолтный цвет текста на основе яркости фона слайда"""
@@ -88,29 +336,11 @@ class PPTXToHTMLConverter:
         if rgb_color is None:
             return None
         try:
-            # Проверяем, что это ColorFormat
-            if hasattr(rgb_color, 'type'):
-                color_type = rgb_color.type
-                
-                # Если это RGB color (type = 1) - прямой RGB
-                if color_type == 1:  # MSO_COLOR_TYPE.RGB
-                    try:
-                        if hasattr(rgb_color, 'rgb'):
-                            r, g, b = rgb_color.rgb
-                            return f'#{r:02x}{g:02x}{b:02x}'
-                    except:
-                        pass
-                
-                # Если это theme color (SCHEME) - извлекаем реальный RGB
-                elif color_type == 2:  # MSO_COLOR_TYPE.SCHEME
-                    try:
-                        # Получаем реальный RGB через встроенный метод
-                        # Этот метод учитывает brightness, tint и shade
-                        if hasattr(rgb_color, 'rgb'):
-                            r, g, b = rgb_color.rgb
-                            return f'#{r:02x}{g:02x}{b:02x}'
-                    except:
-                        pass
+            # ColorFormat: RGB, SCHEME, SYSTEM... с учетом lumMod/lumOff/tint/shade
+            # (схема темы берется из образца текущего слайда)
+            color, _alpha = theme_resolver.resolve_color_format(rgb_color)
+            if color:
+                return color
             
             # Если это прямой RGBColor объект
             if hasattr(rgb_color, 'rgb'):
@@ -152,48 +382,63 @@ class PPTXToHTMLConverter:
         }
         return anchor_map.get(vertical_anchor, 'flex-start')
     
-    def extract_text_formatting(self, run):
-        """Извлекает форматирование текста"""
-        style = {}
+    def extract_text_formatting(self, run, inherited=None):
+        """Извлекает форматирование текста
+        
+        Args:
+            run: Фрагмент текста
+            inherited: Унаследованный стиль абзаца (text_style_resolver.paragraph_style) -
+                       явные свойства run накладываются поверх него
+        """
+        style = dict(inherited) if inherited else {}
         
         try:
+            font = run.font
+            
             # Шрифт
-            if run.font.name:
-                style['font-family'] = run.font.name
+            if font.name:
+                # +mj-lt / +mn-lt - ссылки на шрифты темы
+                font_name = theme_resolver.resolve_font(font.name)
+                if font_name:
+                    style['font-family'] = font_name
             
             # Размер шрифта
-            if run.font.size:
-                style['font-size'] = f"{self.pt_to_px(run.font.size.pt)}px"
+            if font.size:
+                style['font-size'] = f"{self.pt_to_px(font.size.pt)}px"
             
-            # Цвет текста
-            if run.font.color:
-                if run.font.color.type:
-                    # Явно заданный цвет
-                    color = self.rgb_to_hex(run.font.color)
-                    if color:
-                        style['color'] = color
-                else:
-                    # Цвет не задан явно - используем дефолтный на основе фона слайда
-                    style['color'] = self.get_default_text_color()
-            else:
-                # Если color вообще None, используем дефолтный на основе фона
-                style['color'] = self.get_default_text_color()
+            # Цвет текста (явно заданный)
+            if font.color and font.color.type:
+                color = self.rgb_to_hex(font.color)
+                if color:
+                    style['color'] = color
             
-            # Жирный
-            if run.font.bold:
-                style['font-weight'] = 'bold'
+            # Жирный / курсив / подчеркивание: False - явный сброс унаследованного
+            if font.bold is not None:
+                if font.bold:
+                    style['font-weight'] = 'bold'
+                else:
+                    style.pop('font-weight', None)
             
-            # Курсив
-            if run.font.italic:
-                style['font-style'] = 'italic'
+            if font.italic is not None:
+                if font.italic:
+                    style['font-style'] = 'italic'
+                else:
+                    style.pop('font-style', None)
             
-            # Подчеркивание
-            if run.font.underline:
-                style['text-decoration'] = 'underline'
+            if font.underline is not None:
+                if font.underline:
+                    style['text-decoration'] = 'underline'
+                else:
+                    style.pop('text-decoration', None)
         except:
             pass
         
-        return style
+        # Цвет не задан ни явно, ни в цепочке наследования -
+        # используем дефолтный на основе фона слайда
+        if 'color' not in style:
+            style['color'] = self.get_default_text_color()
+        
+        return {key: style[key] for key in TEXT_STYLE_ORDER if key in style}
     
     def extract_paragraph_formatting(self, paragraph):
         """Извлекает форматирование параграфа"""
@@ -225,8 +470,11 @@ class PPTXToHTMLConverter:
     def extract_shape_style(self, shape, slide_width, slide_height, shape_index=0):
         """Извлекает стили формы с процентными размерами для адаптивности
         
+        Returns:
+            ShapeStyle: Геометрия в пикселях слайда + общие CSS-стили (v18.0)
+        
         Args:
-            shape: Фигура для извлечения стилей
+            shape: Фигура для извлечения стилей (v18.2: shape_tree.ShapeNode)
             slide_width: Ширина слайда в пикселях
             slide_height: Высота слайда в пикселях
             shape_index: Индекс фигуры для вычисления z-index (по умолчанию 0)
@@ -241,11 +489,8 @@ class PPTXToHTMLConverter:
         width_px = self.emu_to_px(shape.width)
         height_px = self.emu_to_px(shape.height)
         
-        # Конвертируем в проценты для адаптивности
-        left_percent = (left_px / slide_width) * 100
-        top_percent = (top_px / slide_height) * 100
-        width_percent = (width_px / slide_width) * 100
-        height_percent = (height_px / slide_height) * 100
+        if None in (left_px, top_px, width_px, height_px):
+            raise ValueError(f"у фигуры {shape.name} не заданы координаты")
         
         # Вычисляем z-index на основе порядка обработки фигур
         # В PowerPoint порядок фигур в slide.shapes определяет z-order:
@@ -260,35 +505,12 @@ class PPTXToHTMLConverter:
         
         z_index = shape_index
         
-        style = {
-            'position': 'absolute',
-            'left': f"{left_percent:.3f}%",
-            'top': f"{top_percent:.3f}%",
-            'width': f"{width_percent:.3f}%",
-            'height': f"{height_percent:.3f}%",
-            'z-index': str(z_index),
-        }
+        # v18.0: Проценты считаются при отрисовке (ShapeStyle.css)
+        style = ShapeStyle(left_px, top_px, width_px, height_px, z_index)
         
         try:
-            # v16: Используем StyleExtractor для продвинутых стилей
-            
-            # FILL (заливка) - поддержка SOLID, GRADIENT, PATTERN, PICTURE
-            if hasattr(shape, 'fill'):
-                fill_styles = style_extractor.extract_fill_style(shape.fill)
-                style.update(fill_styles)
-            
-            # LINE (граница) - поддержка разных стилей линий
-            if hasattr(shape, 'line'):
-                line_styles = style_extractor.extract_line_style(shape.line)
-                style.update(line_styles)
-            
-            # EFFECTS (эффекты) - тени, свечение и т.д.
-            shadow_styles = style_extractor.extract_shadow_effect(shape)
-            style.update(shadow_styles)
-            
-            # TRANSFORMS (трансформации) - rotation, flip
-            transform_styles = style_extractor.extract_transform_style(shape)
-            style.update(transform_styles)
+            # v17.4: Заливка, граница, тени и трансформации за один проход по spPr
+            style.paint = style_extractor.extract_element_styles(shape.element)
                     
         except Exception as e:
             # Игнорируем ошибки извлечения стилей
@@ -297,137 +519,122 @@ class PPTXToHTMLConverter:
         
         return style
     
-    def save_image(self, image, slide_num, img_num, prefix="img"):
-        """Сохраняет изображение"""
+    def save_image(self, image_part, slide_num, img_num, prefix="img"):
+        """Сохраняет изображение
+        
+        Args:
+            image_part: Часть изображения пакета (ImagePart) - v18.3: копируется
+                из zip потоково, blob не читается
+        """
         try:
-            img_filename = f"slide{slide_num}_{prefix}{img_num}.{image.ext}"
-            img_path = os.path.join(self.images_dir, img_filename)
-            
-            with open(img_path, 'wb') as f:
-                f.write(image.blob)
-            
-            return f"images/{img_filename}"
+            img_filename = f"slide{slide_num}_{prefix}{img_num}.{media_ext(image_part)}"
+            return self.save_media(image_part, img_filename)
         except Exception as e:
             print(f"Ошибка сохранения изображения: {e}")
             return None
     
-    def save_background_image(self, slide, slide_num):
-        """Сохраняет фоновое изображение слайда"""
+    def save_media(self, part, filename):
+        """Копирует медиа-часть в images/ и возвращает относительный путь (v18.3)
+        
+        v18.6: Копирование ставится в очередь записи - файл появится
+        после writer.flush()
+        v18.14: С fingerprint имя содержит хэш из индекса медиа
+        """
+        stored_name = filename
+        if self.assets.enabled:
+            entry = self.media_index.entry(part)
+            if entry is not None:
+                hashed = self.assets.name(f"images/{filename}", digest=entry.digest)
+            else:
+                hashed = self.assets.name(f"images/{filename}", data=part.blob)
+            stored_name = os.path.basename(hashed)
+        if self.deferred_media is not None:
+            # v18.10: В процессе-исполнителе файл запишет основной процесс
+            self.deferred_media.append((filename, str(part.partname)))
+            return f"images/{stored_name}"
+        self.stats.record_media(str(part.partname))
+        self.writer.submit(f"{self.images_dir}/{stored_name}",
+                           lambda dst: self.media.copy_to(part, dst), binary=True)
+        return f"images/{stored_name}"
+    
+    @staticmethod
+    def picture_part(picture):
+        """Часть изображения для прокси Picture python-pptx (без Image и blob)"""
+        return picture.part.related_part(picture._element.blip_rId)
+    
+    def save_background_image(self, slide, slide_num, candidates):
+        """Сохраняет фоновое изображение слайда
+        
+        Args:
+            candidates: BackgroundCandidates слайда (background_index)
+        """
         try:
             # Метод 1: Поиск самого большого изображения (часто фон - это просто большая картинка)
-            # Ищем изображения рекурсивно, включая группы
-            def find_large_images(shapes_list):
-                images = []
-                for shp in shapes_list:
-                    try:
-                        if shp.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                            width = self.emu_to_px(shp.width)
-                            height = self.emu_to_px(shp.height)
-                            left = self.emu_to_px(shp.left)
-                            top = self.emu_to_px(shp.top)
-                            area = width * height
-                            images.append({'shape': shp, 'area': area, 'left': left, 'top': top})
-                        elif shp.shape_type == MSO_SHAPE_TYPE.GROUP:
-                            images.extend(find_large_images(shp.shapes))
-                    except:
-                        continue
-                return images
-            
-            all_images = find_large_images(slide.shapes)
-            slide_area = self.emu_to_px(self.prs.slide_width) * self.emu_to_px(self.prs.slide_height)
-            
-            # Сортируем по размеру (площади)
-            all_images.sort(key=lambda x: x['area'], reverse=True)
+            # v18.5: Изображения (включая группы) уже собраны и отсортированы по площади
+            slide_width = self.emu_to_px(self.prs.slide_width)
+            slide_height = self.emu_to_px(self.prs.slide_height)
             
             largest_image = None
-            for img_data in all_images:
-                area_percent = (img_data['area'] / slide_area) * 100
+            for picture in candidates.pictures:
+                area_percent = candidates.area_percent(picture.area)
                 
                 # Если изображение занимает больше 40% слайда, вероятно это фон
                 # Также проверяем, что оно не слишком далеко от начала слайда
                 if area_percent > 40:
-                    slide_width = self.emu_to_px(self.prs.slide_width)
-                    slide_height = self.emu_to_px(self.prs.slide_height)
-                    
                     # Позиция в процентах
-                    left_percent = (img_data['left'] / slide_width) * 100
-                    top_percent = (img_data['top'] / slide_height) * 100
+                    left_percent = (picture.left / slide_width) * 100
+                    top_percent = (picture.top / slide_height) * 100
                     
                     # Фон обычно начинается близко к краям (< 30% от левого/верхнего края)
                     if left_percent < 30 and top_percent < 30:
-                        largest_image = img_data['shape']
+                        largest_image = picture.node
                         print(f"  Обнаружен кандидат на фон: {area_percent:.1f}% слайда, позиция ({left_percent:.1f}%, {top_percent:.1f}%)")
                         break
             
             if largest_image:
                 try:
-                    img_ext = largest_image.image.ext
-                    img_filename = f"slide{slide_num}_background{img_ext}"
-                    img_path = os.path.join(self.images_dir, img_filename)
-                    
-                    with open(img_path, 'wb') as f:
-                        f.write(largest_image.image.blob)
+                    image_part = slide.part.related_part(largest_image.image_rid())
+                    img_filename = f"slide{slide_num}_background.{media_ext(image_part)}"
+                    img_path = self.save_media(image_part, img_filename)
                     
                     print(f"  ✓ Фон найден (большое изображение): {img_filename}")
-                    return f"images/{img_filename}"
+                    return img_path
                 except Exception as e:
                     print(f"  Ошибка сохранения большого изображения: {e}")
             
-            # Метод 2: Проверяем fill.type через XML
-            if hasattr(slide.background, 'fill'):
-                fill = slide.background.fill
-                if hasattr(fill, 'type') and fill.type == 6:  # PICTURE
-                    bg_element = slide.background._element
-                    namespaces = {
-                        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-                        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-                        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-                    }
-                    
-                    blip_elements = bg_element.xpath('.//a:blip[@r:embed]', namespaces=namespaces)
-                    
-                    if blip_elements:
-                        rId = blip_elements[0].get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                        
-                        if rId and rId in slide.part.rels:
-                            image_part = slide.part.rels[rId].target_part
-                            img_ext = image_part.ext
-                            img_filename = f"slide{slide_num}_background{img_ext}"
-                            img_path = os.path.join(self.images_dir, img_filename)
-                            
-                            with open(img_path, 'wb') as f:
-                                f.write(image_part.blob)
-                            
-                            print(f"  ✓ Фон найден (XML blipFill): {img_filename}")
-                            return f"images/{img_filename}"
+            # Метод 2: blipFill фона слайда (p:bg)
+            rId = candidates.bg_blip_rid
+            if rId and rId in slide.part.rels:
+                image_part = slide.part.rels[rId].target_part
+                img_filename = f"slide{slide_num}_background.{media_ext(image_part)}"
+                img_path = self.save_media(image_part, img_filename)
+                
+                print(f"  ✓ Фон найден (XML blipFill): {img_filename}")
+                return img_path
             
             # Метод 3: Ищем неиспользованные изображения в relationships
+            # v18.4: Изображения сравниваются по хэшу содержимого из индекса медиа
             used_images = set()
-            for shape in slide.shapes:
-                if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                    try:
-                        if hasattr(shape, 'image'):
-                            # Используем размер blob как уникальный идентификатор
-                            used_images.add(len(shape.image.blob))
-                    except:
-                        pass
+            for picture in candidates.top_pictures:
+                try:
+                    entry = self.media_index.entry(slide.part.related_part(picture.node.image_rid()))
+                    if entry is not None:
+                        used_images.add(entry.digest)
+                except:
+                    pass
             
-            for rel_id, rel in slide.part.rels.items():
-                if 'image' in rel.reltype.lower():
+            for rel_id, reltype, entry in self.media_index.related(slide.part):
+                if 'image' in reltype.lower():
                     try:
-                        image_blob = rel.target_part.blob
+                        image_part = entry.part
                         
-                        # Если размер изображения не совпадает ни с одним в shapes
-                        if len(image_blob) not in used_images:
-                            img_ext = rel.target_part.ext
-                            img_filename = f"slide{slide_num}_background{img_ext}"
-                            img_path = os.path.join(self.images_dir, img_filename)
-                            
-                            with open(img_path, 'wb') as f:
-                                f.write(image_blob)
+                        # Если изображение не совпадает ни с одним в shapes
+                        if entry.digest not in used_images:
+                            img_filename = f"slide{slide_num}_background.{media_ext(image_part)}"
+                            img_path = self.save_media(image_part, img_filename)
                             
                             print(f"  ✓ Фон найден (неиспользованное изображение): {img_filename}")
-                            return f"images/{img_filename}"
+                            return img_path
                     except:
                         continue
                         
@@ -488,17 +695,11 @@ class PPTXToHTMLConverter:
                         
                         # Если изображение занимает больше 30% слайда, вероятно это фон
                         if area_percent > 30:
-                            img_ext = shape.image.ext
-                            if not img_ext.startswith('.'):
-                                img_ext = '.' + img_ext
-                            img_filename = f"slide{slide_num}_layout_bg{img_ext}"
-                            img_path = os.path.join(self.images_dir, img_filename)
-                            
-                            with open(img_path, 'wb') as f:
-                                f.write(shape.image.blob)
+                            image_part = self.picture_part(shape)
+                            img_filename = f"slide{slide_num}_layout_bg.{media_ext(image_part)}"
+                            bg_image = self.save_media(image_part, img_filename)
                             
                             print(f"  ✓ Фон из slide layout (изображение): {img_filename}")
-                            bg_image = f"images/{img_filename}"
                             # Если есть и цвет и изображение, возвращаем оба
                             if bg_color and bg_image:
                                 print(f"  ✓ Комбинированный фон: цвет {bg_color} + изображение")
@@ -524,30 +725,19 @@ class PPTXToHTMLConverter:
                     elif fill.type == 6:  # PICTURE
                         try:
                             bg_element = slide_layout.background._element
-                            namespaces = {
-                                'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-                                'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-                                'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-                            }
-                            
-                            blip_elements = bg_element.xpath('.//a:blip[@r:embed]', namespaces=namespaces)
+                            # Префиксы p:, a:, r: известны xpath элементов python-pptx
+                            blip_elements = bg_element.xpath('.//a:blip[@r:embed]')
                             
                             if blip_elements:
                                 rId = blip_elements[0].get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
                                 
                                 if rId and rId in slide_layout.part.rels:
                                     image_part = slide_layout.part.rels[rId].target_part
-                                    img_ext = image_part.ext
-                                    if not img_ext.startswith('.'):
-                                        img_ext = '.' + img_ext
-                                    img_filename = f"slide{slide_num}_layout_bg{img_ext}"
-                                    img_path = os.path.join(self.images_dir, img_filename)
-                                    
-                                    with open(img_path, 'wb') as f:
-                                        f.write(image_part.blob)
+                                    img_filename = f"slide{slide_num}_layout_bg.{media_ext(image_part)}"
+                                    img_path = self.save_media(image_part, img_filename)
                                     
                                     print(f"  ✓ Фон из slide layout (fill): {img_filename}")
-                                    return (None, f"images/{img_filename}")
+                                    return (None, img_path)
                         except Exception as e:
                             pass
             
@@ -562,17 +752,12 @@ class PPTXToHTMLConverter:
                         
                         # Если изображение занимает больше 30% слайда
                         if area_percent > 30:
-                            img_ext = shape.image.ext
-                            if not img_ext.startswith('.'):
-                                img_ext = '.' + img_ext
-                            img_filename = f"slide{slide_num}_master_bg{img_ext}"
-                            img_path = os.path.join(self.images_dir, img_filename)
-                            
-                            with open(img_path, 'wb') as f:
-                                f.write(shape.image.blob)
+                            image_part = self.picture_part(shape)
+                            img_filename = f"slide{slide_num}_master_bg.{media_ext(image_part)}"
+                            img_path = self.save_media(image_part, img_filename)
                             
                             print(f"  ✓ Фон из slide master (изображение): {img_filename}")
-                            return (None, f"images/{img_filename}")
+                            return (None, img_path)
                 except:
                     continue
             
@@ -590,30 +775,19 @@ class PPTXToHTMLConverter:
                     elif fill.type == 6:  # PICTURE
                         try:
                             bg_element = slide_master.background._element
-                            namespaces = {
-                                'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-                                'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-                                'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-                            }
-                            
-                            blip_elements = bg_element.xpath('.//a:blip[@r:embed]', namespaces=namespaces)
+                            # Префиксы p:, a:, r: известны xpath элементов python-pptx
+                            blip_elements = bg_element.xpath('.//a:blip[@r:embed]')
                             
                             if blip_elements:
                                 rId = blip_elements[0].get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
                                 
                                 if rId and rId in slide_master.part.rels:
                                     image_part = slide_master.part.rels[rId].target_part
-                                    img_ext = image_part.ext
-                                    if not img_ext.startswith('.'):
-                                        img_ext = '.' + img_ext
-                                    img_filename = f"slide{slide_num}_master_bg{img_ext}"
-                                    img_path = os.path.join(self.images_dir, img_filename)
-                                    
-                                    with open(img_path, 'wb') as f:
-                                        f.write(image_part.blob)
+                                    img_filename = f"slide{slide_num}_master_bg.{media_ext(image_part)}"
+                                    img_path = self.save_media(image_part, img_filename)
                                     
                                     print(f"  ✓ Фон из slide master (fill): {img_filename}")
-                                    return (None, f"images/{img_filename}")
+                                    return (None, img_path)
                         except Exception as e:
                             pass
         
@@ -622,78 +796,236 @@ class PPTXToHTMLConverter:
         
         return (None, None)
     
-    def process_text_frame(self, text_frame, shape_style, slide_width, slide_height):
-        """Обрабатывает текстовый фрейм с адаптивными отступами"""
-        html_content = []
+    def extract_text_frame_box_style(self, text_frame, slide_width, slide_height):
+        """Стили блока текстового фрейма: вертикальное выравнивание и отступы (bodyPr)"""
+        box_style = {}
+        
+        # Вертикальное выравнивание
+        if text_frame.vertical_anchor:
+            v_align = self.get_vertical_alignment(text_frame.vertical_anchor)
+            box_style['display'] = 'flex'
+            box_style['flex-direction'] = 'column'
+            box_style['justify-content'] = v_align
+        
+        # Отступы в процентах для адаптивности
+        if text_frame.margin_left:
+            margin_left_px = self.emu_to_px(text_frame.margin_left)
+            margin_left_percent = (margin_left_px / slide_width) * 100
+            box_style['padding-left'] = f"{margin_left_percent:.2f}%"
+        
+        if text_frame.margin_right:
+            margin_right_px = self.emu_to_px(text_frame.margin_right)
+            margin_right_percent = (margin_right_px / slide_width) * 100
+            box_style['padding-right'] = f"{margin_right_percent:.2f}%"
+        
+        if text_frame.margin_top:
+            margin_top_px = self.emu_to_px(text_frame.margin_top)
+            margin_top_percent = (margin_top_px / slide_height) * 100
+            box_style['padding-top'] = f"{margin_top_percent:.2f}%"
+        
+        if text_frame.margin_bottom:
+            margin_bottom_px = self.emu_to_px(text_frame.margin_bottom)
+            margin_bottom_percent = (margin_bottom_px / slide_height) * 100
+            box_style['padding-bottom'] = f"{margin_bottom_percent:.2f}%"
+        
+        return box_style
+    
+    def process_text_frame(self, text_frame, shape_style, slide_width, slide_height, shape=None):
+        """Обрабатывает текстовый фрейм с адаптивными отступами
+        
+        Args:
+            shape: Фигура-владелец фрейма - для наследования стилей текста (v17.8)
+        
+        Returns:
+            list: Параграфы (slide_model.Paragraph). HTML формируется позже,
+                  в render_paragraphs_html (v17.2)
+        """
+        paragraphs = []
         
         try:
-            # Вертикальное выравнивание
-            if text_frame.vertical_anchor:
-                v_align = self.get_vertical_alignment(text_frame.vertical_anchor)
-                shape_style['display'] = 'flex'
-                shape_style['flex-direction'] = 'column'
-                shape_style['justify-content'] = v_align
-            
-            # Отступы в процентах для адаптивности
-            if text_frame.margin_left:
-                margin_left_px = self.emu_to_px(text_frame.margin_left)
-                margin_left_percent = (margin_left_px / slide_width) * 100
-                shape_style['padding-left'] = f"{margin_left_percent:.2f}%"
-            
-            if text_frame.margin_right:
-                margin_right_px = self.emu_to_px(text_frame.margin_right)
-                margin_right_percent = (margin_right_px / slide_width) * 100
-                shape_style['padding-right'] = f"{margin_right_percent:.2f}%"
-            
-            if text_frame.margin_top:
-                margin_top_px = self.emu_to_px(text_frame.margin_top)
-                margin_top_percent = (margin_top_px / slide_height) * 100
-                shape_style['padding-top'] = f"{margin_top_percent:.2f}%"
-            
-            if text_frame.margin_bottom:
-                margin_bottom_px = self.emu_to_px(text_frame.margin_bottom)
-                margin_bottom_percent = (margin_bottom_px / slide_height) * 100
-                shape_style['padding-bottom'] = f"{margin_bottom_percent:.2f}%"
+            # v17.6: Выравнивание и отступы зависят только от bodyPr и размеров
+            # слайда - одинаковые bodyPr считаются один раз
+            memo_key = style_extractor.memo.digest('bodyPr', slide_width, slide_height, text_frame._bodyPr)
+            box_style = style_extractor.memo.get(memo_key)
+            if box_style is None:
+                box_style = self.extract_text_frame_box_style(text_frame, slide_width, slide_height)
+                style_extractor.memo.put(memo_key, box_style)
+            shape_style.box = box_style
             
             # Обработка параграфов
             for paragraph in text_frame.paragraphs:
-                para_style = self.extract_paragraph_formatting(paragraph)
-                para_html = []
+                para_style = self.styles.intern(self.extract_paragraph_formatting(paragraph))
+                inherited = text_style_resolver.paragraph_style(shape, text_frame, paragraph) if shape is not None else None
+                runs = []
                 
                 for run in paragraph.runs:
-                    run_style = self.extract_text_formatting(run)
-                    style_str = '; '.join([f"{k}: {v}" for k, v in run_style.items()])
+                    run_style = self.styles.intern(self.extract_text_formatting(run, inherited))
                     
-                    text = run.text.replace('<', '&lt;').replace('>', '&gt;').replace('\n', '<br>')
-                    if style_str:
-                        para_html.append(f'<span style="{style_str}">{text}</span>')
-                    else:
-                        para_html.append(text)
-                
-                para_style_str = '; '.join([f"{k}: {v}" for k, v in para_style.items()])
-                para_content = ''.join(para_html)
+                    # v17.7: PowerPoint дробит текст на runs (проверка орфографии,
+                    # lang, rsid) - соседние runs с одинаковым стилем склеиваем
+                    if runs and runs[-1].style is run_style:
+                        runs[-1].text += run.text
+                        continue
+                    
+                    runs.append(Run(run_style, run.text))
                 
-                if para_content.strip():  # Только если есть контент
-                    if para_style_str:
-                        html_content.append(f'<p style="{para_style_str}">{para_content}</p>')
-                    else:
-                        html_content.append(f'<p>{para_content}</p>')
+                # Только если есть контент (непустой текст или оформленный run)
+                if any(r.style or r.text.strip() for r in runs):
+                    paragraphs.append(Paragraph(para_style, runs))
         except Exception as e:
             print(f"  Ошибка обработки текста: {e}")
         
+        return paragraphs
+    
+    def plain_text_paragraphs(self, text):
+        """Параграфы для фигур, у которых нет text_frame (только текст)"""
+        empty = self.styles.intern({})
+        return [Paragraph(empty, [Run(empty, text)])]
+    
+    @staticmethod
+    def escape_text(text):
+        """Экранирует текст для вставки в HTML"""
+        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    
+    @staticmethod
+    def style_to_css(style):
+        """Преобразует словарь стилей в строку для атрибута style"""
+        return '; '.join([f"{k}: {v}" for k, v in style.items()])
+    
+    def render_paragraphs_html(self, paragraphs):
+        """Формирует HTML из параграфов, извлеченных process_text_frame"""
+        html_content = []
+        
+        for paragraph in paragraphs:
+            para_html = []
+            for run in paragraph.runs:
+                style_str = self.style_to_css(run.style)
+                text = self.escape_text(run.text).replace('\n', '<br>')
+                if style_str:
+                    para_html.append(f'<span style="{style_str}">{text}</span>')
+                else:
+                    para_html.append(text)
+            
+            para_style_str = self.style_to_css(paragraph.style)
+            para_content = ''.join(para_html)
+            if para_style_str:
+                html_content.append(f'<p style="{para_style_str}">{para_content}</p>')
+            else:
+                html_content.append(f'<p>{para_content}</p>')
+        
         return '\n'.join(html_content)
     
-    def process_slide(self, slide, slide_num):
-        """Обрабатывает один слайд"""
-        print(f"Обработка слайда {slide_num}...")
+    def process_slide_within_budget(self, slide, slide_num, worker=None):
+        """Обрабатывает слайд; при сбое или превышении бюджета - упрощенный режим (v18.10)
         
+        Args:
+            worker: slide_budget.SlideWorker или None (разбор в этом процессе)
+        """
+        if worker is not None:
+            slide_data, replay, failure = worker.run(slide_num)
+            if slide_data is not None:
+                self.replay_worker_slide(replay)
+                return slide_data
+        else:
+            try:
+                return self.process_slide(slide, slide_num)
+            except Exception as e:
+                failure = f"{type(e).__name__}: {e}"
+        
+        print(f"  ⚠️ Слайд {slide_num} не обработан ({failure}) - упрощенный режим")
+        self.degraded[slide_num] = failure
+        return self.process_slide_degraded(slide, slide_num)
+    
+    def prepare_budget_worker(self):
+        """Вызывается в процессе-исполнителе сразу после fork (v18.10)"""
+        # Собственный дескриптор архива: позиция чтения общего файла не делится с родителем
+        self.media = MediaStore(self.pptx_path)
+    
+    def process_slide_in_worker(self, slide, slide_num):
+        """Разбор слайда в исполнителе: Slide и сведения для replay_worker_slide"""
+        self.deferred_media = []
+        memo = style_extractor.memo
+        hits, misses = memo.hits, memo.misses
+        slide_data = self.process_slide(slide, slide_num)
+        replay = {
+            'media': self.deferred_media,
+            'memo': (memo.hits - hits, memo.misses - misses),
+        }
+        self.deferred_media = None
+        return slide_data, replay
+    
+    def replay_worker_slide(self, replay):
+        """Записывает медиа слайда из исполнителя и переносит счетчики кэша стилей"""
+        if self._parts_by_name is None:
+            self._parts_by_name = {str(part.partname): part for part in self.prs.part.package.iter_parts()}
+        for filename, partname in replay['media']:
+            self.save_media(self._parts_by_name[partname], filename)
+        hits, misses = replay['memo']
+        style_extractor.memo.hits += hits
+        style_extractor.memo.misses += misses
+    
+    def process_slide_degraded(self, slide, slide_num):
+        """Упрощенный режим слайда (v18.10)
+        
+        Только фон (цвет или изображение) и текст: без изображений фигур,
+        классификации, таблиц, векторов и эффектов. Текст берется из a:t
+        без форматирования и наследования стилей, у текстовых блоков
+        остается лишь геометрия. Слайд строится всегда, даже если часть
+        данных прочитать не удалось.
+        """
+        print(f"Обработка слайда {slide_num} (упрощенный режим)...")
         slide_width = self.emu_to_px(self.prs.slide_width)
         slide_height = self.emu_to_px(self.prs.slide_height)
-        
+        background = None
+        background_image = None
         shapes_data = []
-        img_counter = 0
-        shape_counter = 0  # Счетчик для z-index
         
+        try:
+            theme_resolver.use_master(slide.slide_layout.slide_master)
+            tree = shape_tree_reader.read(slide)
+        except Exception as e:
+            print(f"  Предупреждение: не удалось прочитать фигуры слайда: {e}")
+            return Slide(slide_num, slide_width, slide_height)
+        
+        try:
+            candidates = background_scanner.scan(tree, slide, slide_width, slide_height)
+            background, background_image = self.detect_background(slide, slide_num, candidates)
+        except Exception as e:
+            print(f"  Предупреждение: не удалось определить фон: {e}")
+        self.current_slide_bg_color = background if background else '#FFFFFF'
+        
+        # Обход дерева без рекурсии (глубокие группы), текст - в порядке наложения
+        stack = list(reversed(tree))
+        z_index = 0
+        while stack:
+            shape = stack.pop()
+            if shape.children:
+                stack.extend(reversed(shape.children))
+                continue
+            if not shape.has_text or None in (shape.left, shape.top, shape.width, shape.height):
+                continue
+            z_index += 1
+            try:
+                style = ShapeStyle(self.emu_to_px(shape.left), self.emu_to_px(shape.top),
+                                   self.emu_to_px(shape.width), self.emu_to_px(shape.height), z_index)
+                content = []
+                for paragraph in shape.element.iter(DRAWINGML_NS + 'p'):
+                    text = ''.join(t.text or '' for t in paragraph.iter(DRAWINGML_NS + 't'))
+                    if text.strip():
+                        content.extend(self.plain_text_paragraphs(text))
+                if content:
+                    shapes_data.append(Shape('text', style, content, shape_id=shape.shape_id))
+            except Exception as e:
+                print(f"  Предупреждение: текст фигуры {shape.name} пропущен: {e}")
+        
+        return Slide(slide_num, slide_width, slide_height, background, background_image, shapes_data)
+    
+    def detect_background(self, slide, slide_num, candidates):
+        """Определяет фон слайда (v18.10: вынесено из process_slide)
+        
+        Returns:
+            tuple: (цвет фона или None, путь к фоновому изображению или None)
+        """
         # Фон слайда
         background = None
         background_image = None
@@ -705,7 +1037,7 @@ class PPTXToHTMLConverter:
                 background = self.rgb_to_hex(slide.background.fill.fore_color)
             # Проверяем фоновое изображение
             elif slide.background.fill.type == 6:  # PICTURE
-                background_image = self.save_background_image(slide, slide_num)
+                background_image = self.save_background_image(slide, slide_num, candidates)
         except Exception as e:
             pass
         
@@ -714,25 +1046,14 @@ class PPTXToHTMLConverter:
         # ПРИОРИТЕТ выше, чем slide master!
         if not background and not background_image:
             try:
-                slide_area = slide_width * slide_height
-                for shape in slide.shapes:
+                # FREEFORM на весь слайд (> 95% площади, начало в (0,0)) - из индекса кандидатов
+                for shape in candidates.full_bleed:
                     try:
-                        if shape.shape_type == MSO_SHAPE_TYPE.FREEFORM:
-                            # Проверяем размер фигуры
-                            shape_area = self.emu_to_px(shape.width) * self.emu_to_px(shape.height)
-                            area_percent = (shape_area / slide_area) * 100
-                            
-                            # Если фигура занимает больше 95% слайда и начинается с (0,0)
-                            if area_percent > 95:
-                                left = self.emu_to_px(shape.left)
-                                top = self.emu_to_px(shape.top)
-                                
-                                if left < 5 and top < 5:  # Почти в начале слайда
-                                    # Проверяем заливку
-                                    if hasattr(shape, 'fill') and shape.fill.type == 1:  # SOLID
-                                        background = self.rgb_to_hex(shape.fill.fore_color)
-                                        print(f"  ✓ Фон найден как FREEFORM: {background}")
-                                        break
+                        # Проверяем заливку
+                        if shape.fill_type == MSO_FILL_TYPE.SOLID:
+                            background = self.rgb_to_hex(shape.proxy.fill.fore_color)
+                            print(f"  ✓ Фон найден как FREEFORM: {background}")
+                            break
                     except:
                         continue
             except:
@@ -750,6 +1071,30 @@ class PPTXToHTMLConverter:
             except Exception as e:
                 print(f"  Предупреждение: не удалось обработать фон слайда: {e}")
         
+        return background, background_image
+    
+    def process_slide(self, slide, slide_num):
+        """Обрабатывает один слайд"""
+        print(f"Обработка слайда {slide_num}...")
+        
+        # Схема темы образца разбирается один раз и переиспользуется
+        theme_resolver.use_master(slide.slide_layout.slide_master)
+        
+        slide_width = self.emu_to_px(self.prs.slide_width)
+        slide_height = self.emu_to_px(self.prs.slide_height)
+        
+        shapes_data = []
+        img_counter = 0
+        shape_counter = 0  # Счетчик для z-index
+        
+        # v18.2: Дерево фигур читается один раз, без прокси python-pptx
+        tree = shape_tree_reader.read(slide)
+        # v18.5: Кандидаты на фон - один проход по дереву для всех проверок ниже
+        candidates = background_scanner.scan(tree, slide, slide_width, slide_height)
+        
+        # Фон слайда
+        background, background_image = self.detect_background(slide, slide_num, candidates)
+        
         # Сохраняем цвет фона для определения дефолтного цвета текста
         self.current_slide_bg_color = background if background else '#FFFFFF'
         
@@ -758,7 +1103,7 @@ class PPTXToHTMLConverter:
             """Проверяет, является ли группа составным QR-кодом
             
             Args:
-                group_shape: Группа для проверки
+                group_shape: Группа для проверки (ShapeNode)
             
             Returns:
                 bool: True если группа содержит маленькие изображения/фигуры, формирующие QR
@@ -774,7 +1119,7 @@ class PPTXToHTMLConverter:
             try:
                 width_px = group_shape.width // 9525
                 height_px = group_shape.height // 9525
-                num_shapes = len(group_shape.shapes)
+                num_shapes = len(group_shape.children)
                 
                 # Проверяем размер
                 if width_px > 150 or height_px > 150:
@@ -790,10 +1135,10 @@ class PPTXToHTMLConverter:
                     return False
                 
                 # Проверяем, что большинство элементов - это FREEFORM или PICTURE (части QR)
-                freeform_count = sum(1 for s in group_shape.shapes if s.shape_type == MSO_SHAPE_TYPE.FREEFORM)
-                picture_count = sum(1 for s in group_shape.shapes if s.shape_type == MSO_SHAPE_TYPE.PICTURE)
+                qr_parts = sum(1 for s in group_shape.children
+                               if s.shape_type in (MSO_SHAPE_TYPE.FREEFORM, MSO_SHAPE_TYPE.PICTURE))
                 
-                if (freeform_count + picture_count) / num_shapes < 0.8:
+                if qr_parts / num_shapes < 0.8:
                     return False
                 
                 return True
@@ -818,82 +1163,56 @@ class PPTXToHTMLConverter:
                 group_left_px = group_shape.left // 9525
                 group_top_px = group_shape.top // 9525
                 
-                # Сохраняем информацию о группе как QR-код
-                width_percent = (group_width_px / slide_width) * 100
-                height_percent = (group_height_px / slide_height) * 100
-                left_percent = (group_left_px / slide_width) * 100
-                top_percent = (group_top_px / slide_height) * 100
-                
                 # Собираем информацию о всех частях группы
                 parts = []
-                for sub_shape in group_shape.shapes:
+                for sub_shape in group_shape.children:
                     try:
-                        part_data = {
-                            'type': sub_shape.shape_type,
-                            'left': sub_shape.left // 9525,
-                            'top': sub_shape.top // 9525,
-                            'width': sub_shape.width // 9525,
-                            'height': sub_shape.height // 9525,
-                        }
+                        part_data = QRPart(
+                            None,
+                            sub_shape.left // 9525,
+                            sub_shape.top // 9525,
+                            sub_shape.width // 9525,
+                            sub_shape.height // 9525,
+                        )
                         
                         # Для FREEFORM - сохраняем цвет заливки
                         if sub_shape.shape_type == MSO_SHAPE_TYPE.FREEFORM:
+                            part_data.kind = 'freeform'
+                            # Явный RGB-цвет; цвета темы и прочие заливки - прозрачные
                             try:
-                                if sub_shape.fill.type == MSO_FILL_TYPE.SOLID:
-                                    rgb = sub_shape.fill.fore_color.rgb
-                                    part_data['fill_color'] = f'rgb({rgb[0]}, {rgb[1]}, {rgb[2]})'
-                                else:
-                                    part_data['fill_color'] = 'transparent'
-                            except:
-                                part_data['fill_color'] = 'transparent'
+                                rgb = sub_shape.solid_rgb()
+                            except ValueError:
+                                rgb = None
+                            part_data.fill = f'rgb({rgb[0]}, {rgb[1]}, {rgb[2]})' if rgb else 'transparent'
                         
                         # Для PICTURE - сохраняем путь к изображению
                         elif sub_shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                            part_data.kind = 'picture'
                             try:
-                                image = sub_shape.image
-                                ext = image.ext
-                                img_data = image.blob
-                                img_name = f"slide{slide_num + 1}_qrpart{len(parts) + 1}.{ext}"
-                                img_path = os.path.join(self.images_dir, img_name)
-                                os.makedirs(os.path.dirname(img_path), exist_ok=True)
-                                with open(img_path, 'wb') as f:
-                                    f.write(img_data)
-                                part_data['image_path'] = f"images/{img_name}"
+                                image_part = slide.part.related_part(sub_shape.image_rid())
+                                img_name = f"slide{slide_num + 1}_qrpart{len(parts) + 1}.{media_ext(image_part)}"
+                                part_data.src = self.save_media(image_part, img_name)
                             except:
-                                part_data['image_path'] = None
+                                part_data.src = None
                         
                         parts.append(part_data)
                     except Exception as e:
                         print(f"    Предупреждение: не удалось обработать часть группы: {e}")
                         continue
                 
-                shape_data = {
-                    'type': 'qr-group',
-                    'style': {
-                        'position': 'absolute',
-                        'left': f"{left_percent:.3f}%",
-                        'top': f"{top_percent:.3f}%",
-                        'width': f"{width_percent:.3f}%",
-                        'height': f"{height_percent:.3f}%",
-                        'z-index': str(shape_counter),
-                    },
-                    'content': '',
-                    'image_type': 'qr-code',
-                    'is_composite': True,
-                    'num_parts': len(parts),
-                    'actual_size': (group_width_px, group_height_px),
-                    'parts': parts,  # Список всех частей группы
-                    'group_bounds': {  # Границы группы для расчета относительных позиций
-                        'left': group_left_px,
-                        'top': group_top_px,
-                        'width': group_width_px,
-                        'height': group_height_px
-                    }
-                }
+                # Границы группы - геометрия стиля; части позиционируются относительно нее
+                shape_data = Shape(
+                    'qr-group',
+                    ShapeStyle(group_left_px, group_top_px, group_width_px, group_height_px, shape_counter),
+                    image_type='qr-code',
+                    actual_size=(group_width_px, group_height_px),
+                    parts=parts,
+                    shape_id=group_shape.shape_id,
+                )
                 
                 shapes_data.append(shape_data)
                 print(f"  QR-группа: {group_width_px}x{group_height_px}px ({len(parts)} частей) → composite qr-code")
-                print(f"    → Части: {len([p for p in parts if p['type'] == MSO_SHAPE_TYPE.FREEFORM])} FREEFORM, {len([p for p in parts if p['type'] == MSO_SHAPE_TYPE.PICTURE])} PICTURE")
+                print(f"    → Части: {len([p for p in parts if p.kind == 'freeform'])} FREEFORM, {len([p for p in parts if p.kind == 'picture'])} PICTURE")
                 
             except Exception as e:
                 print(f"  Предупреждение: не удалось обработать QR-группу: {e}")
@@ -902,7 +1221,7 @@ class PPTXToHTMLConverter:
             """Рекурсивно обрабатывает фигуры, включая группы
             
             Args:
-                shape: Фигура для обработки
+                shape: Фигура для обработки (shape_tree.ShapeNode)
                 level: Уровень вложенности (0 = слайд, 1+ = внутри группы)
             
             Note:
@@ -912,22 +1231,9 @@ class PPTXToHTMLConverter:
             nonlocal img_counter, shape_counter
             
             # Пропускаем FREEFORM фигуры, которые использованы как фон слайда
-            if shape.shape_type == MSO_SHAPE_TYPE.FREEFORM and background and level == 0:
-                try:
-                    # Проверяем, это ли фоновая фигура (только на верхнем уровне слайда)
-                    shape_area = self.emu_to_px(shape.width) * self.emu_to_px(shape.height)
-                    slide_area = slide_width * slide_height
-                    area_percent = (shape_area / slide_area) * 100
-                    
-                    if area_percent > 95:
-                        left = self.emu_to_px(shape.left)
-                        top = self.emu_to_px(shape.top)
-                        
-                        if left < 5 and top < 5:
-                            # Это фоновая фигура, пропускаем
-                            return
-                except:
-                    pass
+            # (только на верхнем уровне слайда - такие фигуры есть в индексе кандидатов)
+            if background and level == 0 and candidates.is_full_bleed(shape):
+                return
             
             # Проверяем, является ли это группой
             if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
@@ -938,15 +1244,11 @@ class PPTXToHTMLConverter:
                 else:
                     # Обычная группа - обрабатываем каждую фигуру рекурсивно
                     # Координаты дочерних элементов уже абсолютные!
-                    for sub_shape in shape.shapes:
+                    for sub_shape in shape.children:
                         process_shape_recursive(sub_shape, level + 1)
                 return
             
-            shape_data = {
-                'type': None,
-                'style': {},
-                'content': ''
-            }
+            shape_data = Shape(None, None, shape_id=shape.shape_id)
             
             # Увеличиваем счетчик фигур для z-index
             shape_counter += 1
@@ -960,76 +1262,71 @@ class PPTXToHTMLConverter:
                 return
             
             # Текстовые блоки
-            if shape.has_text_frame and hasattr(shape, 'text') and shape.text.strip():
-                shape_data['type'] = 'text'
-                shape_data['style'] = base_style
-                shape_data['content'] = self.process_text_frame(shape.text_frame, base_style, slide_width, slide_height)
-                if shape_data['content'].strip():  # Только если есть контент
+            if shape.has_text:
+                proxy = shape.proxy
+                shape_data.kind = 'text'
+                shape_data.style = base_style
+                shape_data.content = self.process_text_frame(proxy.text_frame, base_style, slide_width, slide_height, proxy)
+                if shape_data.content:  # Только если есть контент
                     shapes_data.append(shape_data)
             
             # Изображения
             elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
                 img_counter += 1
                 try:
-                    img_path = self.save_image(shape.image, slide_num, img_counter, "img")
+                    image_part = slide.part.related_part(shape.image_rid())
+                    img_path = self.save_image(image_part, slide_num, img_counter, "img")
                     
                     if img_path:
                         # Для изображений создаём стиль БЕЗ background-color
-                        # Копируем base_style и удаляем фон, чтобы сохранить прозрачность PNG
-                        image_style = base_style.copy()
-                        if 'background-color' in image_style:
-                            del image_style['background-color']
-                        if 'background' in image_style:
-                            del image_style['background']
-                        if 'opacity' in image_style:
-                            # Opacity для картинок сохраняем
-                            pass
+                        # (opacity сохраняется), чтобы сохранить прозрачность PNG
+                        image_style = base_style.without_background()
                         
-                        shape_data['type'] = 'image'
-                        shape_data['style'] = image_style
-                        shape_data['content'] = img_path
+                        shape_data.kind = 'image'
+                        shape_data.style = image_style
+                        shape_data.content = img_path
                         
                         # v15: Классификация изображения
                         try:
                             from PIL import Image
-                            full_path = os.path.join(self.images_dir, os.path.basename(img_path))
                             
                             # Получаем позицию на слайде
-                            left_percent = float(base_style['left'].rstrip('%'))
-                            top_percent = float(base_style['top'].rstrip('%'))
+                            left_percent, top_percent = base_style.position(slide_width, slide_height)
                             width_px = shape.width // 9525
                             height_px = shape.height // 9525
                             
                             # Классифицируем изображение
-                            classification = self.image_classifier.classify(
-                                full_path,
-                                (left_percent, top_percent),
-                                (width_px, height_px)
-                            )
+                            # v18.6: Читаем из пакета - файл в images/ еще может быть в очереди записи
+                            with self.media.open(image_part) as src:
+                                classification = self.image_classifier.classify(
+                                    src,
+                                    (left_percent, top_percent),
+                                    (width_px, height_px)
+                                )
                             
                             img_type = classification['type']
                             actual_w, actual_h = classification['actual_size']
                             
                             # Сохраняем классификацию
-                            shape_data['image_type'] = img_type
-                            shape_data['actual_size'] = (actual_w, actual_h)
-                            shape_data['classification_confidence'] = classification['confidence']
+                            shape_data.image_type = img_type
+                            shape_data.actual_size = (actual_w, actual_h)
+                            shape_data.confidence = classification['confidence']
                             
                             print(f"  Изображение: {actual_w}x{actual_h}px → {img_type} ({classification['confidence']:.0%})")
                             
                             # Для QR-кодов сохраняем флаг is_small для обратной совместимости
                             if img_type == 'qr-code':
-                                shape_data['is_small'] = True
+                                shape_data.is_small = True
                                 print(f"    → QR-код будет отображён в фактическом размере")
                             
                         except Exception as e_classify:
                             print(f"  Предупреждение: не удалось классифицировать изображение: {e_classify}")
                             # Fallback к старой логике
                             try:
-                                with Image.open(full_path) as img:
+                                with self.media.open(image_part) as src, Image.open(src) as img:
                                     actual_w, actual_h = img.size
-                                shape_data['actual_size'] = (actual_w, actual_h)
-                                shape_data['image_type'] = 'unknown'
+                                shape_data.actual_size = (actual_w, actual_h)
+                                shape_data.image_type = 'unknown'
                             except:
                                 pass
                         
@@ -1039,35 +1336,21 @@ class PPTXToHTMLConverter:
             
             # Placeholder'ы (могут содержать стили даже если пустые)
             elif shape.shape_type == MSO_SHAPE_TYPE.PLACEHOLDER:
-                # Проверяем, есть ли текст
-                has_text = hasattr(shape, 'text') and shape.text.strip()
-                
-                # Проверяем, есть ли визуальные стили (фон, границы и т.д.)
-                has_fill = hasattr(shape, 'fill') and shape.fill.type is not None
-                has_line = hasattr(shape, 'line') and hasattr(shape.line, 'color')
-                
-                # Если есть текст
-                if has_text:
-                    shape_data['type'] = 'text'
-                    shape_data['style'] = base_style
-                    if shape.has_text_frame:
-                        shape_data['content'] = self.process_text_frame(shape.text_frame, base_style, slide_width, slide_height)
-                    else:
-                        shape_data['content'] = f'<p>{shape.text}</p>'
-                    shapes_data.append(shape_data)
+                # Текстовые плейсхолдеры обработаны выше; проверяем визуальные
+                # стили (фон, границы и т.д.)
                 # Если нет текста, но есть стили (фон или граница)
-                elif has_fill or has_line:
-                    shape_data['type'] = 'shape'
-                    shape_data['style'] = base_style
-                    shape_data['content'] = ''
+                if shape.fill_type is not None or shape.has_line:
+                    shape_data.kind = 'shape'
+                    shape_data.style = base_style
+                    shape_data.content = ''
                     shapes_data.append(shape_data)
                     print(f"  Обработан пустой placeholder со стилями: {shape.name}")
             
             # Таблицы
             elif shape.shape_type == MSO_SHAPE_TYPE.TABLE:
-                shape_data['type'] = 'table'
-                shape_data['style'] = base_style
-                shape_data['content'] = self.process_table(shape.table)
+                shape_data.kind = 'table'
+                shape_data.style = base_style
+                shape_data.content = self.process_table(shape.proxy.table)
                 shapes_data.append(shape_data)
             
             # Автофигуры с заливкой (прямоугольники, эллипсы и т.д.)
@@ -1075,152 +1358,370 @@ class PPTXToHTMLConverter:
                                       MSO_SHAPE_TYPE.FREEFORM,
                                       MSO_SHAPE_TYPE.LINE,
                                       MSO_SHAPE_TYPE.TEXT_BOX]:
-                # Если есть текст
-                if hasattr(shape, 'text') and shape.text.strip():
-                    shape_data['type'] = 'text'
-                    shape_data['style'] = base_style
-                    if shape.has_text_frame:
-                        shape_data['content'] = self.process_text_frame(shape.text_frame, base_style, slide_width, slide_height)
-                    else:
-                        shape_data['content'] = f'<p>{shape.text}</p>'
-                    shapes_data.append(shape_data)
+                # Фигуры с текстом обработаны выше
+                # v17.3: В режиме SVG фигура рисуется контуром в общем <svg>-слое
+                if self.shape_render == 'svg' and shape.fill_type != MSO_FILL_TYPE.PICTURE:
+                    vector = self.build_vector_shape(shape, base_style)
+                    if vector:
+                        shape_data.kind = 'vector'
+                        shape_data.style = base_style
+                        shape_data.content = vector
+                        shapes_data.append(shape_data)
                 # Если нет текста, но есть заливка - фигура с фоном/границей
                 else:
-                    try:
-                        # Проверяем, есть ли заливка-изображение
-                        has_fill = hasattr(shape, 'fill') and shape.fill.type != None
-                        
-                        if has_fill:
-                            try:
-                                # Тип 6 = PICTURE (заливка изображением)
-                                if shape.fill.type == 6:
-                                    # Пытаемся извлечь изображение из заливки
-                                    try:
-                                        # Получаем blip (binary large image part) из заливки
-                                        fill_element = shape.fill._fill
-                                        if hasattr(fill_element, 'blipFill'):
-                                            blip = fill_element.blipFill.blip
-                                            if hasattr(blip, 'embed'):
-                                                rId = blip.embed
-                                                image_part = shape.part.related_part(rId)
-                                                
-                                                img_counter += 1
-                                                ext = image_part.ext
-                                                img_filename = f"slide{slide_num}_img{img_counter}{ext}"
-                                                img_path = os.path.join(self.images_dir, img_filename)
-                                                
-                                                with open(img_path, 'wb') as f:
-                                                    f.write(image_part.blob)
-                                                
-                                                print(f"  ✓ Сохранена заливка-изображение: {img_filename}")
-                                                
-                                                shape_data['type'] = 'image'
-                                                shape_data['style'] = base_style
-                                                shape_data['content'] = f"images/{img_filename}"
-                                                shapes_data.append(shape_data)
-                                                return  # Выходим, изображение обработано
-                                    except Exception as e:
-                                        print(f"  Предупреждение: не удалось извлечь заливку-изображение: {e}")
+                    # Тип 6 = PICTURE (заливка изображением)
+                    if shape.fill_type == MSO_FILL_TYPE.PICTURE:
+                        # Пытаемся извлечь изображение из заливки (a:blipFill/a:blip)
+                        try:
+                            rId = shape.blip_rid()
+                            if rId:
+                                image_part = slide.part.related_part(rId)
                                 
-                                # Если не изображение, обрабатываем как обычную фигуру
-                                # base_style уже содержит все стили из extract_shape_style (background-color, border, opacity и т.д.)
-                                if shape.fill.type == 1:  # SOLID
-                                    shape_data['type'] = 'shape'
-                                    shape_data['style'] = base_style  # Используем уже извлеченные стили
-                                    shape_data['content'] = ''
-                                    shapes_data.append(shape_data)
-                            except Exception as e_fill:
-                                pass
-                        
-                        # Если нет заливки, но есть граница или другие визуальные стили
-                        # base_style уже содержит все стили из extract_shape_style
-                        elif not has_fill:
-                            has_line = hasattr(shape, 'line') and hasattr(shape.line, 'color') and shape.line.color
-                            
-                            if has_line:
-                                shape_data['type'] = 'shape'
-                                shape_data['style'] = base_style  # Используем уже извлеченные стили (включая border)
-                                shape_data['content'] = ''
+                                img_counter += 1
+                                img_filename = f"slide{slide_num}_img{img_counter}.{media_ext(image_part)}"
+                                img_path = self.save_media(image_part, img_filename)
+                                
+                                print(f"  ✓ Сохранена заливка-изображение: {img_filename}")
+                                
+                                shape_data.kind = 'image'
+                                shape_data.style = base_style
+                                shape_data.content = img_path
                                 shapes_data.append(shape_data)
-                    except:
-                        pass  # Пропускаем фигуры, которые не можем обработать
+                                return  # Выходим, изображение обработано
+                        except Exception as e:
+                            print(f"  Предупреждение: не удалось извлечь заливку-изображение: {e}")
+                    
+                    # Если не изображение, обрабатываем как обычную фигуру
+                    # base_style уже содержит все стили из extract_shape_style (background-color, border, opacity и т.д.)
+                    if shape.fill_type == MSO_FILL_TYPE.SOLID:
+                        shape_data.kind = 'shape'
+                        shape_data.style = base_style  # Используем уже извлеченные стили
+                        shape_data.content = ''
+                        shapes_data.append(shape_data)
+                    
+                    # Если нет заливки, но есть граница или другие визуальные стили
+                    # base_style уже содержит все стили из extract_shape_style (включая border)
+                    elif shape.fill_type is None and shape.has_line:
+                        shape_data.kind = 'shape'
+                        shape_data.style = base_style
+                        shape_data.content = ''
+                        shapes_data.append(shape_data)
             
             # Другие типы фигур
             else:
-                if hasattr(shape, 'text') and shape.text.strip():
-                    shape_data['type'] = 'shape'
-                    shape_data['style'] = base_style
-                    shape_data['content'] = shape.text
+                if shape.has_text:
+                    shape_data.kind = 'shape'
+                    shape_data.style = base_style
+                    shape_data.content = shape.proxy.text
                     shapes_data.append(shape_data)
         
         # Обрабатываем все фигуры на слайде
-        for shape in slide.shapes:
+        for shape in tree:
             process_shape_recursive(shape)
         
-        return {
-            'slide_num': slide_num,
-            'width': slide_width,
-            'height': slide_height,
-            'aspect_ratio': slide_width / slide_height,
-            'background': background,
-            'background_image': background_image,
-            'shapes': shapes_data
-        }
+        return Slide(slide_num, slide_width, slide_height, background, background_image, shapes_data)
+    
+    def build_vector_shape(self, shape, base_style):
+        """Описание фигуры для SVG-слоя (v17.3)
+        
+        Args:
+            shape: Автофигура, FREEFORM, линия или соединитель (ShapeNode)
+            base_style: Стили из extract_shape_style
+        
+        Returns:
+            dict: 'd' - контуры [(path, заливать, обводить)], краски из
+                  StyleExtractor.extract_svg_paint, 'tf' - transform,
+                  'fx' - тень (filter), 'op' - прозрачность; None если рисовать нечего
+        """
+        try:
+            sp_pr = shape.sp_pr
+            
+            # Координаты в пикселях слайда без округления
+            x = shape.left / 9525
+            y = shape.top / 9525
+            w = shape.width / 9525
+            h = shape.height / 9525
+            
+            css = base_style.paint or {}
+            paint = style_extractor.extract_svg_paint(shape.proxy, css)
+            if not (paint.get('f') or paint.get('g') or paint.get('s')):
+                return None
+            
+            paths = svg_geometry.build_paths(sp_pr, x, y, w, h)
+            if not paths:
+                return None
+            
+            vector = {'d': paths}
+            vector.update(paint)
+            
+            xfrm = shape.xfrm
+            flip_h = xfrm is not None and xfrm.get('flipH') == '1'
+            flip_v = xfrm is not None and xfrm.get('flipV') == '1'
+            transform = svg_geometry.transform(shape.rotation, flip_h, flip_v, x, y, w, h)
+            if transform:
+                vector['tf'] = transform
+            
+            if css.get('box-shadow'):
+                vector['fx'] = f"drop-shadow({css['box-shadow']})"
+            if css.get('opacity'):
+                vector['op'] = css['opacity']
+            
+            return vector
+        except Exception as e:
+            print(f"  Предупреждение: не удалось построить SVG-контур: {e}")
+            return None
     
     def process_table(self, table):
-        """Обрабатывает таблицу"""
-        html = ['<table style="width: 100%; border-collapse: collapse;">']
+        """Обрабатывает таблицу
+        
+        Returns:
+            list: Строки таблицы, каждая - список slide_model.TableCell
+        """
+        rows = []
         
         try:
             for row in table.rows:
-                html.append('<tr>')
+                cells = []
                 for cell in row.cells:
                     # Стили ячейки
-                    cell_style = []
+                    cell_style = {}
                     
                     if cell.fill.type == 1:  # SOLID
                         bg_color = self.rgb_to_hex(cell.fill.fore_color)
                         if bg_color:
-                            cell_style.append(f"background-color: {bg_color}")
+                            cell_style['background-color'] = bg_color
                     
                     # Границы
-                    cell_style.append("border: 1px solid #ccc")
-                    cell_style.append("padding: 8px")
-                    
-                    style_str = '; '.join(cell_style)
-                    text = cell.text.replace('<', '&lt;').replace('>', '&gt;')
+                    cell_style['border'] = '1px solid #ccc'
+                    cell_style['padding'] = '8px'
                     
-                    html.append(f'<td style="{style_str}">{text}</td>')
-                html.append('</tr>')
+                    cells.append(TableCell(self.styles.intern(cell_style), cell.text))
+                rows.append(cells)
         except Exception as e:
             print(f"Ошибка обработки таблицы: {e}")
         
+        return rows
+    
+    def render_table_html(self, rows):
+        """Формирует HTML таблицы из строк, извлеченных process_table"""
+        html = ['<table style="width: 100%; border-collapse: collapse;">']
+        
+        for cells in rows:
+            html.append('<tr>')
+            for cell in cells:
+                style_str = self.style_to_css(cell.style)
+                html.append(f'<td style="{style_str}">{self.escape_text(cell.text)}</td>')
+            html.append('</tr>')
+        
         html.append('</table>')
         return '\n'.join(html)
     
-    def convert(self):
-        """Основной метод конвертации"""
-        self.load_presentation()
+    def convert(self, progress=None):
+        """Основной метод конвертации
+        
+        Args:
+            progress: Подписчик событий прогресса на эту конвертацию -
+                callable(ProgressEvent) (v18.11)
+        
+        Returns:
+            Результат приемника (v18.7): путь к папке или архиву,
+            для sink='memory' - словарь {относительный путь: bytes}
+        """
+        if progress is not None:
+            self.progress.subscribe(progress)
+        self.progress.start()
+        try:
+            result, restored = self._convert_or_restore()
+        except Exception as e:
+            self.progress.emit('failed', error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            if progress is not None:
+                self.progress.unsubscribe(progress)
+        
+        print(f"\n✅ Конвертация завершена!")
+        if isinstance(result, dict):
+            print(f"📦 Результаты в памяти: {len(result)} файлов")
+        else:
+            print(f"📁 Результаты сохранены в: {result}")
+            if os.path.isdir(result):
+                print(f"🌐 Откройте: {self.sink.location('index.html')}")
+        return result
+    
+    def iter_events(self):
+        """Запускает convert() в отдельном потоке и выдает события прогресса (v18.11)
+        
+        Итератор заканчивается событием done (или failed - тогда после
+        него поднимается исключение конвертации). Результат приемника
+        доступен через converter.sink (для sink='memory' - sink.files).
+        """
+        return iterate_events(self.progress, self.convert)
+    
+    def _convert_or_restore(self):
+        """Кэш или конвертация; возвращает (результат приемника, файлов из кэша или None)"""
+        # v18.9: При попадании в кэш презентация не открывается
+        cache_key = self.cache_key()
+        restored = self.cache.restore(cache_key, self.sink) if cache_key else None
+        if restored is not None:
+            # v18.13: stats.json не кэшируется - отчет о попадании и сэкономленном времени
+            self.save_stats(cached_report(self.stats, restored, self.conversion_cache_stats(True),
+                                          self.cache.meta(cache_key)))
+            self.writer.close()
+            result = self.sink.close()
+            print(f"♻️ Результат взят из кэша: {restored} файлов (ключ {cache_key[:12]})")
+        else:
+            result = self._run_conversion()
+            if cache_key and not self.writer.errors:
+                paths = [path for path in self.writer.paths if path != STATS_PATH]
+                if self.cache.store(cache_key, self.sink, paths, meta=self.stats_summary):
+                    print(f"♻️ Результат сохранен в кэш (ключ {cache_key[:12]})")
+        
+        if self.cache:
+            cache_stats = self.cache.stats()
+            print(f"📊 Кэш конвертаций: {cache_stats['hits']} попаданий, {cache_stats['misses']} промахов, "
+                  f"{cache_stats['entries']} записей, {cache_stats['bytes'] / 1048576:.1f} МБ, "
+                  f"вытеснено: {cache_stats['evictions']}")
+        
+        self.progress.emit('done', cached=restored is not None, slides=len(self.slide_data),
+                           degraded=sorted(self.degraded),
+                           files=restored if restored is not None else len(self.writer.paths),
+                           bytes=self.writer.bytes_written,
+                           output=result if isinstance(result, str) else 'memory')
+        return result, restored
+    
+    def cache_key(self):
+        """Ключ кэша результатов или None (кэш выключен или неприменим)"""
+        if self.cache is None:
+            return None
+        if self.slides is not None:
+            # Выборочная конвертация дополняет прежний вывод - результат не самодостаточен
+            return None
+        options = {
+            'output_format': self.output_format,
+            'json_layout': self.json_layout,
+            'shape_render': self.shape_render,
+            'critical_css': self.critical_css is not None,
+            'slide_budget': self.budget.describe(),
+            'fingerprint': self.assets.enabled,
+            'offline': self.offline,
+        }
+        return self.cache.key(self.pptx_path, CONVERTER_VERSION, options)
+    
+    def conversion_cache_stats(self, hit):
+        """Сведения о кэше конвертаций для stats.json (None - кэш выключен)"""
+        if self.cache is None:
+            return None
+        cache_stats = self.cache.stats()
+        lookups = cache_stats['hits'] + cache_stats['misses']
+        return dict(cache_stats, hit=hit, hit_ratio=round(cache_stats['hits'] / lookups, 4) if lookups else None)
+    
+    def save_stats(self, report):
+        """Записывает stats.json (v18.13)"""
+        self.writer.submit(STATS_PATH, lambda f: json.dump(report, f, indent=2, ensure_ascii=False))
+    
+    def _run_conversion(self):
+        """Полная конвертация; возвращает результат приемника"""
+        with self.stats.stage('load'):
+            self.load_presentation()
+        
+        # v17.6: Счетчики кэша стилей считаются за одну конвертацию
+        style_extractor.memo.reset_stats()
+        
+        # v18.10: Слайды под бюджетом разбираются в процессе-исполнителе
+        worker = None
+        if self.budget.enabled:
+            if SlideBudget.supported():
+                worker = SlideWorker(self, self.budget)
+            else:
+                print("⚠️ Бюджеты слайдов недоступны на этой платформе - слайды разбираются без лимитов")
         
-        # Обработка всех слайдов
-        for idx, slide in enumerate(self.prs.slides, 1):
-            slide_data = self.process_slide(slide, idx)
-            self.slide_data.append(slide_data)
+        # Обработка слайдов (v18.1: только выбранных - остальные не разбираются)
+        selected = set(self.selected_slides) if self.selected_slides else None
+        pending = [(idx, slide) for idx, slide in enumerate(self.prs.slides, 1)
+                 if selected is None or idx in selected]
+        try:
+            with self.stats.stage('slides'):
+                for position, (idx, slide) in enumerate(pending, 1):
+                    self.progress.emit('slide_started', slide=idx, index=position, count=len(pending))
+                    started = time.perf_counter()
+                    slide_data = self.process_slide_within_budget(slide, idx, worker)
+                    seconds = time.perf_counter() - started
+                    self.slide_data.append(slide_data)
+                    self.stats.record_slide(slide_data, seconds, self.degraded.get(idx))
+                    if self.progress.active:
+                        self.progress.slide_finished(
+                            idx, position, len(pending), seconds,
+                            shapes=len(slide_data.shapes),
+                            images=sum(1 for shape in slide_data.shapes if shape.kind == 'image'),
+                            degraded=idx in self.degraded)
+        finally:
+            if worker is not None:
+                worker.stop()
+        
+        if self.degraded:
+            print(f"\n⚠️ Упрощенный режим: {len(self.degraded)} слайд(ов) - "
+                  f"{', '.join(str(num) for num in sorted(self.degraded))}")
         
         # Генерация HTML
-        self.generate_html()
-        self.generate_css()
+        with self.stats.stage('html'):
+            self.generate_html()
+        with self.stats.stage('css'):
+            self.generate_css()
         
         # Сохранение метаданных
-        self.save_metadata()
-        
-        print(f"\n✅ Конвертация завершена!")
-        print(f"📁 Результаты сохранены в: {self.output_dir}")
-        print(f"🌐 Откройте: {os.path.join(self.output_dir, 'index.html')}")
+        with self.stats.stage('metadata'):
+            self.save_metadata()
+            self.save_asset_manifest()
+        
+        # v18.6: Дожидаемся записи всех файлов до закрытия пакета
+        with self.stats.stage('write'):
+            failed = self.writer.close()
+        
+        # v18.15: Список файлов для кэша - по уже записанным файлам
+        if self.offline:
+            with self.stats.stage('service_worker'):
+                self.save_service_worker()
+                self.writer.flush()
+        
+        # v18.13: Отчет - после записи остальных файлов (их размеры уже известны)
+        report = self.stats.report(style_extractor.memo.stats(), self.media_index.summary(),
+                                   self.conversion_cache_stats(False))
+        self.stats_summary = {key: report['deck'][key] for key in ('slides', 'files', 'bytes')}
+        self.stats_summary['seconds'] = report['deck']['stages']['total']
+        self.save_stats(report)
+        failed = self.writer.close()
+        self.media.close()
+        result = self.sink.close()
+        if failed:
+            print(f"\n⚠️ Не удалось записать файлов: {failed}")
+        
+        memo_stats = style_extractor.memo.stats()
+        print(f"\n📊 Кэш стилей: {memo_stats['hits']} попаданий, {memo_stats['misses']} промахов "
+              f"({memo_stats['size']}/{memo_stats['maxsize']} записей)")
+        return result
     
     def generate_html(self):
         """Генерирует HTML файлы - отдельный файл для каждого слайда"""
         
+        # v18.14: Невыбранные страницы ссылаются на файлы из прежнего манифеста,
+        # прежний deck.json читается по его имени с хэшем
+        if self.assets.enabled and self.selected_slides is not None:
+            data = self.sink.read(MANIFEST_PATH)
+            if data is not None:
+                try:
+                    self.assets.merge(json.loads(data.decode('utf-8')))
+                except ValueError:
+                    pass
+        
+        # v18.14: Имена общих файлов (с хэшем) нужны страницам заранее
+        self.assets.name('style.css', self.get_css_content())
+        if self.output_format == 'json':
+            self.assets.name('renderer.js', RENDERER_JS)
+        
+        # v17.2: В JSON-режиме сначала пишем scene graph и рендерер
+        if self.output_format == 'json':
+            self.generate_scene_graph()
+        
         # Генерируем отдельную страницу для каждого слайда
         for slide_data in self.slide_data:
             self._generate_slide_page(slide_data)
@@ -1230,20 +1731,95 @@ class PPTXToHTMLConverter:
         
         print(f"✅ Создано {len(self.slide_data)} HTML страниц в папке pages/")
     
+    def save_asset_manifest(self):
+        """assets-manifest.json и _headers (v18.14, только с fingerprint)"""
+        if not self.assets.enabled:
+            return
+        manifest = self.assets.manifest()
+        self.writer.submit(MANIFEST_PATH, lambda f: json.dump(manifest, f, indent=2, ensure_ascii=False))
+        # v18.15: sw.js проверяется при каждом запросе - иначе браузер не увидит новую версию
+        revalidated = ('/' + SERVICE_WORKER_PATH, '/' + PRECACHE_MANIFEST_PATH) if self.offline else ()
+        self.writer.write_text(HEADERS_PATH, self.assets.headers(revalidated))
+        print(f"🔖 Файлов с хэшем в имени: {len(manifest)}, манифест: {self.sink.location(MANIFEST_PATH)}")
+    
+    def save_service_worker(self):
+        """sw.js и precache-manifest.json по записанным файлам (v18.15)"""
+        precache = PrecacheList(self.sink).collect(sorted(self.writer.paths))
+        if self.selected_slides is not None:
+            # Страницы и изображения невыбранных слайдов - из прежнего манифеста
+            previous = self.sink.read(PRECACHE_MANIFEST_PATH)
+            if previous is not None:
+                try:
+                    precache.collect(json.loads(previous.decode('utf-8')).get('files', {}))
+                except (ValueError, AttributeError):
+                    pass
+        manifest = precache.manifest()
+        self.writer.write_text(SERVICE_WORKER_PATH, precache.script())
+        self.writer.submit(PRECACHE_MANIFEST_PATH, lambda f: json.dump(manifest, f, indent=2, ensure_ascii=False))
+        print(f"📴 Service worker: {len(manifest['files'])} файлов, версия {manifest['version']} "
+              f"({self.sink.location(SERVICE_WORKER_PATH)})")
+    
+    def _offline_script(self, base):
+        """Регистрация service worker на странице (v18.15) или пустая строка"""
+        return registration_script(base) if self.offline else ''
+    
+    def generate_scene_graph(self):
+        """Сохраняет слайды как JSON scene graph и клиентский рендерер (v17.2)"""
+        for slide_data in self.slide_data:
+            self.scenes[slide_data.num] = self.scene_serializer.serialize_slide(slide_data)
+        
+        if self.json_layout == 'deck':
+            deck_path = f"{self.data_dir}/deck.json"
+            scenes = dict(self.scenes)
+            if self.selected_slides is not None:
+                # v18.1: Сцены невыбранных слайдов берутся из прежнего deck.json
+                for scene in self._load_previous_json(self.assets.url(deck_path), 'slides'):
+                    if scene.get('n') not in scenes and 1 <= scene.get('n', 0) <= self.total_slides:
+                        scenes[scene['n']] = scene
+            deck = {'v': 1, 'slides': [scenes[num] for num in sorted(scenes)]}
+            text = self.scene_serializer.dumps(deck)
+            self.writer.write_text(self.assets.name(deck_path, text), text)
+        else:
+            for slide_num, scene in self.scenes.items():
+                text = self.scene_serializer.dumps(scene)
+                self.writer.write_text(self.assets.name(f"{self.data_dir}/slide{slide_num}.json", text), text)
+        
+        renderer_path = self.assets.url('renderer.js')
+        self.writer.write_text(renderer_path, RENDERER_JS)
+        
+        print(f"✅ Scene graph сохранен в папке data/ ({self.json_layout}), рендерер: {self.sink.location(renderer_path)}")
+    
+    def _load_previous_json(self, path, key):
+        """Список key из ранее сохраненного JSON (для выборочной конвертации)"""
+        data = self.sink.read(path)
+        if data is None:
+            return []
+        try:
+            return json.loads(data.decode('utf-8')).get(key, [])
+        except (ValueError, AttributeError):
+            return []
+    
+    def _scene_url(self, slide_num):
+        """Путь к JSON сцены относительно pages/"""
+        if self.json_layout == 'deck':
+            return '../' + self.assets.url(f'{self.data_dir}/deck.json')
+        return '../' + self.assets.url(f'{self.data_dir}/slide{slide_num}.json')
+    
     def _generate_slide_html_content(self, slide_data):
         """Генерирует HTML контент для одного слайда"""
-        slide_num = slide_data['slide_num']
-        aspect_ratio = slide_data['aspect_ratio']
-        total_slides = len(self.slide_data)
+        slide_num = slide_data.num
+        slide_width = slide_data.width
+        slide_height = slide_data.height
+        aspect_ratio = slide_data.aspect_ratio
         
         # Стили фона
         bg_styles = []
-        if slide_data.get('background'):
-            bg_styles.append(f"background-color: {slide_data['background']}")
+        if slide_data.background:
+            bg_styles.append(f"background-color: {slide_data.background}")
         
-        if slide_data.get('background_image'):
+        if slide_data.background_image:
             # Путь к изображению должен быть относительно pages/
-            bg_styles.append(f"background-image: url('../{slide_data['background_image']}')")
+            bg_styles.append(f"background-image: url('../{slide_data.background_image}')")
             bg_styles.append("background-size: cover")
             bg_styles.append("background-position: center")
             bg_styles.append("background-repeat: no-repeat")
@@ -1252,40 +1828,59 @@ class PPTXToHTMLConverter:
         
         html_parts = []
         
+        # v17.3: Подряд идущие SVG-фигуры собираются в один <svg>-слой,
+        # чтобы сохранить порядок наложения относительно HTML-элементов
+        vector_run = []
+        
+        def flush_vectors():
+            if vector_run:
+                html_parts.append(svg_geometry.render_layer(
+                    [v.content for v in vector_run],
+                    slide_width, slide_height,
+                    vector_run[0].style.z,
+                    f"s{slide_num}l{len(html_parts)}"))
+                vector_run.clear()
+        
         # Фигуры на слайде
-        for shape in slide_data['shapes']:
-            style_str = '; '.join([f"{k}: {v}" for k, v in shape['style'].items()])
+        for shape in slide_data.shapes:
+            if shape.kind == 'vector':
+                vector_run.append(shape)
+                continue
+            flush_vectors()
+            
+            style_str = self.style_to_css(shape.style.css(slide_width, slide_height))
+            # v18.12: id фигуры (cNvPr) - для точечного обновления страницы в режиме --watch
+            id_attr = f' data-shape-id="{shape.shape_id}"' if shape.shape_id is not None else ''
             
-            if shape['type'] == 'text':
+            if shape.kind == 'text':
                 html_parts.append(f'''
-                <div class="text-block" style="{style_str}">
-                    {shape['content']}
+                <div class="text-block"{id_attr} style="{style_str}">
+                    {self.render_paragraphs_html(shape.content)}
                 </div>
 ''')
-            elif shape['type'] == 'qr-group':
+            elif shape.kind == 'qr-group':
                 # v16.3: Композитный QR-код из группы фигур
-                parts = shape.get('parts', [])
-                group_bounds = shape.get('group_bounds', {})
+                bounds = shape.style
                 
                 html_parts.append(f'''
-                <div class="qr-group-block" style="{style_str}; overflow: visible;">
+                <div class="qr-group-block"{id_attr} style="{style_str}; overflow: visible;">
 ''')
                 
-                for part in parts:
-                    rel_left = ((part['left'] - group_bounds['left']) / group_bounds['width']) * 100
-                    rel_top = ((part['top'] - group_bounds['top']) / group_bounds['height']) * 100
-                    rel_width = (part['width'] / group_bounds['width']) * 100
-                    rel_height = (part['height'] / group_bounds['height']) * 100
+                for part in shape.parts or ():
+                    rel_left = ((part.left - bounds.left) / bounds.width) * 100
+                    rel_top = ((part.top - bounds.top) / bounds.height) * 100
+                    rel_width = (part.width / bounds.width) * 100
+                    rel_height = (part.height / bounds.height) * 100
                     
                     part_style = f"position: absolute; left: {rel_left:.3f}%; top: {rel_top:.3f}%; width: {rel_width:.3f}%; height: {rel_height:.3f}%;"
                     
-                    if part['type'] == MSO_SHAPE_TYPE.FREEFORM:
-                        fill_color = part.get('fill_color', 'transparent')
+                    if part.kind == 'freeform':
+                        fill_color = part.fill or 'transparent'
                         html_parts.append(f'''
                     <div class="qr-part qr-freeform" style="{part_style} background-color: {fill_color};"></div>
 ''')
-                    elif part['type'] == MSO_SHAPE_TYPE.PICTURE:
-                        img_path = part.get('image_path')
+                    elif part.kind == 'picture':
+                        img_path = part.src
                         if img_path:
                             # Корректируем путь для pages/
                             img_path = '../' + img_path
@@ -1298,148 +1893,102 @@ class PPTXToHTMLConverter:
                 html_parts.append('''
                 </div>
 ''')
-            elif shape['type'] == 'image':
-                img_type = shape.get('image_type', 'unknown')
-                actual_w, actual_h = shape.get('actual_size', (0, 0))
+            elif shape.kind == 'image':
+                img_type = shape.image_type or 'unknown'
+                actual_w, actual_h = shape.actual_size or (0, 0)
                 # Корректируем путь к изображению для pages/
-                img_src = '../' + shape['content']
+                img_src = '../' + shape.content
                 
                 if img_type == 'qr-code':
                     html_parts.append(f'''
-                <div class="image-block qr-code" style="{style_str}; display: flex; align-items: center; justify-content: center;">
+                <div class="image-block qr-code"{id_attr} style="{style_str}; display: flex; align-items: center; justify-content: center;">
                     <img src="{img_src}" alt="QR Code" style="width: {actual_w}px; height: {actual_h}px; object-fit: none; image-rendering: pixelated;">
                 </div>
 ''')
                 elif img_type == 'icon':
                     html_parts.append(f'''
-                <div class="image-block icon" style="{style_str}; display: flex; align-items: center; justify-content: center;">
+                <div class="image-block icon"{id_attr} style="{style_str}; display: flex; align-items: center; justify-content: center;">
                     <img src="{img_src}" alt="Icon" style="max-width: 100%; max-height: 100%; object-fit: contain;">
                 </div>
 ''')
                 elif img_type == 'logo':
                     html_parts.append(f'''
-                <div class="image-block logo" style="{style_str}">
+                <div class="image-block logo"{id_attr} style="{style_str}">
                     <img src="{img_src}" alt="Logo" style="width: 100%; height: 100%; object-fit: contain;">
                 </div>
 ''')
                 elif img_type == 'diagram':
                     html_parts.append(f'''
-                <div class="image-block diagram" style="{style_str}">
+                <div class="image-block diagram"{id_attr} style="{style_str}">
                     <img src="{img_src}" alt="Diagram" style="width: 100%; height: 100%; object-fit: contain;">
                 </div>
 ''')
                 else:
-                    if shape.get('is_small', False) and actual_w > 0:
+                    if shape.is_small and actual_w > 0:
                         html_parts.append(f'''
-                <div class="image-block" style="{style_str}; display: flex; align-items: center; justify-content: center;">
+                <div class="image-block"{id_attr} style="{style_str}; display: flex; align-items: center; justify-content: center;">
                     <img src="{img_src}" alt="Image" style="width: {actual_w}px; height: {actual_h}px; object-fit: none;">
                 </div>
 ''')
                     else:
                         html_parts.append(f'''
-                <div class="image-block" style="{style_str}">
+                <div class="image-block"{id_attr} style="{style_str}">
                     <img src="{img_src}" alt="Image" style="width: 100%; height: 100%; object-fit: contain;">
                 </div>
 ''')
-            elif shape['type'] == 'table':
+            elif shape.kind == 'table':
                 html_parts.append(f'''
-                <div class="table-block" style="{style_str}">
-                    {shape['content']}
+                <div class="table-block"{id_attr} style="{style_str}">
+                    {self.render_table_html(shape.content)}
                 </div>
 ''')
-            elif shape['type'] == 'group':
+            elif shape.kind == 'shape':
                 html_parts.append(f'''
-                <div class="group-block" style="{style_str}">
-''')
-                for sub_shape in shape['content']:
-                    sub_style_str = '; '.join([f"{k}: {v}" for k, v in sub_shape['style'].items()])
-                    
-                    if sub_shape['type'] == 'shape':
-                        html_parts.append(f'''
-                    <div class="shape-block" style="{sub_style_str}"></div>
-''')
-                    elif sub_shape['type'] == 'image':
-                        sub_img_src = '../' + sub_shape['content']
-                        if sub_shape.get('is_small', False) and 'actual_size' in sub_shape:
-                            actual_w, actual_h = sub_shape['actual_size']
-                            html_parts.append(f'''
-                    <div class="image-block" style="{sub_style_str}; display: flex; align-items: center; justify-content: center;">
-                        <img src="{sub_img_src}" alt="Image" style="width: {actual_w}px; height: {actual_h}px; object-fit: none;">
-                    </div>
-''')
-                        else:
-                            html_parts.append(f'''
-                    <div class="image-block" style="{sub_style_str}">
-                        <img src="{sub_img_src}" alt="Image" style="width: 100%; height: 100%; object-fit: contain;">
-                    </div>
-''')
-                    elif sub_shape['type'] == 'text':
-                        html_parts.append(f'''
-                    <div class="text-block" style="{sub_style_str}">
-                        {sub_shape['content']}
-                    </div>
-''')
-                
-                html_parts.append('''                </div>
-''')
-            elif shape['type'] == 'shape':
-                html_parts.append(f'''
-                <div class="shape-block" style="{style_str}">
-                    <p>{shape['content']}</p>
+                <div class="shape-block"{id_attr} style="{style_str}">
+                    <p>{self.escape_text(shape.content)}</p>
                 </div>
 ''')
         
+        flush_vectors()
+        
         return ''.join(html_parts), bg_style, aspect_ratio
     
     def _generate_slide_page(self, slide_data):
         """Генерирует HTML файл для одного слайда"""
-        slide_num = slide_data['slide_num']
-        total_slides = len(self.slide_data)
-        slide_width = slide_data['width']
-        slide_height = slide_data['height']
+        slide_num = slide_data.num
+        total_slides = self.total_slides
+        slide_width = slide_data.width
+        slide_height = slide_data.height
         
         # Получаем контент слайда
-        slide_content, bg_style, aspect_ratio = self._generate_slide_html_content(slide_data)
+        if self.output_format == 'json':
+            # v17.2: Слайд строится в браузере из scene graph
+            slide_content = ''
+            bg_style = ''
+            aspect_ratio = slide_data.aspect_ratio
+            scene_attrs = f' data-scene="{self._scene_url(slide_num)}" data-base="../"'
+            scene_script = f'\n    <script src="../{self.assets.url("renderer.js")}" defer></script>'
+            if self.json_layout == 'slide':
+                # Сцена встроена в страницу - слайд строится и с file:// (fetch там запрещен)
+                scene_script = '\n    ' + self.scene_serializer.embed(self.scenes[slide_num]) + scene_script
+            css_usage = self.scene_serializer.css_usage(self.scenes[slide_num])
+        else:
+            slide_content, bg_style, aspect_ratio = self._generate_slide_html_content(slide_data)
+            scene_attrs = ''
+            scene_script = ''
+            css_usage = None
+        scene_script += self._offline_script('../')
+        
+        # v17.9: @font-face и preload только для начертаний этой страницы
+        font_links = self.fonts.head_html(self.fonts.page_faces(slide_data.shapes), '../')
+        if font_links:
+            font_links = '\n' + font_links
         
         # Навигация к соседним слайдам
         prev_link = f'page{slide_num-1}.html' if slide_num > 1 else ''
         next_link = f'page{slide_num+1}.html' if slide_num < total_slides else ''
         
-        html = f'''<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Страница {slide_num}</title>
-    <link rel="stylesheet" href="../style.css">
-    <style>
-        /* Точные размеры слайда для этой страницы */
-        .slide {{
-            width: {slide_width}px;
-            height: {slide_height}px;
-            max-width: 95vw;
-            max-height: 85vh;
-        }}
-        
-        /* Адаптивное масштабирование при необходимости */
-        @media (max-width: {slide_width}px), (max-height: {slide_height}px) {{
-            .slide {{
-                width: 95vw;
-                height: calc(95vw * {aspect_ratio:.6f});
-                max-height: 85vh;
-            }}
-            
-            @supports (width: min(95vw, {slide_width}px)) {{
-                .slide {{
-                    width: min(95vw, {slide_width}px);
-                    height: min(calc(95vw * {aspect_ratio:.6f}), {slide_height}px);
-                    max-height: 85vh;
-                }}
-            }}
-        }}
-    </style>
-</head>
-<body>
+        body = f'''<body>
     <div class="presentation-container">
         <!-- Navigation -->
         <nav class="presentation-nav">
@@ -1451,12 +2000,12 @@ class PPTXToHTMLConverter:
         
         <!-- Slide Content -->
         <div class="slides-wrapper">
-            <div class="slide active" data-slide="{slide_num}" data-aspect="{aspect_ratio:.4f}" data-width="{slide_width}" data-height="{slide_height}" style="{bg_style}">
+            <div class="slide active" data-slide="{slide_num}" data-aspect="{aspect_ratio:.4f}" data-width="{slide_width}" data-height="{slide_height}"{scene_attrs} style="{bg_style}">
 {slide_content}
             </div>
         </div>
     </div>
-    
+    {scene_script}
     <script>
         // Keyboard navigation
         document.addEventListener('keydown', (e) => {{
@@ -1485,20 +2034,55 @@ class PPTXToHTMLConverter:
 </html>
 '''
         
+        html = f'''<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Страница {slide_num}</title>
+{self._stylesheet_links(body, '../' + self.assets.url('style.css'), css_usage)}{font_links}
+    <style>
+        /* Точные размеры слайда для этой страницы */
+        .slide {{
+            width: {slide_width}px;
+            height: {slide_height}px;
+            max-width: 95vw;
+            max-height: 85vh;
+        }}
+        
+        /* Адаптивное масштабирование при необходимости */
+        @media (max-width: {slide_width}px), (max-height: {slide_height}px) {{
+            .slide {{
+                width: 95vw;
+                height: calc(95vw * {aspect_ratio:.6f});
+                max-height: 85vh;
+            }}
+            
+            @supports (width: min(95vw, {slide_width}px)) {{
+                .slide {{
+                    width: min(95vw, {slide_width}px);
+                    height: min(calc(95vw * {aspect_ratio:.6f}), {slide_height}px);
+                    max-height: 85vh;
+                }}
+            }}
+        }}
+    </style>
+</head>
+{body}'''
+        
         # Сохраняем файл
-        page_path = os.path.join(self.pages_dir, f'page{slide_num}.html')
-        with open(page_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        page_path = f"{self.pages_dir}/page{slide_num}.html"
+        self.writer.write_text(page_path, html)
     
     def _generate_index_page(self):
         """Генерирует главную страницу index.html со списком всех слайдов"""
-        html_parts = ['''<!DOCTYPE html>
+        head_parts = ['''<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Презентация - Список страниц</title>
-    <link rel="stylesheet" href="style.css">
+''', None, '''
     <style>
         .page-list-container {
             max-width: 1200px;
@@ -1551,14 +2135,16 @@ class PPTXToHTMLConverter:
         }
     </style>
 </head>
-<body>
+''']
+        
+        html_parts = ['''<body>
     <div class="page-list-container">
         <h1 class="page-list-title">📚 Список страниц презентации</h1>
         <div class="page-grid">
 ''']
         
-        for slide_data in self.slide_data:
-            slide_num = slide_data['slide_num']
+        # v18.1: Список всегда охватывает всю презентацию
+        for slide_num in range(1, self.total_slides + 1):
             html_parts.append(f'''
             <div class="page-card" onclick="window.location.href='pages/page{slide_num}.html'">
                 <div class="page-number">{slide_num}</div>
@@ -1569,14 +2155,14 @@ class PPTXToHTMLConverter:
         html_parts.append('''
         </div>
     </div>
-    
+    ''' + self._offline_script('') + '''
     <script>
         // Keyboard navigation - numbers 1-9 and 0
         document.addEventListener('keydown', (e) => {
             const key = e.key;
             if (key >= '1' && key <= '9') {
                 const pageNum = parseInt(key);
-                if (pageNum <= ''' + str(len(self.slide_data)) + ''') {
+                if (pageNum <= ''' + str(self.total_slides) + ''') {
                     window.location.href = `pages/page${pageNum}.html`;
                 }
             }
@@ -1586,16 +2172,45 @@ class PPTXToHTMLConverter:
 </html>
 ''')
         
-        index_path = os.path.join(self.output_dir, 'index.html')
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(''.join(html_parts))
+        body = ''.join(html_parts)
+        head_parts[1] = self._stylesheet_links(body, self.assets.url('style.css'))
+        
+        self.writer.write_text('index.html', ''.join(head_parts) + body)
+        
+        print(f"✅ Главная страница создана: {self.sink.location('index.html')}")
+    
+    def _stylesheet_links(self, body_html, css_href, extra_usage=None):
+        """Формирует подключение общей таблицы стилей для страницы
+        
+        v17.1: В режиме critical_css в <head> встраиваются только правила,
+        селекторы которых встречаются в разметке страницы, а полный style.css
+        загружается без блокировки отрисовки (preload + onload).
+        
+        Args:
+            body_html: Разметка <body> страницы
+            css_href: Относительный путь к style.css
+            extra_usage: (классы, теги) элементов, которые появятся в DOM позже
+        """
+        if not self.critical_css:
+            return f'    <link rel="stylesheet" href="{css_href}">'
         
-        print(f"✅ Главная страница создана: {index_path}")
+        critical = self.critical_css.extract(body_html, extra_usage)
+        return f'''    <style id="critical-css">
+{critical}
+    </style>
+    <link rel="preload" href="{css_href}" as="style" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link rel="stylesheet" href="{css_href}"></noscript>'''
     
     def generate_css(self):
         """Генерирует CSS файл"""
+        css_path = self.assets.url('style.css')
+        self.writer.write_text(css_path, self.get_css_content())
         
-        css_content = '''/* PPTX to HTML - Generated Styles with Fixed Layout */
+        print(f"✅ CSS создан: {self.sink.location(css_path)}")
+    
+    def get_css_content(self):
+        """Возвращает полный текст общей таблицы стилей style.css"""
+        return '''/* PPTX to HTML - Generated Styles with Fixed Layout */
 
 * {
     margin: 0;
@@ -1763,6 +2378,17 @@ body {
     word-wrap: break-word;
 }
 
+/* SVG layer for non-text shapes (v17.3) */
+.shape-layer {
+    position: absolute;
+    left: 0;
+    top: 0;
+    width: 100%;
+    height: 100%;
+    overflow: visible;
+    pointer-events: none;
+}
+
 /* Thumbnails Panel */
 .thumbnails-panel {
     position: fixed;
@@ -1919,49 +2545,122 @@ body {
     }
 }
 '''
-        
-        css_path = os.path.join(self.output_dir, 'style.css')
-        with open(css_path, 'w', encoding='utf-8') as f:
-            f.write(css_content)
-        
-        print(f"✅ CSS создан: {css_path}")
     
     def save_metadata(self):
-        """Сохраняет метаданные презентации"""
+        """Сохраняет метаданные презентации
+        
+        v18.1: При выборочной конвертации записи невыбранных слайдов
+        переносятся из прежнего metadata.json
+        """
+        metadata_path = 'metadata.json'
+        kept_slides = []
+        if self.selected_slides is not None:
+            converted = {slide.num for slide in self.slide_data}
+            kept_slides = [
+                entry for entry in self._load_previous_json(metadata_path, 'slides')
+                if entry.get('slide_num') not in converted and 1 <= entry.get('slide_num', 0) <= self.total_slides
+            ]
+        
         metadata = {
-            'source_file': self.pptx_path,
-            'total_slides': len(self.slide_data),
+            'source_file': self.source_name,
+            'total_slides': self.total_slides,
+            'style_cache': style_extractor.memo.stats(),
+            'media': self.media_index.summary(),
             'slides': []
         }
         
+        # v18.10: Бюджет слайда и слайды в упрощенном режиме
+        if self.budget.enabled or self.degraded:
+            metadata['slide_budget'] = dict(self.budget.describe(), degraded=sorted(self.degraded))
+        
+        # v17.9: Начертания каждой страницы
+        page_fonts = {slide.num: self.fonts.page_faces(slide.shapes) for slide in self.slide_data}
+        summary_fonts = dict(page_fonts)
+        for entry in kept_slides:
+            summary_fonts[entry['slide_num']] = {(family, '400', 'normal') for family in entry.get('fonts', [])}
+        metadata['fonts'] = self.fonts.summary(summary_fonts)
+        
         for slide in self.slide_data:
-            slide_num = slide['slide_num']
+            slide_num = slide.num
             
             # Определяем пути к ресурсам слайда
             slide_meta = {
                 'slide_num': slide_num,
-                'width': slide['width'],
-                'height': slide['height'],
-                'shapes_count': len(slide['shapes']),
+                'width': slide.width,
+                'height': slide.height,
+                'shapes_count': len(slide.shapes),
                 'html_page': f'pages/page{slide_num}.html',  # Путь к отдельной странице
-                'html_url': f'pages/page{slide_num}.html'  # Полный URL к странице
+                'html_url': f'pages/page{slide_num}.html',  # Полный URL к странице
+                'fonts': sorted({family for family, _weight, _style in page_fonts[slide_num]}),
             }
             
+            if slide_num in self.degraded:
+                slide_meta['degraded'] = {'mode': 'background+text', 'reason': self.degraded[slide_num]}
+            
             # Добавляем информацию о фоновом изображении, если есть
-            if slide.get('background_image'):
-                slide_meta['background_image'] = slide['background_image']
+            if slide.background_image:
+                slide_meta['background_image'] = slide.background_image
             
             # Добавляем информацию о фоновом цвете, если есть
-            if slide.get('background_color'):
-                slide_meta['background_color'] = slide['background_color']
+            if slide.background:
+                slide_meta['background_color'] = slide.background
             
             metadata['slides'].append(slide_meta)
         
-        metadata_path = os.path.join(self.output_dir, 'metadata.json')
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        if kept_slides:
+            metadata['slides'] = sorted(metadata['slides'] + kept_slides, key=lambda entry: entry['slide_num'])
         
-        print(f"✅ Метаданные сохранены: {metadata_path}")
+        self.writer.submit(metadata_path, lambda f: json.dump(metadata, f, indent=2, ensure_ascii=False))
+        
+        print(f"✅ Метаданные сохранены: {self.sink.location(metadata_path)}")
+
+
+def build_arg_parser():
+    """Парсер аргументов командной строки"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Конвертер презентаций PowerPoint в веб-страницы')
+    parser.add_argument('pptx_file', nargs='?', help='Путь к PPTX файлу')
+    parser.add_argument('output_dir', nargs='?', help="Папка для сохранения (по умолчанию 'pptx_output')")
+    parser.add_argument('--format', dest='output_format', choices=('html', 'json'), default='html',
+                        help='html - разметка в страницах, json - scene graph + renderer.js')
+    parser.add_argument('--json-layout', choices=('slide', 'deck'), default='slide',
+                        help='Для --format json: файл на слайд или один файл на презентацию')
+    parser.add_argument('--shapes', dest='shape_render', choices=('html', 'svg'), default='html',
+                        help='svg - фигуры без текста рисуются контурами в общем <svg> слайда')
+    parser.add_argument('--slides', default=None,
+                        help="Конвертировать только выбранные слайды: '40-55,60,70-' "
+                             "(остальные страницы в папке вывода сохраняются)")
+    parser.add_argument('--writers', type=int, default=DEFAULT_WORKERS,
+                        help='Потоков записи файлов (0 - запись в основном потоке)')
+    parser.add_argument('--sink', choices=('dir', 'zip'), default='dir',
+                        help="zip - весь результат одним архивом output_folder.zip")
+    parser.add_argument('--cache', dest='cache_dir', default=None,
+                        help='Папка кэша результатов: повторная конвертация того же файла с теми же параметрами берется из кэша')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // 1048576,
+                        help='Предел размера кэша, МБ (старые записи вытесняются)')
+    parser.add_argument('--slide-cpu', type=float, default=None, metavar='SECONDS',
+                        help='Процессорное время на слайд; не уложившийся слайд строится в упрощенном режиме')
+    parser.add_argument('--slide-memory', type=int, default=None, metavar='MB',
+                        help='Дополнительная память на слайд, МБ (то же поведение при превышении)')
+    parser.add_argument('--fingerprint', action='store_true',
+                        help='Хэш содержимого в именах изображений, шрифтов, JSON и CSS; '
+                             'assets-manifest.json и _headers для неограниченного кэширования')
+    parser.add_argument('--offline', action='store_true',
+                        help='Service worker (sw.js): после первого посещения презентация '
+                             'открывается без сети (папка вывода раздается по HTTP)')
+    parser.add_argument('--events', metavar='PATH', default=None,
+                        help="События прогресса строками JSON в файл ('-' - в stderr)")
+    parser.add_argument('--serve', type=int, metavar='PORT', default=None,
+                        help='Запустить HTTP-сервис конвертации (POST /jobs) вместо разовой конвертации')
+    parser.add_argument('--watch', type=int, metavar='PORT', default=None,
+                        help='Следить за файлом: пересобирать изменившиеся слайды и обновлять '
+                             'открытые страницы (сервер http://host:PORT/)')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес сервиса для --serve и --watch')
+    parser.add_argument('--pool', type=int, default=None,
+                        help='Процессов конвертации для --serve (по умолчанию - число ядер)')
+    return parser
 
 
 def main():
@@ -1973,21 +2672,24 @@ def main():
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     
     print("=" * 60)
-    print("PPTX to HTML Converter v17.0")
+    print(f"PPTX to HTML Converter v{CONVERTER_VERSION}")
     print("Конвертер презентаций PowerPoint в веб-страницы")
     print("Каждый слайд сохраняется в отдельный HTML файл")
     print("=" * 60)
     print()
     
     # Парсим аргументы командной строки
-    pptx_file = None
-    output_dir = None
-    args = sys.argv[1:]
+    args = build_arg_parser().parse_args()
+    
+    # v18.8: Режим сервиса
+    if args.serve is not None:
+        from conversion_server import serve
+        serve(args.host, args.serve, args.pool)
+        return
     
     # Получаем путь к файлу
-    if len(args) > 0:
-        pptx_file = args[0]
-    else:
+    pptx_file = args.pptx_file
+    if not pptx_file:
         pptx_file = input("Введите путь к PPTX файлу: ").strip().strip('"')
     
     if not os.path.exists(pptx_file):
@@ -1999,20 +2701,66 @@ def main():
         return
     
     # Получаем папку вывода
-    if len(args) > 1:
-        output_dir = args[1]
-    else:
+    output_dir = args.output_dir
+    if not output_dir:
         output_dir = input("Папка для сохранения (Enter = 'pptx_output'): ").strip()
         if not output_dir:
             output_dir = 'pptx_output'
     
+    if args.slides and args.sink != 'dir' and args.watch is None:
+        print("❌ --slides дописывает страницы в существующую папку и не сочетается с --sink zip")
+        return
+    
+    # v18.12: Режим наблюдения - вывод только в папку
+    if args.watch is not None:
+        from deck_watcher import DeckWatcher
+        if args.sink != 'dir':
+            print("⚠️ --watch пишет только в папку, --sink игнорируется")
+        options = {
+            'output_format': args.output_format,
+            'json_layout': args.json_layout,
+            'shape_render': args.shape_render,
+            'writers': args.writers,
+            'slide_cpu': args.slide_cpu,
+            'slide_memory': args.slide_memory,
+            'fingerprint': args.fingerprint,
+        }
+        if args.offline:
+            print("⚠️ --watch не создает service worker: кэш мешал бы живой перезагрузке, --offline игнорируется")
+        # Сообщения о пересборке должны появляться сразу
+        sys.stdout.reconfigure(line_buffering=True)
+        DeckWatcher(pptx_file, output_dir, options).run(args.host, args.watch)
+        return
+    
     print()
     print("🚀 Начинаем конвертацию...")
     print()
     
+    # v18.11: События прогресса строками JSON
+    events_file = None
+    progress = None
+    if args.events == '-':
+        progress = json_lines_listener(sys.stderr)
+    elif args.events:
+        events_file = open(args.events, 'w', encoding='utf-8')
+        progress = json_lines_listener(events_file)
+    
     try:
-        converter = PPTXToHTMLConverter(pptx_file, output_dir)
-        converter.convert()
+        converter = PPTXToHTMLConverter(pptx_file, output_dir,
+                                        output_format=args.output_format,
+                                        json_layout=args.json_layout,
+                                        shape_render=args.shape_render,
+                                        slides=args.slides,
+                                        writers=args.writers,
+                                        sink=args.sink,
+                                        cache_dir=args.cache_dir,
+                                        cache_size=args.cache_size * 1048576,
+                                        slide_cpu=args.slide_cpu,
+                                        slide_memory=args.slide_memory,
+                                        progress=progress,
+                                        fingerprint=args.fingerprint,
+                                        offline=args.offline)
+        result = converter.convert()
         
         print()
         print("=" * 60)
@@ -2020,7 +2768,10 @@ def main():
         print("=" * 60)
         print()
         print("📝 Инструкции:")
-        print(f"   1. Откройте: {os.path.join(output_dir, 'index.html')}")
+        if args.sink == 'zip':
+            print(f"   1. Распакуйте {result} и откройте index.html")
+        else:
+            print(f"   1. Откройте: {os.path.join(output_dir, 'index.html')}")
         print("   2. Выберите страницу из списка или используйте навигацию")
         print("   3. Каждая страница доступна по отдельной ссылке")
         print()
@@ -2029,6 +2780,9 @@ def main():
         print(f"❌ Ошибка конвертации: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if events_file is not None:
+            events_file.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль событий прогресса конвертации (v18.11)
+Структурированная замена разбору stdout: конвертер сообщает о ходе
+работы событиями ProgressEvent, которые получают подписчики
+(converter.convert(progress=callback)) или итератор
+converter.iter_events().
+
+    deck_loaded     source, total_slides, selected, media_files, media_bytes
+    slide_started   slide, index, count
+    slide_finished  slide, index, count, seconds, shapes, images, degraded,
+                    eta_seconds
+    asset_written   path, kind, bytes         (из потоков-писателей)
+    done            cached, slides, degraded, files, bytes, seconds, output
+    failed          error
+
+index - порядковый номер среди обрабатываемых слайдов (1..count),
+slide - номер слайда в презентации. У каждого события есть elapsed -
+секунды от начала convert().
+"""
+
+import json
+import posixpath
+import queue
+import threading
+import time
+
+
+# Класс файла вывода по пути (события asset_written, статистика)
+ASSET_KINDS = (
+    ('pages/', 'page'),
+    ('images/', 'image'),
+    ('fonts/', 'font'),
+    ('data/', 'data'),
+)
+# Файлы в корне вывода - по расширению (style.css и style.<хэш>.css, v18.14)
+ROOT_ASSET_KINDS = {
+    '.html': 'page',
+    '.css': 'css',
+    '.js': 'script',
+    '.json': 'metadata',
+}
+
+
+def asset_kind(path):
+    """Класс файла вывода: page, image, font, data, css, script, metadata, other"""
+    for prefix, kind in ASSET_KINDS:
+        if path.startswith(prefix):
+            return kind
+    if '/' in path:
+        return 'other'
+    return ROOT_ASSET_KINDS.get(posixpath.splitext(path)[1], 'other')
+
+
+class ProgressEvent:
+    """Событие прогресса: тип, секунды от начала и поля события"""
+
+    __slots__ = ('type', 'elapsed', 'data')
+
+    def __init__(self, event_type, elapsed, data):
+        self.type = event_type
+        self.elapsed = elapsed
+        self.data = data
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    def get(self, name, default=None):
+        return self.data.get(name, default)
+
+    def to_dict(self):
+        """Словарь для JSON: {'type': ..., 'elapsed': ..., поля}"""
+        return dict(self.data, type=self.type, elapsed=round(self.elapsed, 3))
+
+    def __repr__(self):
+        return f"ProgressEvent({self.type!r}, {self.elapsed:.3f}, {self.data!r})"
+
+
+class ProgressReporter:
+    """
+    Рассылка событий подписчикам
+
+    Подписчики вызываются синхронно в потоке, породившем событие
+    (asset_written - в потоках-писателях), под общей блокировкой: два
+    события одновременно не доставляются. Исключение подписчика
+    печатается и не прерывает конвертацию. Без подписчиков emit()
+    ничего не делает.
+    """
+
+    def __init__(self):
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._slide_seconds = 0.0
+        self._slides_done = 0
+
+    def subscribe(self, listener):
+        """Добавляет подписчика: callable(ProgressEvent)"""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    @property
+    def active(self):
+        return bool(self.listeners)
+
+    def start(self):
+        """Начало конвертации: отсчет elapsed и ETA заново"""
+        self._started = time.perf_counter()
+        self._slide_seconds = 0.0
+        self._slides_done = 0
+
+    def emit(self, event_type, **data):
+        if not self.listeners:
+            return
+        event = ProgressEvent(event_type, time.perf_counter() - self._started, data)
+        with self._lock:
+            for listener in list(self.listeners):
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"  ⚠️ Ошибка подписчика событий ({event_type}): {e}")
+
+    def slide_finished(self, slide_num, index, count, seconds, **data):
+        """slide_finished с оценкой оставшегося времени по средней длительности слайда"""
+        self._slide_seconds += seconds
+        self._slides_done += 1
+        eta = self._slide_seconds / self._slides_done * (count - index)
+        self.emit('slide_finished', slide=slide_num, index=index, count=count,
+                  seconds=round(seconds, 3), eta_seconds=round(eta, 3), **data)
+
+
+def json_lines_listener(stream):
+    """Подписчик, пишущий события в поток строками JSON (--events)"""
+    def listener(event):
+        stream.write(json.dumps(event.to_dict(), ensure_ascii=False) + '\n')
+        stream.flush()
+    return listener
+
+
+_END = object()
+
+
+def iterate_events(reporter, run):
+    """
+    Итератор событий: run() выполняется в отдельном потоке, события
+    выдаются по мере появления. Исключение run() поднимается после
+    последнего события. Если перестать читать итератор, конвертация
+    продолжится в фоне до конца.
+    """
+    events = queue.Queue()
+    failure = []
+
+    def target():
+        try:
+            run()
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            events.put(_END)
+
+    reporter.subscribe(events.put)
+    thread = threading.Thread(target=target, name='conversion', daemon=True)
+    thread.start()
+    try:
+        while True:
+            event = events.get()
+            if event is _END:
+                break
+            yield event
+    finally:
+        reporter.unsubscribe(events.put)
+    thread.join()
+    if failure:
+        raise failure[0]
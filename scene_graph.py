@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль сериализации слайдов в JSON scene graph (v17.2)
+Python-сторона только сериализует модель слайда (slide_model.Slide),
+DOM строит клиентский рендерер
+"""
+
+import json
+
+
+SCENE_FORMAT_VERSION = 1
+
+# Разметка изображений по типу классификации (совпадает с HTML-режимом)
+IMAGE_CLASSES = {
+    'qr-code': 'qr-code',
+    'icon': 'icon',
+    'logo': 'logo',
+    'diagram': 'diagram',
+}
+
+
+class SceneGraphSerializer:
+    """Преобразует slide_model.Slide в компактный JSON scene graph
+
+    Формат слайда:
+        {'v': версия, 'n': номер, 'w': ширина, 'h': высота,
+         'bg': цвет фона, 'bgi': фоновое изображение,
+         'css': [таблица уникальных строк стилей], 'sh': [фигуры]}
+
+    Фигуры ссылаются на стили по индексу в 'css', поэтому одинаковые
+    стили (типичные для шаблонных презентаций) хранятся один раз.
+    """
+
+    def __init__(self):
+        self._css_table = None
+        self._css_index = None
+        self._size = None
+
+    def _css(self, style):
+        """Добавляет стиль в таблицу слайда и возвращает его индекс"""
+        css = '; '.join(f"{k}: {v}" for k, v in style.items())
+        index = self._css_index.get(css)
+        if index is None:
+            index = len(self._css_table)
+            self._css_table.append(css)
+            self._css_index[css] = index
+        return index
+
+    def _serialize_paragraphs(self, paragraphs):
+        """Параграфы: [[стиль параграфа, [[стиль run, текст], ...]], ...]"""
+        return [
+            [self._css(p.style), [[self._css(r.style), r.text] for r in p.runs]]
+            for p in paragraphs
+        ]
+
+    def _serialize_shape(self, shape):
+        """Сериализует одну фигуру (slide_model.Shape)"""
+        shape_type = shape.kind
+        node = {'s': self._css(shape.style.css(*self._size))}
+
+        if shape_type == 'text':
+            node['t'] = 'x'
+            node['p'] = self._serialize_paragraphs(shape.content)
+
+        elif shape_type == 'image':
+            node['t'] = 'i'
+            node['src'] = shape.content
+            node['k'] = shape.image_type or 'unknown'
+            if shape.actual_size is not None:
+                node['a'] = list(shape.actual_size)
+            if shape.is_small:
+                node['sm'] = 1
+
+        elif shape_type == 'qr-group':
+            bounds = shape.style
+            node['t'] = 'q'
+            node['b'] = [bounds.left, bounds.top, bounds.width, bounds.height]
+            parts = []
+            for part in shape.parts or ():
+                geometry = [part.left, part.top, part.width, part.height]
+                if part.kind == 'freeform':
+                    parts.append(['f'] + geometry + [part.fill])
+                elif part.src:
+                    parts.append(['p'] + geometry + [part.src])
+            node['pt'] = parts
+
+        elif shape_type == 'table':
+            node['t'] = 'tb'
+            node['r'] = [[[self._css(c.style), c.text] for c in row] for row in shape.content]
+
+        elif shape_type == 'shape':
+            node['t'] = 'sh'
+            if shape.content:
+                node['x'] = shape.content
+
+        elif shape_type == 'vector':
+            # SVG-фигура: рендерер собирает подряд идущие фигуры в один <svg>
+            return {'t': 'v', 'z': str(shape.style.z), 'v': shape.content}
+
+        else:
+            return None
+
+        return node
+
+    def serialize_slide(self, slide_data):
+        """
+        Сериализует один слайд
+
+        Args:
+            slide_data: Результат PPTXToHTMLConverter.process_slide (Slide)
+
+        Returns:
+            dict: Scene graph слайда (готов к json.dump)
+        """
+        self._css_table = []
+        self._css_index = {}
+        self._size = (slide_data.width, slide_data.height)
+
+        shapes = []
+        for shape in slide_data.shapes:
+            node = self._serialize_shape(shape)
+            if node is not None:
+                shapes.append(node)
+
+        scene = {
+            'v': SCENE_FORMAT_VERSION,
+            'n': slide_data.num,
+            'w': slide_data.width,
+            'h': slide_data.height,
+        }
+        if slide_data.background:
+            scene['bg'] = slide_data.background
+        if slide_data.background_image:
+            scene['bgi'] = slide_data.background_image
+        scene['css'] = self._css_table
+        scene['sh'] = shapes
+
+        self._css_table = None
+        self._css_index = None
+        self._size = None
+        return scene
+
+    @staticmethod
+    def dumps(data):
+        """Компактная JSON-сериализация без лишних пробелов"""
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def embed(cls, scene):
+        """
+        Сцена внутри страницы: <script type="application/json" id="scene-N">
+
+        Страница, открытая с file://, не может загрузить data/*.json
+        через fetch() - встроенную сцену рендерер читает без запроса.
+        '<' экранируется, чтобы текст слайда не закрыл тег script.
+        """
+        text = cls.dumps(scene).replace('<', '\\u003c')
+        return f'<script type="application/json" id="scene-{scene["n"]}">{text}</script>'
+
+    @staticmethod
+    def css_usage(scene):
+        """
+        Классы и теги, которые рендерер создаст для сцены
+
+        Нужны для извлечения критического CSS: в HTML-оболочке
+        страницы разметки слайда еще нет.
+
+        Returns:
+            tuple: (set классов, set тегов)
+        """
+        classes = set()
+        tags = {'div'}
+
+        for node in scene['sh']:
+            kind = node['t']
+            if kind == 'x':
+                classes.add('text-block')
+                tags.update(('p', 'span', 'br'))
+            elif kind == 'i':
+                classes.add('image-block')
+                if node['k'] in IMAGE_CLASSES:
+                    classes.add(IMAGE_CLASSES[node['k']])
+                tags.add('img')
+            elif kind == 'q':
+                classes.update(('qr-group-block', 'qr-part', 'qr-freeform', 'qr-picture'))
+                tags.add('img')
+            elif kind == 'tb':
+                classes.add('table-block')
+                tags.update(('table', 'tr', 'td'))
+            elif kind == 'sh':
+                classes.add('shape-block')
+                tags.add('p')
+            elif kind == 'v':
+                classes.add('shape-layer')
+                tags.update(('svg', 'path'))
+
+        return classes, tags
+
+
+# Клиентский рендерер: строит DOM слайда из scene graph.
+# Разметка совпадает с HTML-режимом, поэтому style.css применяется без изменений.
+RENDERER_JS = r'''/* PPTX to HTML - Scene graph renderer (format v1) */
+(function () {
+    'use strict';
+
+    var CENTER = 'display: flex; align-items: center; justify-content: center;';
+
+    var IMAGES = {
+        'qr-code': {cls: ' qr-code', wrap: CENTER, alt: 'QR Code', img: function (n) {
+            return 'width: ' + n.a[0] + 'px; height: ' + n.a[1] + 'px; object-fit: none; image-rendering: pixelated;';
+        }},
+        'icon': {cls: ' icon', wrap: CENTER, alt: 'Icon', img: function () {
+            return 'max-width: 100%; max-height: 100%; object-fit: contain;';
+        }},
+        'logo': {cls: ' logo', wrap: '', alt: 'Logo', img: function () {
+            return 'width: 100%; height: 100%; object-fit: contain;';
+        }},
+        'diagram': {cls: ' diagram', wrap: '', alt: 'Diagram', img: function () {
+            return 'width: 100%; height: 100%; object-fit: contain;';
+        }}
+    };
+
+    function el(tag, cls, css) {
+        var node = document.createElement(tag);
+        if (cls) { node.className = cls; }
+        if (css) { node.style.cssText = css; }
+        return node;
+    }
+
+    function join(css, extra) {
+        return extra ? (css ? css + '; ' + extra : extra) : css;
+    }
+
+    function appendText(parent, text) {
+        var lines = text.split('\n');
+        for (var i = 0; i < lines.length; i++) {
+            if (i) { parent.appendChild(document.createElement('br')); }
+            parent.appendChild(document.createTextNode(lines[i]));
+        }
+    }
+
+    function pct(value, total) {
+        return (value / total * 100).toFixed(3) + '%';
+    }
+
+    function renderShape(node, css, base) {
+        var box, img;
+        var style = css[node.s];
+
+        switch (node.t) {
+        case 'x':
+            box = el('div', 'text-block', style);
+            node.p.forEach(function (para) {
+                var p = el('p', '', css[para[0]]);
+                para[1].forEach(function (run) {
+                    if (css[run[0]]) {
+                        var span = el('span', '', css[run[0]]);
+                        appendText(span, run[1]);
+                        p.appendChild(span);
+                    } else {
+                        appendText(p, run[1]);
+                    }
+                });
+                box.appendChild(p);
+            });
+            return box;
+
+        case 'i':
+            var kind = IMAGES[node.k];
+            var size = node.a || [0, 0];
+            if (kind) {
+                box = el('div', 'image-block' + kind.cls, join(style, kind.wrap));
+                img = el('img', '', kind.img(node));
+                img.alt = kind.alt;
+            } else if (node.sm && size[0] > 0) {
+                box = el('div', 'image-block', join(style, CENTER));
+                img = el('img', '', 'width: ' + size[0] + 'px; height: ' + size[1] + 'px; object-fit: none;');
+                img.alt = 'Image';
+            } else {
+                box = el('div', 'image-block', style);
+                img = el('img', '', 'width: 100%; height: 100%; object-fit: contain;');
+                img.alt = 'Image';
+            }
+            img.src = base + node.src;
+            box.appendChild(img);
+            return box;
+
+        case 'q':
+            var b = node.b;
+            box = el('div', 'qr-group-block', join(style, 'overflow: visible;'));
+            node.pt.forEach(function (part) {
+                var partCss = 'position: absolute; left: ' + pct(part[1] - b[0], b[2]) +
+                    '; top: ' + pct(part[2] - b[1], b[3]) +
+                    '; width: ' + pct(part[3], b[2]) + '; height: ' + pct(part[4], b[3]) + ';';
+                if (part[0] === 'f') {
+                    box.appendChild(el('div', 'qr-part qr-freeform', partCss + ' background-color: ' + part[5] + ';'));
+                } else {
+                    var holder = el('div', 'qr-part qr-picture', partCss);
+                    img = el('img', '', 'width: 100%; height: 100%; object-fit: contain; image-rendering: pixelated;');
+                    img.alt = 'QR Part';
+                    img.src = base + part[5];
+                    holder.appendChild(img);
+                    box.appendChild(holder);
+                }
+            });
+            return box;
+
+        case 'tb':
+            box = el('div', 'table-block', style);
+            var table = el('table', '', 'width: 100%; border-collapse: collapse;');
+            node.r.forEach(function (row) {
+                var tr = el('tr');
+                row.forEach(function (cell) {
+                    var td = el('td', '', css[cell[0]]);
+                    td.textContent = cell[1];
+                    tr.appendChild(td);
+                });
+                table.appendChild(tr);
+            });
+            box.appendChild(table);
+            return box;
+
+        case 'sh':
+            box = el('div', 'shape-block', style);
+            var text = el('p');
+            text.textContent = node.x || '';
+            box.appendChild(text);
+            return box;
+        }
+        return null;
+    }
+
+    var SVG_NS = 'http://www.w3.org/2000/svg';
+
+    function num(value) {
+        return String(parseFloat(value.toFixed(2)));
+    }
+
+    // Слой SVG для подряд идущих фигур без текста (разметка как в HTML-режиме)
+    function renderVectors(nodes, scene, uid) {
+        var defs = '';
+        var body = '';
+        nodes.forEach(function (node, index) {
+            var v = node.v;
+            var fill = v.f || 'none';
+            if (v.g) {
+                var id = uid + 'g' + index;
+                var stops = v.g.s.map(function (s) {
+                    return '<stop offset="' + num(s[0]) + '%" stop-color="' + s[1] + '"/>';
+                }).join('');
+                defs += v.g.k === 'linear'
+                    ? '<linearGradient id="' + id + '" gradientTransform="rotate(' + num(v.g.a) + ' .5 .5)">' + stops + '</linearGradient>'
+                    : '<radialGradient id="' + id + '">' + stops + '</radialGradient>';
+                fill = 'url(#' + id + ')';
+            }
+            var attrs = [];
+            if (v.tf) { attrs.push('transform="' + v.tf + '"'); }
+            if (v.op) { attrs.push('opacity="' + v.op + '"'); }
+            if (v.fx) { attrs.push('style="filter: ' + v.fx + '"'); }
+            var paths = v.d.map(function (p) {
+                var path = '<path d="' + p[0] + '" fill="' + (p[1] ? fill : 'none') + '"';
+                if (p[2] && v.s) {
+                    path += ' stroke="' + v.s + '" stroke-width="' + v.sw + '"';
+                    if (v.da) { path += ' stroke-dasharray="' + v.da + '"'; }
+                }
+                return path + '/>';
+            }).join('');
+            body += attrs.length ? '<g ' + attrs.join(' ') + '>' + paths + '</g>' : paths;
+        });
+        var svg = document.createElementNS(SVG_NS, 'svg');
+        svg.setAttribute('class', 'shape-layer');
+        svg.setAttribute('viewBox', '0 0 ' + scene.w + ' ' + scene.h);
+        svg.setAttribute('preserveAspectRatio', 'none');
+        svg.setAttribute('style', 'z-index: ' + nodes[0].z);
+        svg.innerHTML = (defs ? '<defs>' + defs + '</defs>' : '') + body;
+        return svg;
+    }
+
+    function render(container, scene, base) {
+        base = base || '';
+        if (scene.bg) { container.style.backgroundColor = scene.bg; }
+        if (scene.bgi) {
+            container.style.backgroundImage = "url('" + base + scene.bgi + "')";
+            container.style.backgroundSize = 'cover';
+            container.style.backgroundPosition = 'center';
+            container.style.backgroundRepeat = 'no-repeat';
+        }
+        var fragment = document.createDocumentFragment();
+        var vectors = [];
+        var flush = function () {
+            if (vectors.length) {
+                fragment.appendChild(renderVectors(vectors, scene, 's' + scene.n + 'l' + fragment.childNodes.length));
+                vectors = [];
+            }
+        };
+        scene.sh.forEach(function (node) {
+            if (node.t === 'v') {
+                vectors.push(node);
+                return;
+            }
+            flush();
+            var shape = renderShape(node, scene.css, base);
+            if (shape) { fragment.appendChild(shape); }
+        });
+        flush();
+        container.appendChild(fragment);
+    }
+
+    function showError(container, error) {
+        var message = document.createElement('div');
+        message.className = 'scene-error';
+        message.style.cssText = CENTER + ' position: absolute; inset: 0; padding: 20px; text-align: center; ' +
+            'font: 16px sans-serif; color: #c62828; background: #fff;';
+        message.textContent = 'Не удалось загрузить слайд: ' + error.message +
+            (location.protocol === 'file:' ? ' (откройте презентацию через HTTP-сервер)' : '');
+        container.appendChild(message);
+    }
+
+    // Встроенная сцена (script#scene-N), иначе - data-scene через fetch (--json-layout deck)
+    function load(container) {
+        var num = parseInt(container.getAttribute('data-slide'), 10);
+        var embedded = document.getElementById('scene-' + num);
+        var pending = embedded ? new Promise(function (resolve) {
+            resolve(JSON.parse(embedded.textContent));
+        }) : fetch(container.getAttribute('data-scene')).then(function (response) {
+            if (!response.ok) { throw new Error('HTTP ' + response.status); }
+            return response.json();
+        });
+        return pending
+            .then(function (data) {
+                var scene = data.slides ? data.slides.filter(function (s) { return s.n === num; })[0] : data;
+                if (!scene) { throw new Error('нет сцены слайда ' + num); }
+                render(container, scene, container.getAttribute('data-base') || '');
+            })
+            .catch(function (error) { showError(container, error); });
+    }
+
+    window.PPTXScene = {render: render, load: load};
+
+    document.addEventListener('DOMContentLoaded', function () {
+        Array.prototype.forEach.call(document.querySelectorAll('[data-scene]'), load);
+    });
+})();
+'''
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль service worker для просмотра без сети (v18.15)
+После записи вывода конвертер создает sw.js, который при первом
+посещении сохраняет в Cache Storage все файлы презентации, и
+precache-manifest.json со списком этих файлов:
+
+    index.html, style.css, pages/pageN.html, images/, fonts/, data/,
+    renderer.js - ответы из кэша без обращения к сети
+
+Список берется из путей, записанных при конвертации (с --slides -
+вместе с прежним манифестом). Версия - хэш ревизий всех файлов: любое
+изменение дает новый sw.js, браузер ставит его и удаляет прежний кэш.
+Страницы регистрируют sw.js сниппетом registration_script(); папка
+вывода должна раздаваться по HTTP(S) - с file:// service worker не
+работает.
+"""
+
+import hashlib
+import json
+
+from progress_events import asset_kind
+
+
+SERVICE_WORKER_PATH = 'sw.js'
+PRECACHE_MANIFEST_PATH = 'precache-manifest.json'
+
+# Классы файлов (progress_events.asset_kind), которые нужны для показа
+PRECACHE_KINDS = ('page', 'css', 'script', 'image', 'font', 'data')
+CACHE_PREFIX = 'pptx-html-'
+VERSION_LENGTH = 10
+
+SERVICE_WORKER_JS = r"""/* PPTX to HTML - offline service worker */
+'use strict';
+var CACHE_NAME = '__CACHE_NAME__';
+var PRECACHE = __PRECACHE__;
+
+self.addEventListener('install', function (event) {
+    event.waitUntil(caches.open(CACHE_NAME).then(function (cache) {
+        // cache: 'reload' - мимо HTTP-кэша, иначе можно сохранить устаревший файл
+        return cache.addAll(PRECACHE.map(function (path) {
+            return new Request(path, {cache: 'reload'});
+        }));
+    }).then(function () {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener('activate', function (event) {
+    event.waitUntil(caches.keys().then(function (names) {
+        return Promise.all(names.filter(function (name) {
+            return name.indexOf('__CACHE_PREFIX__') === 0 && name !== CACHE_NAME;
+        }).map(function (name) {
+            return caches.delete(name);
+        }));
+    }).then(function () {
+        return self.clients.claim();
+    }));
+});
+
+self.addEventListener('fetch', function (event) {
+    var request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    var url = new URL(request.url);
+    if (url.href.indexOf(self.registration.scope) !== 0) {
+        return;
+    }
+    if (url.pathname.slice(-1) === '/') {
+        url.pathname += 'index.html';
+    }
+    url.search = '';
+    url.hash = '';
+    event.respondWith(caches.open(CACHE_NAME).then(function (cache) {
+        return cache.match(url.href);
+    }).then(function (cached) {
+        return cached || fetch(request);
+    }));
+});
+"""
+
+
+def registration_script(base):
+    """
+    Сниппет регистрации sw.js для страницы
+
+    Args:
+        base: Путь от страницы к корню вывода ('' для index.html, '../' для pages/)
+    """
+    return f'''
+    <script>
+        if ('serviceWorker' in navigator && location.protocol !== 'file:') {{
+            navigator.serviceWorker.register('{base}{SERVICE_WORKER_PATH}').catch(function () {{}});
+        }}
+    </script>'''
+
+
+def precached(path):
+    """Нужен ли файл вывода для показа без сети"""
+    return asset_kind(path) in PRECACHE_KINDS and path != SERVICE_WORKER_PATH
+
+
+class PrecacheList:
+    """
+    Файлы для предварительного кэширования и их ревизии
+
+    Ревизия - sink.revision(path): хэш содержимого (SHA-1 в папке и в
+    памяти, CRC и размер в zip). Файлы без ревизии (удалены после
+    прежней конвертации) в список не попадают.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.files = {}  # Путь -> ревизия
+
+    def collect(self, paths):
+        """Добавляет подходящие пути (записанные или из прежнего манифеста)"""
+        for path in paths:
+            if path in self.files or not precached(path):
+                continue
+            revision = self.sink.revision(path)
+            if revision is not None:
+                self.files[path] = revision
+        return self
+
+    @property
+    def version(self):
+        """Хэш путей и ревизий всех файлов"""
+        digest = hashlib.sha1()
+        for path in sorted(self.files):
+            digest.update(f"{path} {self.files[path]}\n".encode('utf-8'))
+        return digest.hexdigest()[:VERSION_LENGTH]
+
+    def script(self):
+        """Содержимое sw.js"""
+        precache = json.dumps(sorted(self.files), indent=4)
+        return (SERVICE_WORKER_JS
+                .replace('__CACHE_NAME__', CACHE_PREFIX + self.version)
+                .replace('__CACHE_PREFIX__', CACHE_PREFIX)
+                .replace('__PRECACHE__', precache))
+
+    def manifest(self):
+        """Содержимое precache-manifest.json"""
+        return {'version': self.version, 'files': dict(sorted(self.files.items()))}
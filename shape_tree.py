@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль чтения дерева фигур слайда (v18.2)
+Обход p:spTree напрямую через lxml: тип фигуры, a:off/a:ext, заливка,
+наличие текста и плейсхолдер определяются за один проход по потомкам
+элемента. Прокси python-pptx создаются лениво - только когда нужны
+текстовая рамка, изображение или таблица.
+"""
+
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.enum.dml import MSO_FILL_TYPE
+from pptx.shapes.shapetree import SlideShapeFactory
+
+
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+P_SP = _P + 'sp'
+P_PIC = _P + 'pic'
+P_CXN_SP = _P + 'cxnSp'
+P_GRP_SP = _P + 'grpSp'
+P_GRAPHIC_FRAME = _P + 'graphicFrame'
+P_CONTENT_PART = _P + 'contentPart'
+
+# Дочерние элементы свойств фигуры (spPr у sp/pic/cxnSp, grpSpPr у группы)
+PROPERTIES_TAGS = frozenset((_P + 'spPr', _P + 'grpSpPr'))
+
+# Заливка (прямой потомок spPr) -> тип python-pptx fill.type
+FILL_TYPES = {
+    _A + 'noFill': MSO_FILL_TYPE.BACKGROUND,
+    _A + 'solidFill': MSO_FILL_TYPE.SOLID,
+    _A + 'gradFill': MSO_FILL_TYPE.GRADIENT,
+    _A + 'blipFill': MSO_FILL_TYPE.PICTURE,
+    _A + 'pattFill': MSO_FILL_TYPE.PATTERNED,
+    _A + 'grpFill': MSO_FILL_TYPE.GROUP,
+}
+
+# URI содержимого graphicFrame -> тип фигуры
+GRAPHIC_DATA_TYPES = {
+    'http://schemas.openxmlformats.org/drawingml/2006/table': MSO_SHAPE_TYPE.TABLE,
+    'http://schemas.openxmlformats.org/drawingml/2006/chart': MSO_SHAPE_TYPE.CHART,
+}
+GRAPHIC_DATA_OLE = 'http://schemas.openxmlformats.org/presentationml/2006/ole'
+
+# Фигуры, у которых python-pptx есть .line (граница)
+LINE_OWNER_TAGS = frozenset((P_SP, P_CXN_SP, P_PIC))
+
+# Угол a:xfrm/@rot - 1/60000 градуса
+ANGLE_UNITS = 60000
+
+
+class ShapeNode:
+    """
+    Фигура дерева слайда
+
+    shape_type и fill_type совпадают с shape.shape_type и shape.fill.type
+    python-pptx (None - тип не распознан / заливки нет); left/top/width/height -
+    EMU из a:off/a:ext (для плейсхолдеров без a:xfrm - унаследованные от макета).
+    shape_id - атрибут id элемента cNvPr (уникален в пределах слайда).
+    """
+
+    __slots__ = ('element', 'shapes', 'shape_type', 'shape_id', 'name', 'left', 'top', 'width', 'height',
+                 'rotation', 'xfrm', 'sp_pr', 'fill', 'fill_type', 'is_placeholder', 'has_text',
+                 'children', '_proxy')
+
+    def __init__(self, element, shapes):
+        self.element = element
+        self.shapes = shapes
+        self.shape_type = None
+        self.shape_id = None
+        self.name = ''
+        self.left = self.top = self.width = self.height = None
+        self.rotation = 0.0
+        self.xfrm = None
+        self.sp_pr = None
+        self.fill = None
+        self.fill_type = None
+        self.is_placeholder = False
+        self.has_text = False
+        self.children = None
+        self._proxy = None
+
+    @property
+    def proxy(self):
+        """Прокси python-pptx (создается при первом обращении)"""
+        if self._proxy is None:
+            self._proxy = SlideShapeFactory(self.element, self.shapes)
+        return self._proxy
+
+    @property
+    def has_line(self):
+        """Есть ли у фигуры граница в модели python-pptx (shape.line)"""
+        return self.element.tag in LINE_OWNER_TAGS
+
+    def image_rid(self):
+        """r:embed изображения p:pic (p:blipFill/a:blip) или None"""
+        blip = self.element.find(f'{_P}blipFill/{_A}blip')
+        return blip.get(_R + 'embed') if blip is not None else None
+
+    def blip_rid(self):
+        """r:embed изображения заливки-картинки или None"""
+        if self.fill_type != MSO_FILL_TYPE.PICTURE:
+            return None
+        blip = self.fill.find(_A + 'blip')
+        return blip.get(_R + 'embed') if blip is not None else None
+
+    def solid_rgb(self):
+        """(r, g, b) явного srgbClr сплошной заливки или None"""
+        if self.fill_type != MSO_FILL_TYPE.SOLID:
+            return None
+        color = self.fill.find(_A + 'srgbClr')
+        if color is None:
+            return None
+        value = color.get('val', '')
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class ShapeTreeReader:
+    """Читает p:spTree слайда в список ShapeNode"""
+
+    def read(self, slide):
+        """
+        Фигуры слайда в порядке наложения
+
+        Returns:
+            list: ShapeNode верхнего уровня (группы - с children)
+        """
+        shapes = slide.shapes
+        return self._read_children(shapes._spTree, shapes)
+
+    def _read_children(self, parent, shapes):
+        nodes = []
+        for elem in parent:
+            tag = elem.tag
+            if tag in (P_SP, P_PIC, P_CXN_SP, P_GRP_SP, P_GRAPHIC_FRAME, P_CONTENT_PART):
+                nodes.append(self._read_shape(elem, shapes))
+        return nodes
+
+    def _read_shape(self, elem, shapes):
+        node = ShapeNode(elem, shapes)
+        tag = elem.tag
+
+        nv_pr = None
+        is_textbox = False
+        geometry = None
+        tx_body = None
+        graphic_uri = None
+        is_movie = False
+
+        for index, child in enumerate(elem):
+            child_tag = child.tag
+
+            if index == 0:
+                # Нестандартные свойства: имя, признак надписи, плейсхолдер
+                for nv_child in child:
+                    local = nv_child.tag
+                    if local == _P + 'cNvPr':
+                        node.name = nv_child.get('name', '')
+                        shape_id = nv_child.get('id')
+                        node.shape_id = int(shape_id) if shape_id and shape_id.isdigit() else None
+                    elif local == _P + 'cNvSpPr':
+                        is_textbox = nv_child.get('txBox') in ('1', 'true')
+                    elif local == _P + 'nvPr':
+                        nv_pr = nv_child
+
+            elif child_tag in PROPERTIES_TAGS:
+                node.sp_pr = child
+                for prop in child:
+                    prop_tag = prop.tag
+                    if prop_tag == _A + 'xfrm':
+                        node.xfrm = prop
+                    elif prop_tag in FILL_TYPES and tag == P_SP:
+                        # Заливка в модели python-pptx есть только у p:sp (shape.fill)
+                        node.fill = prop
+                        node.fill_type = FILL_TYPES[prop_tag]
+                    elif prop_tag in (_A + 'custGeom', _A + 'prstGeom'):
+                        geometry = prop_tag
+
+            elif child_tag == _P + 'xfrm':
+                # graphicFrame хранит позицию в p:xfrm
+                node.xfrm = child
+
+            elif child_tag == _P + 'txBody':
+                tx_body = child
+
+            elif child_tag == _A + 'graphic':
+                graphic_data = child.find(_A + 'graphicData')
+                if graphic_data is not None:
+                    graphic_uri = graphic_data.get('uri')
+
+        if nv_pr is not None:
+            node.is_placeholder = nv_pr.find(_P + 'ph') is not None
+            is_movie = tag == P_PIC and nv_pr.find(_A + 'videoFile') is not None
+
+        # Тип фигуры по правилам python-pptx (shape.shape_type)
+        if tag == P_SP:
+            if node.is_placeholder:
+                node.shape_type = MSO_SHAPE_TYPE.PLACEHOLDER
+            elif geometry == _A + 'custGeom':
+                node.shape_type = MSO_SHAPE_TYPE.FREEFORM
+            elif geometry == _A + 'prstGeom' and not is_textbox:
+                node.shape_type = MSO_SHAPE_TYPE.AUTO_SHAPE
+            elif is_textbox:
+                node.shape_type = MSO_SHAPE_TYPE.TEXT_BOX
+        elif tag == P_PIC:
+            if node.is_placeholder:
+                node.shape_type = MSO_SHAPE_TYPE.PLACEHOLDER
+            else:
+                node.shape_type = MSO_SHAPE_TYPE.MEDIA if is_movie else MSO_SHAPE_TYPE.PICTURE
+        elif tag == P_CXN_SP:
+            node.shape_type = MSO_SHAPE_TYPE.LINE
+        elif tag == P_GRP_SP:
+            node.shape_type = MSO_SHAPE_TYPE.GROUP
+            node.children = self._read_children(elem, shapes)
+        elif tag == P_GRAPHIC_FRAME:
+            if graphic_uri == GRAPHIC_DATA_OLE:
+                node.shape_type = self._ole_type(elem)
+            else:
+                node.shape_type = GRAPHIC_DATA_TYPES.get(graphic_uri)
+
+        # Текст есть только у p:sp (shape.text python-pptx)
+        if tx_body is not None:
+            node.has_text = any(t.text and t.text.strip() for t in tx_body.iter(_A + 't'))
+
+        self._read_xfrm(node)
+        return node
+
+    @staticmethod
+    def _ole_type(elem):
+        """Встроенный или связанный OLE-объект"""
+        for ole in elem.iter(_P + 'oleObj'):
+            if ole.find(_P + 'embed') is not None:
+                return MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT
+            break
+        return MSO_SHAPE_TYPE.LINKED_OLE_OBJECT
+
+    @staticmethod
+    def _read_xfrm(node):
+        """Координаты и поворот из a:off/a:ext"""
+        xfrm = node.xfrm
+        if xfrm is not None:
+            rot = xfrm.get('rot')
+            if rot:
+                node.rotation = float(int(rot) % (360 * ANGLE_UNITS)) / ANGLE_UNITS
+            for child in xfrm:
+                if child.tag == _A + 'off':
+                    node.left = int(child.get('x'))
+                    node.top = int(child.get('y'))
+                elif child.tag == _A + 'ext':
+                    node.width = int(child.get('cx'))
+                    node.height = int(child.get('cy'))
+
+        # Плейсхолдер без собственной геометрии наследует ее от макета
+        if node.is_placeholder and node.element.tag != P_GRAPHIC_FRAME and None in (
+                node.left, node.top, node.width, node.height):
+            proxy = node.proxy
+            node.left, node.top = proxy.left, proxy.top
+            node.width, node.height = proxy.width, proxy.height
+
+
+# Singleton instance
+shape_tree_reader = ShapeTreeReader()
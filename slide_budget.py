@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль бюджетов слайда (v18.10)
+Слайды разбираются в отдельном процессе-исполнителе (fork после загрузки
+презентации - прокси python-pptx и кэши уже в памяти). Перед каждым
+слайдом исполнитель выставляет себе лимиты относительно текущего
+потребления:
+
+    RLIMIT_CPU - процессорное время (превышение - SIGXCPU, процесс завершается)
+    RLIMIT_AS  - адресное пространство (превышение - MemoryError)
+
+Основной процесс дополнительно ждет результат не дольше
+WALL_FACTOR * cpu + WALL_GRACE секунд. Если слайд не уложился в бюджет,
+исполнитель перезапускается, а конвертер строит слайд в упрощенном режиме.
+Исполнитель ничего не записывает: вместе со слайдом он возвращает
+сведения для повтора (converter.process_slide_in_worker ->
+converter.replay_worker_slide) - например, какие медиа сохранить.
+"""
+
+import math
+import multiprocessing
+import os
+import signal
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Ожидание результата слайда по часам: WALL_FACTOR * cpu + WALL_GRACE
+WALL_FACTOR = 3
+WALL_GRACE = 10
+
+
+class SlideBudget:
+    """Лимиты одного слайда: cpu_seconds (с), memory_mb (МБ); None - без лимита"""
+
+    def __init__(self, cpu_seconds=None, memory_mb=None):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        if memory_mb and not self.memory_supported():
+            # Без /proc (macOS, Windows) отсчитывать лимит не от чего, а macOS
+            # RLIMIT_AS и не соблюдает - в metadata.json лимит не попадает
+            print("⚠️ Бюджет памяти слайда (--slide-memory) не поддерживается на этой платформе - не применяется")
+            self.memory_mb = None
+        self._saved = {}
+
+    @property
+    def enabled(self):
+        return bool(self.cpu_seconds or self.memory_mb)
+
+    @staticmethod
+    def supported():
+        """Лимиты доступны только при fork и модуле resource (Linux, macOS)"""
+        return resource is not None and 'fork' in multiprocessing.get_all_start_methods()
+
+    @staticmethod
+    def memory_supported():
+        """Лимит памяти - RLIMIT_AS от текущего адресного пространства (только Linux)"""
+        return resource is not None and _address_space() is not None
+
+    @property
+    def wall_timeout(self):
+        if not self.cpu_seconds:
+            return None
+        return self.cpu_seconds * WALL_FACTOR + WALL_GRACE
+
+    def describe(self):
+        """Для metadata.json"""
+        return {'cpu_seconds': self.cpu_seconds, 'memory_mb': self.memory_mb}
+
+    def arm(self):
+        """Лимиты на следующий слайд - от текущего потребления процесса"""
+        if self.cpu_seconds:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = usage.ru_utime + usage.ru_stime
+            self._set_soft(resource.RLIMIT_CPU, math.ceil(used + self.cpu_seconds))
+        if self.memory_mb:
+            current = _address_space()
+            if current is not None:
+                self._set_soft(resource.RLIMIT_AS, current + self.memory_mb * 1024 * 1024)
+
+    def disarm(self):
+        """Снимает лимиты слайда (возвращает прежние мягкие лимиты)"""
+        for limit, (soft, hard) in self._saved.items():
+            resource.setrlimit(limit, (soft, hard))
+        self._saved = {}
+
+    def _set_soft(self, limit, value):
+        soft, hard = resource.getrlimit(limit)
+        self._saved.setdefault(limit, (soft, hard))
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        resource.setrlimit(limit, (value, hard))
+
+
+def _address_space():
+    """Текущий размер адресного пространства процесса в байтах (Linux) или None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def _worker_main(converter, conn, budget):
+    """Цикл исполнителя: номер слайда -> (статус, Slide, сведения для повтора)"""
+    # Ядро при SIGXCPU не нужно
+    resource.setrlimit(resource.RLIMIT_CORE, (0, resource.getrlimit(resource.RLIMIT_CORE)[1]))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    converter.prepare_budget_worker()
+    slides = list(converter.prs.slides)
+
+    while True:
+        try:
+            slide_num = conn.recv()
+        except EOFError:
+            break
+        if slide_num is None:
+            break
+
+        budget.arm()
+        try:
+            slide_data, replay = converter.process_slide_in_worker(slides[slide_num - 1], slide_num)
+            payload = ('ok', slide_data, replay)
+        except MemoryError:
+            payload = ('memory', None, None)
+        except Exception as e:
+            payload = ('error', f"{type(e).__name__}: {e}", None)
+        finally:
+            budget.disarm()
+
+        sys.stdout.flush()
+        try:
+            conn.send(payload)
+        except MemoryError:
+            conn.send(('memory', None, None))
+        except Exception as e:
+            conn.send(('error', f"результат не передан: {e}", None))
+    conn.close()
+
+
+class SlideWorker:
+    """Процесс-исполнитель слайдов под бюджетом (перезапускается после сбоя)"""
+
+    def __init__(self, converter, budget):
+        self.converter = converter
+        self.budget = budget
+        self._process = None
+        self._conn = None
+
+    def _start(self):
+        # Перед fork: потоки-писатели простаивают и не держат блокировок,
+        # буфер stdout пуст (иначе исполнитель напечатает его повторно)
+        self.converter.writer.flush()
+        sys.stdout.flush()
+        context = multiprocessing.get_context('fork')
+        parent_conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_worker_main, args=(self.converter, child_conn, self.budget),
+                                        name='slide-worker', daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+    def run(self, slide_num):
+        """
+        Обрабатывает слайд в исполнителе
+
+        Returns:
+            tuple: (Slide или None, сведения для повтора, причина сбоя или None)
+                причина: 'cpu', 'memory', 'timeout', 'crash' или текст ошибки
+        """
+        if self._process is None or not self._process.is_alive():
+            self._start()
+
+        self._conn.send(slide_num)
+        if self._conn.poll(self.budget.wall_timeout):
+            try:
+                status, result, replay = self._conn.recv()
+            except (EOFError, OSError):
+                return None, None, self._failure()
+            if status == 'ok':
+                return result, replay, None
+            if status == 'memory':
+                # После MemoryError состояние исполнителя ненадежно - перезапуск
+                self.stop()
+                return None, None, 'memory'
+            return None, None, result
+
+        self.stop()
+        return None, None, 'timeout'
+
+    def _failure(self):
+        """Причина гибели исполнителя по коду завершения"""
+        self._process.join(5)
+        code = self._process.exitcode
+        self._discard()
+        if code == -signal.SIGXCPU:
+            return 'cpu'
+        if code in (-signal.SIGKILL, -signal.SIGSEGV):
+            # SIGKILL - обычно OOM killer, SIGSEGV - нехватка памяти в C-коде
+            return 'memory'
+        return 'crash'
+
+    def _discard(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def stop(self):
+        """Останавливает исполнитель (следующий run() запустит новый)"""
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+            self._process.join(1)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        self._discard()
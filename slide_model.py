@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модель слайда (v18.0)
+Компактные классы на __slots__ вместо словарей shape_data / slide_data.
+Геометрия хранится целыми пикселями слайда и переводится в проценты
+только при отрисовке; CSS-словари стилей разделяются между фигурами.
+Все классы сериализуются pickle (для передачи между процессами).
+"""
+
+
+def percent(value, total):
+    """Доля от размера слайда в CSS-процентах"""
+    return f"{(value / total) * 100:.3f}%"
+
+
+class StyleTable:
+    """
+    Интернирование CSS-словарей: одинаковые стили run'ов, абзацев и
+    ячеек хранятся одним объектом. Возвращаемые словари не изменяются.
+    """
+
+    __slots__ = ('_styles',)
+
+    def __init__(self):
+        self._styles = {}
+
+    def intern(self, style):
+        key = tuple(style.items())
+        shared = self._styles.get(key)
+        if shared is None:
+            shared = self._styles[key] = style
+        return shared
+
+    def __len__(self):
+        return len(self._styles)
+
+
+class ShapeStyle:
+    """
+    Стиль фигуры
+
+    left/top/width/height - целые пиксели слайда, z - порядок наложения;
+    paint - заливка, граница, тень, трансформации (общий словарь из кэша
+    StyleExtractor); box - выравнивание и отступы текстового блока.
+    """
+
+    __slots__ = ('left', 'top', 'width', 'height', 'z', 'paint', 'box')
+
+    def __init__(self, left, top, width, height, z, paint=None, box=None):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.z = z
+        self.paint = paint
+        self.box = box
+
+    def position(self, slide_width, slide_height):
+        """Позиция в процентах слайда: (left, top) как float"""
+        return ((self.left / slide_width) * 100, (self.top / slide_height) * 100)
+
+    def css(self, slide_width, slide_height):
+        """CSS-словарь фигуры с процентными размерами для адаптивности"""
+        style = {
+            'position': 'absolute',
+            'left': percent(self.left, slide_width),
+            'top': percent(self.top, slide_height),
+            'width': percent(self.width, slide_width),
+            'height': percent(self.height, slide_height),
+            'z-index': str(self.z),
+        }
+        if self.paint:
+            style.update(self.paint)
+        if self.box:
+            style.update(self.box)
+        return style
+
+    def without_background(self):
+        """Копия стиля без фона (для изображений - сохраняет прозрачность PNG)"""
+        paint = self.paint
+        if paint and ('background-color' in paint or 'background' in paint):
+            paint = {k: v for k, v in paint.items() if k not in ('background-color', 'background')}
+        return ShapeStyle(self.left, self.top, self.width, self.height, self.z, paint, self.box)
+
+
+class Run:
+    """Фрагмент текста с общим стилем"""
+
+    __slots__ = ('style', 'text')
+
+    def __init__(self, style, text):
+        self.style = style
+        self.text = text
+
+
+class Paragraph:
+    """Абзац: стиль абзаца и список Run"""
+
+    __slots__ = ('style', 'runs')
+
+    def __init__(self, style, runs):
+        self.style = style
+        self.runs = runs
+
+
+class TableCell:
+    """Ячейка таблицы"""
+
+    __slots__ = ('style', 'text')
+
+    def __init__(self, style, text):
+        self.style = style
+        self.text = text
+
+
+class QRPart:
+    """
+    Часть композитного QR-кода
+
+    kind: 'freeform' (fill - CSS-цвет) или 'picture' (src - путь к файлу);
+    прочие фигуры группы сохраняются с kind=None и не отрисовываются
+    """
+
+    __slots__ = ('kind', 'left', 'top', 'width', 'height', 'fill', 'src')
+
+    def __init__(self, kind, left, top, width, height, fill=None, src=None):
+        self.kind = kind
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.fill = fill
+        self.src = src
+
+
+class Shape:
+    """
+    Фигура слайда
+
+    kind и content:
+        'text'     - список Paragraph
+        'image'    - путь к изображению (image_type, actual_size, is_small)
+        'qr-group' - '' (части в parts, границы группы - в style)
+        'table'    - строки из TableCell
+        'shape'    - исходный текст фигуры ('' для пустой)
+        'vector'   - описание контура для SVG-слоя
+
+    shape_id - id фигуры (cNvPr) в слайде: атрибут data-shape-id разметки.
+    """
+
+    __slots__ = ('kind', 'style', 'content', 'image_type', 'actual_size', 'confidence', 'is_small', 'parts',
+                 'shape_id')
+
+    def __init__(self, kind, style, content='', image_type=None, actual_size=None,
+                 confidence=None, is_small=False, parts=None, shape_id=None):
+        self.kind = kind
+        self.style = style
+        self.content = content
+        self.image_type = image_type
+        self.actual_size = actual_size
+        self.confidence = confidence
+        self.is_small = is_small
+        self.parts = parts
+        self.shape_id = shape_id
+
+
+class Slide:
+    """Слайд: размеры в пикселях, фон и список Shape в порядке наложения"""
+
+    __slots__ = ('num', 'width', 'height', 'background', 'background_image', 'shapes')
+
+    def __init__(self, num, width, height, background=None, background_image=None, shapes=None):
+        self.num = num
+        self.width = width
+        self.height = height
+        self.background = background
+        self.background_image = background_image
+        self.shapes = shapes if shapes is not None else []
+
+    @property
+    def aspect_ratio(self):
+        return self.width / self.height
@@ -3,15 +3,122 @@
 """
 Модуль извлечения продвинутых стилей из PPTX (v16)
 Поддержка градиентов, теней, эффектов, трансформаций
+v17.4: Однопроходное извлечение стилей spPr (extract_element_styles)
+v17.5: Цвета темы (schemeClr) и модификаторы цвета через theme_resolver
+v17.6: LRU-кэш стилей по каноническому XML свойств фигуры (StyleMemo)
 """
 
-from pptx.enum.dml import MSO_FILL_TYPE, MSO_LINE_DASH_STYLE
-from pptx.dml.color import RGBColor
+import hashlib
+import math
+from collections import OrderedDict
+
+from lxml import etree
+
+from theme_resolver import theme_resolver, css_color
+
+
+# Полные имена тегов, вычисляемые один раз при импорте
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+
+A_XFRM = _A + 'xfrm'
+A_LN = _A + 'ln'
+A_EFFECT_LST = _A + 'effectLst'
+A_OUTER_SHDW = _A + 'outerShdw'
+A_NO_FILL = _A + 'noFill'
+A_SOLID_FILL = _A + 'solidFill'
+A_GRAD_FILL = _A + 'gradFill'
+A_BLIP_FILL = _A + 'blipFill'
+A_PATT_FILL = _A + 'pattFill'
+A_GRP_FILL = _A + 'grpFill'
+A_PRST_DASH = _A + 'prstDash'
+P_XFRM = _P + 'xfrm'
+
+# Максимальное число различных наборов стилей в кэше
+STYLE_MEMO_SIZE = 2048
+
+FILL_TAGS = frozenset((A_NO_FILL, A_SOLID_FILL, A_GRAD_FILL, A_BLIP_FILL, A_PATT_FILL, A_GRP_FILL))
+SHAPE_PROPERTIES_TAGS = frozenset((_P + 'spPr', _P + 'grpSpPr'))
+
+# Фигуры, у которых python-pptx дает доступ к fill / line
+FILL_OWNER_TAGS = frozenset((_P + 'sp',))
+LINE_OWNER_TAGS = frozenset((_P + 'sp', _P + 'cxnSp', _P + 'pic'))
+
+# prstDash -> (CSS border-style, подпись для лога или None)
+DASH_STYLES = {
+    'solid': ('solid', None),
+    'dash': ('dashed', 'DASHED'),
+    'sysDot': ('dotted', 'DOTTED'),
+    'sysDash': ('dotted', 'DOTTED'),
+    'dashDot': ('dashed', 'DASH-DOT'),
+    'lgDash': ('dashed', 'LONG-DASH'),
+}
+
+
+class StyleMemo:
+    """
+    Ограниченный LRU-кэш CSS-стилей
+    
+    Ключ строится из канонического (C14N) XML, несущего стиль, поэтому
+    фигуры шаблона с одинаковыми spPr / bodyPr считаются один раз.
+    """
+    
+    def __init__(self, maxsize=STYLE_MEMO_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def digest(*parts):
+        """Хэш частей ключа: элементы XML сериализуются в C14N, прочее - через str"""
+        hasher = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            if isinstance(part, etree._Element):
+                hasher.update(etree.tostring(part, method='c14n'))
+            else:
+                hasher.update(str(part).encode('utf-8'))
+            hasher.update(b'\0')
+        return hasher.digest()
+    
+    def get(self, key):
+        """Возвращает закэшированные стили или None"""
+        styles = self._entries.get(key)
+        if styles is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return styles
+    
+    def put(self, key, styles):
+        """Сохраняет стили, вытесняя самые давние записи"""
+        self._entries[key] = styles
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def reset_stats(self):
+        """Обнуляет счетчики (записи кэша сохраняются)"""
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        """Счетчики попаданий/промахов для профиля конвертации"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
 
 
 class StyleExtractor:
     """Извлечение продвинутых стилей из PPTX"""
     
+    def __init__(self):
+        # v17.6: Общий кэш стилей (spPr фигур, bodyPr текстовых блоков)
+        self.memo = StyleMemo()
+    
     @staticmethod
     def emu_to_px(emu):
         """Конвертирует EMU в пиксели"""
@@ -19,8 +126,11 @@ class StyleExtractor:
     
     @staticmethod
     def rgb_to_hex(rgb_color):
-        """Конвертирует RGBColor в hex"""
+        """Конвертирует RGBColor в hex (цвета темы - через theme_resolver)"""
         try:
+            color, _alpha = theme_resolver.resolve_color_format(rgb_color)
+            if color:
+                return color
             if hasattr(rgb_color, 'rgb'):
                 rgb = rgb_color.rgb
                 return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
@@ -30,353 +140,377 @@ class StyleExtractor:
     
     def extract_fill_style(self, fill):
         """
-        Полное извлечение стилей заливки
-        Поддерживает: SOLID, GRADIENT, PICTURE
+        Стили заливки по FillFormat python-pptx (совместимость)
+        
+        v17.4: Разбор выполняет _sppr_fill - та же реализация, что и в
+        extract_element_styles
         """
-        styles = {}
+        elem = getattr(fill, '_xPr', None)
+        if elem is None:
+            return {}
+        for child in elem:
+            if child.tag in FILL_TAGS:
+                return self._sppr_fill(child)
+        return {}
+    
+    def parse_gradient(self, grad_fill):
+        """
+        Разбирает a:gradFill
         
-        try:
-            fill_type = fill.type
-            
-            if fill_type == MSO_FILL_TYPE.SOLID:
-                # Сплошная заливка
-                styles.update(self.extract_solid_fill(fill))
-            
-            elif fill_type == MSO_FILL_TYPE.GRADIENT:
-                # Градиент
-                styles.update(self.extract_gradient_fill(fill))
+        Returns:
+            dict: {'kind': 'linear'|'circle'|'path'|'fallback',
+                   'angle': угол PowerPoint в градусах, 'stops': [(pos%, color), ...]}
+        """
+        # Собираем остановки (color stops)
+        stops = []
+        gs_list = grad_fill.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/main}gs')
+        
+        for gs in gs_list:
+            # Позиция остановки (0-100%)
+            pos = int(gs.get('pos', 0)) / 1000  # Из промилей в проценты
             
-            elif fill_type == MSO_FILL_TYPE.PICTURE:
-                # Изображение (обрабатывается отдельно)
-                styles['fill_type'] = 'picture'
+            # Цвет остановки (srgbClr, schemeClr и др. с модификаторами)
+            color, alpha = theme_resolver.resolve_color_in(gs)
             
-            elif fill_type == MSO_FILL_TYPE.BACKGROUND:
-                # Фон из макета
-                styles['fill_type'] = 'background'
-                
-        except Exception as e:
-            # Тихо игнорируем ошибки
-            pass
+            stops.append((pos, css_color(color or "#000000", alpha)))
         
-        return styles
+        # Сортируем по позиции
+        stops.sort(key=lambda x: x[0])
+        
+        # Определяем тип градиента
+        lin = grad_fill.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}lin')
+        path = grad_fill.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}path')
+        
+        if lin is not None:
+            return {'kind': 'linear', 'angle': int(lin.get('ang', 0)) / 60000, 'stops': stops}
+        if path is not None:
+            kind = 'circle' if path.get('path', 'shape') == 'circle' else 'path'
+            return {'kind': kind, 'angle': 0, 'stops': stops}
+        return {'kind': 'fallback', 'angle': 90, 'stops': stops}
     
-    def extract_solid_fill(self, fill):
-        """Извлекает сплошную заливку"""
+    def _find_grad_fill(self, fill):
+        """Находит a:gradFill заливки (прямой потомок spPr)"""
+        # FillFormat хранит свойства фигуры в _xPr (spPr / tcPr / bg)
+        elem = getattr(fill, '_xPr', None)
+        if elem is None:
+            return None
+        return elem.find('{http://schemas.openxmlformats.org/drawingml/2006/main}gradFill')
+    
+    def gradient_to_css(self, grad_fill):
+        """Формирует CSS background для элемента a:gradFill"""
         styles = {}
         
-        try:
-            color = self.rgb_to_hex(fill.fore_color)
-            if color:
-                styles['background-color'] = color
-            
-            # Прозрачность
-            try:
-                if hasattr(fill.fore_color, 'transparency'):
-                    transparency = fill.fore_color.transparency
-                    if transparency is not None and transparency > 0:
-                        opacity = 1.0 - transparency
-                        styles['opacity'] = f"{opacity:.2f}"
-            except:
-                pass
-                
-        except Exception as e:
-            pass
+        gradient = self.parse_gradient(grad_fill)
+        stops = gradient['stops']
+        stop_strs = [f"{color} {pos:.1f}%" for pos, color in stops]
+        
+        if gradient['kind'] == 'linear':
+            # Линейный градиент
+            # Конвертируем угол из PowerPoint (0° = вправо, по часовой) 
+            # в CSS (0° = вверх, по часовой)
+            css_angle = (gradient['angle'] + 90) % 360
+            
+            # Формируем CSS
+            styles['background'] = f"linear-gradient({css_angle}deg, {', '.join(stop_strs)})"
+            print(f"         ✨ Градиент LINEAR {css_angle}° с {len(stops)} остановками")
+        
+        elif gradient['kind'] == 'circle':
+            # Радиальный градиент
+            styles['background'] = f"radial-gradient(circle, {', '.join(stop_strs)})"
+            print(f"         ✨ Градиент RADIAL с {len(stops)} остановками")
+        
+        elif gradient['kind'] == 'path':
+            # Path/shape - используем radial как approximation
+            styles['background'] = f"radial-gradient(ellipse, {', '.join(stop_strs)})"
+            print(f"         ✨ Градиент PATH/SHAPE с {len(stops)} остановками")
+        
+        elif stops:
+            # Fallback: простой линейный градиент
+            styles['background'] = f"linear-gradient(180deg, {', '.join(stop_strs)})"
+            print(f"         ✨ Градиент FALLBACK с {len(stops)} остановками")
         
         return styles
     
-    def extract_gradient_fill(self, fill):
+    def extract_line_style(self, line):
+        """Стили границы по LineFormat python-pptx (совместимость, см. _sppr_line)"""
+        ln = getattr(line, '_ln', None) if line else None
+        if ln is None:
+            return {}
+        return self._sppr_line(ln)
+    
+    def extract_shadow_effect(self, shape):
+        """Тень фигуры python-pptx (совместимость, см. _sppr_shadow)"""
+        sp_pr = self._shape_properties(shape._element)
+        effect_lst = sp_pr.find(A_EFFECT_LST) if sp_pr is not None else None
+        if effect_lst is None:
+            return {}
+        return self._sppr_shadow(effect_lst)
+    
+    def extract_transform_style(self, shape):
+        """Поворот и отражение фигуры python-pptx (совместимость, см. _sppr_transform)"""
+        elem = shape._element
+        sp_pr = self._shape_properties(elem)
+        xfrm = sp_pr.find(A_XFRM) if sp_pr is not None else elem.find(P_XFRM)
+        if xfrm is None:
+            return {}
+        return self._sppr_transform(xfrm)
+    
+    @staticmethod
+    def _shape_properties(elem):
+        """spPr / grpSpPr - прямой потомок элемента фигуры или None"""
+        for child in elem:
+            if child.tag in SHAPE_PROPERTIES_TAGS:
+                return child
+        return None
+    
+    def extract_element_styles(self, elem):
         """
-        Извлекает градиент
-        Возвращает CSS linear-gradient или radial-gradient
+        Однопроходное извлечение стилей фигуры (v17.4)
+        
+        Прямые потомки spPr обходятся один раз, без поиска .// по всему
+        дереву и без прокси python-pptx (fill.type, line.fill и т.д.).
+        Единственная реализация заливки, границы, тени и трансформаций:
+        extract_fill_style, extract_line_style, extract_shadow_effect и
+        extract_transform_style вызывают те же методы _sppr_*.
+        
+        v17.6: Результат кэшируется по каноническому XML spPr без a:off/a:ext,
+        поэтому одинаково оформленные фигуры в разных местах слайда
+        вычисляются один раз.
+        
+        Returns:
+            dict: CSS-стили заливки, границы, тени и трансформаций.
+                  Словарь общий для одинаково оформленных фигур - не изменять
+        
+        v18.2: Принимает элемент фигуры (p:sp, p:pic, p:cxnSp...) - для
+        обхода дерева слайда без прокси python-pptx
         """
+        owner = elem.tag
+        
+        sp_pr = self._shape_properties(elem)
+        
+        xfrm = fill = line = effect_lst = None
+        if sp_pr is not None:
+            for child in sp_pr:
+                tag = child.tag
+                if tag == A_XFRM:
+                    xfrm = child
+                elif tag in FILL_TAGS:
+                    fill = child
+                elif tag == A_LN:
+                    line = child
+                elif tag == A_EFFECT_LST:
+                    effect_lst = child
+        else:
+            # graphicFrame (таблицы, диаграммы) хранит позицию в p:xfrm
+            xfrm = elem.find(P_XFRM)
+        
+        key = self._sppr_memo_key(owner, sp_pr, xfrm)
+        cached = self.memo.get(key)
+        if cached is not None:
+            return cached
+        
         styles = {}
         
         try:
-            # Доступ к XML элементам для градиента
-            elem = fill._element
-            grad_fill = elem.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}gradFill')
-            
-            if grad_fill is None:
-                return styles
-            
-            # Собираем остановки (color stops)
-            stops = []
-            gs_list = grad_fill.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/main}gs')
+            if fill is not None and owner in FILL_OWNER_TAGS:
+                styles.update(self._sppr_fill(fill))
             
-            for gs in gs_list:
-                # Позиция остановки (0-100%)
-                pos = int(gs.get('pos', 0)) / 1000  # Из промилей в проценты
-                
-                # Цвет остановки
-                color_elem = gs.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}srgbClr')
-                if color_elem is not None:
-                    color_val = color_elem.get('val', '000000')
-                    color = f"#{color_val}"
-                else:
-                    # Попробуем schemeClr или другие
-                    scheme_clr = gs.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}schemeClr')
-                    if scheme_clr is not None:
-                        # Для простоты используем серый
-                        color = "#808080"
-                    else:
-                        color = "#000000"
-                
-                stops.append((pos, color))
+            if line is not None and owner in LINE_OWNER_TAGS:
+                styles.update(self._sppr_line(line))
             
-            # Сортируем по позиции
-            stops.sort(key=lambda x: x[0])
+            if effect_lst is not None:
+                styles.update(self._sppr_shadow(effect_lst))
             
-            # Определяем тип градиента
-            lin = grad_fill.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}lin')
-            path = grad_fill.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}path')
-            
-            if lin is not None:
-                # Линейный градиент
-                angle = int(lin.get('ang', 0)) / 60000  # Из 1/60000 градуса в градусы
-                
-                # Конвертируем угол из PowerPoint (0° = вправо, по часовой) 
-                # в CSS (0° = вверх, по часовой)
-                css_angle = (angle + 90) % 360
-                
-                # Формируем CSS
-                stop_strs = [f"{color} {pos:.1f}%" for pos, color in stops]
-                gradient = f"linear-gradient({css_angle}deg, {', '.join(stop_strs)})"
-                
-                styles['background'] = gradient
-                print(f"         ✨ Градиент LINEAR {css_angle}° с {len(stops)} остановками")
-            
-            elif path is not None:
-                # Радиальный или path градиент
-                path_type = path.get('path', 'shape')
-                
-                if path_type == 'circle':
-                    # Радиальный градиент
-                    stop_strs = [f"{color} {pos:.1f}%" for pos, color in stops]
-                    gradient = f"radial-gradient(circle, {', '.join(stop_strs)})"
-                    
-                    styles['background'] = gradient
-                    print(f"         ✨ Градиент RADIAL с {len(stops)} остановками")
-                else:
-                    # Path/shape - используем radial как approximation
-                    stop_strs = [f"{color} {pos:.1f}%" for pos, color in stops]
-                    gradient = f"radial-gradient(ellipse, {', '.join(stop_strs)})"
-                    
-                    styles['background'] = gradient
-                    print(f"         ✨ Градиент PATH/SHAPE с {len(stops)} остановками")
-            
-            else:
-                # Fallback: простой линейный градиент
-                if stops:
-                    stop_strs = [f"{color} {pos:.1f}%" for pos, color in stops]
-                    gradient = f"linear-gradient(180deg, {', '.join(stop_strs)})"
-                    styles['background'] = gradient
-                    print(f"         ✨ Градиент FALLBACK с {len(stops)} остановками")
+            if xfrm is not None:
+                styles.update(self._sppr_transform(xfrm))
         
         except Exception as e:
-            print(f"         ⚠️ Ошибка извлечения градиента: {e}")
+            print(f"         ⚠️ Ошибка извлечения стилей spPr: {e}")
         
+        self.memo.put(key, styles)
         return styles
     
-    def extract_line_style(self, line):
+    def _sppr_memo_key(self, owner, sp_pr, xfrm):
         """
-        Полное извлечение стилей линии/границы
-        Поддерживает: толщину, цвет, стиль (solid, dashed, dotted)
+        Ключ кэша для extract_element_styles
         
-        ВАЖНО: Границы добавляются ТОЛЬКО если:
-        1. line.fill.type != None (граница включена)
-        2. line.width > 0 (толщина больше 0)
+        Позиция и размер (a:off, a:ext) на CSS не влияют и в ключ не входят;
+        от xfrm берутся только поворот и отражения. Схема темы входит в ключ,
+        так как schemeClr зависит от образца слайдов.
         """
-        styles = {}
+        parts = [owner, theme_resolver.current.key if theme_resolver.current else '']
+        if xfrm is not None:
+            parts.append(f"{xfrm.get('rot')}|{xfrm.get('flipH')}|{xfrm.get('flipV')}")
+        if sp_pr is not None:
+            parts.extend(child for child in sp_pr if child.tag != A_XFRM)
+        return self.memo.digest(*parts)
+    
+    def _sppr_fill(self, fill):
+        """Заливка по элементу-заливке spPr"""
+        tag = fill.tag
         
-        try:
-            if not line:
-                return styles
-            
-            # Проверяем, что граница вообще включена
-            if not hasattr(line, 'fill') or line.fill is None:
-                return styles
-            
-            fill_type = line.fill.type
-            
-            # Если fill.type is None или 0 (нет заливки) - границы нет
-            if fill_type is None or fill_type == 0:
-                return styles
-            
-            # Толщина
-            if not hasattr(line, 'width') or not line.width:
-                return styles
-            
-            width_px = self.emu_to_px(line.width)
-            
-            # Если толщина меньше 1px - игнорируем границу
-            if width_px < 1:
-                return styles
-            
-            styles['border-width'] = f"{width_px}px"
-            
-            # Цвет
+        if tag == A_SOLID_FILL:
+            color, alpha = theme_resolver.resolve_color_in(fill)
+            if color:
+                return {'background-color': css_color(color, alpha)}
+        
+        elif tag == A_GRAD_FILL:
             try:
-                if hasattr(line.fill, 'fore_color') and line.fill.fore_color:
-                    color = self.rgb_to_hex(line.fill.fore_color)
-                    if color:
-                        styles['border-color'] = color
-            except:
-                pass
-            
-            # Стиль линии
-            if hasattr(line, 'dash_style'):
-                dash = line.dash_style
-                
-                if dash == MSO_LINE_DASH_STYLE.SOLID or dash is None:
-                    styles['border-style'] = 'solid'
-                elif dash == MSO_LINE_DASH_STYLE.DASH:
-                    styles['border-style'] = 'dashed'
-                    print(f"         📏 Граница: DASHED {width_px}px")
-                elif dash == MSO_LINE_DASH_STYLE.DOT:
-                    styles['border-style'] = 'dotted'
-                    print(f"         📏 Граница: DOTTED {width_px}px")
-                elif dash == MSO_LINE_DASH_STYLE.DASH_DOT:
-                    # CSS не поддерживает dash-dot, используем dashed
-                    styles['border-style'] = 'dashed'
-                    print(f"         📏 Граница: DASH-DOT {width_px}px")
-                elif dash == MSO_LINE_DASH_STYLE.LONG_DASH:
-                    styles['border-style'] = 'dashed'
-                    print(f"         📏 Граница: LONG-DASH {width_px}px")
-                else:
-                    styles['border-style'] = 'solid'
-            else:
-                # По умолчанию solid
-                styles['border-style'] = 'solid'
-            
-            # Если граница валидна - выводим информацию
-            if styles:
-                print(f"         📏 Граница: {styles.get('border-style', 'solid')} {width_px}px {styles.get('border-color', '')}")
-                
-        except Exception as e:
-            pass
+                return self.gradient_to_css(fill)
+            except Exception as e:
+                print(f"         ⚠️ Ошибка извлечения градиента: {e}")
         
-        return styles
+        elif tag == A_BLIP_FILL:
+            # Изображение (обрабатывается отдельно)
+            return {'fill_type': 'picture'}
+        
+        elif tag == A_NO_FILL:
+            # Фон из макета
+            return {'fill_type': 'background'}
+        
+        return {}
     
-    def extract_shadow_effect(self, shape):
-        """
-        Извлекает эффект тени
-        Возвращает CSS box-shadow
+    def _sppr_line(self, line):
+        """Граница по элементу a:ln"""
+        styles = {}
         
-        ВАЖНО: Тень добавляется ТОЛЬКО если есть реальные параметры
-        """
+        width_emu = int(line.get('w', 0))
+        if not width_emu:
+            return styles
+        
+        fill = None
+        dash = None
+        for child in line:
+            if child.tag in FILL_TAGS:
+                fill = child
+            elif child.tag == A_PRST_DASH:
+                dash = child.get('val')
+        
+        # Граница включена только при явной заливке линии (a:noFill - границы нет)
+        if fill is None or fill.tag == A_NO_FILL:
+            return styles
+        
+        width_px = self.emu_to_px(width_emu)
+        
+        # Если толщина меньше 1px - игнорируем границу
+        if width_px < 1:
+            return styles
+        
+        styles['border-width'] = f"{width_px}px"
+        
+        if fill.tag == A_SOLID_FILL:
+            color, alpha = theme_resolver.resolve_color_in(fill)
+            if color:
+                styles['border-color'] = css_color(color, alpha)
+        
+        # Стиль линии
+        border_style, label = DASH_STYLES.get(dash, ('solid', None))
+        styles['border-style'] = border_style
+        if label:
+            print(f"         📏 Граница: {label} {width_px}px")
+        
+        print(f"         📏 Граница: {border_style} {width_px}px {styles.get('border-color', '')}")
+        
+        return styles
+    
+    def _sppr_shadow(self, effect_lst):
+        """Тень по элементу a:effectLst"""
         styles = {}
         
-        try:
-            elem = shape._element
-            sp_pr = elem.find('.//{http://schemas.openxmlformats.org/presentationml/2006/main}spPr')
-            
-            if sp_pr is None:
-                return styles
-            
-            effect_lst = sp_pr.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}effectLst')
-            if effect_lst is None:
-                return styles
-            
-            # Внешняя тень
-            outer_shdw = effect_lst.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}outerShdw')
-            if outer_shdw is None:
-                return styles
-            
-            # Параметры тени
-            blur_emu = int(outer_shdw.get('blurRad', 0))
-            dist_emu = int(outer_shdw.get('dist', 0))
-            dir_angle = int(outer_shdw.get('dir', 0)) / 60000  # В градусы
-            
-            blur = blur_emu // 9525
-            dist = dist_emu // 9525
-            
-            # Если размытие и расстояние нулевые - тень отсутствует
-            if blur == 0 and dist == 0:
-                return styles
-            
-            # Вычисляем смещение по x и y
-            import math
-            # PowerPoint: 0° = вправо, по часовой
-            # CSS: нужны offset-x и offset-y
-            angle_rad = math.radians(dir_angle)
-            offset_x = int(dist * math.cos(angle_rad))
-            offset_y = int(dist * math.sin(angle_rad))
-            
-            # Цвет тени
-            color_elem = outer_shdw.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}srgbClr')
-            if color_elem is not None:
-                color_val = color_elem.get('val', '000000')
-                color = f"#{color_val}"
-                
-                # Проверяем прозрачность
-                alpha_elem = color_elem.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}alpha')
-                if alpha_elem is not None:
-                    alpha_val = int(alpha_elem.get('val', 100000)) / 100000
-                    if alpha_val < 0.1:  # Почти прозрачная тень - игнорируем
-                        return styles
-            else:
-                # Попробуем другие типы цвета
-                scheme_clr = outer_shdw.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}schemeClr')
-                if scheme_clr is not None:
-                    # Для простоты используем темно-серый
-                    color = "#333333"
-                else:
-                    color = "#000000"
-            
-            # Формируем box-shadow
-            shadow = f"{offset_x}px {offset_y}px {blur}px {color}"
-            styles['box-shadow'] = shadow
-            print(f"         🌑 Тень: offset=({offset_x},{offset_y}) blur={blur}px color={color}")
+        outer_shdw = effect_lst.find(A_OUTER_SHDW)
+        if outer_shdw is None:
+            return styles
         
-        except Exception as e:
-            pass
+        blur = int(outer_shdw.get('blurRad', 0)) // 9525
+        dist = int(outer_shdw.get('dist', 0)) // 9525
+        dir_angle = int(outer_shdw.get('dir', 0)) / 60000
+        
+        # Если размытие и расстояние нулевые - тень отсутствует
+        if blur == 0 and dist == 0:
+            return styles
+        
+        angle_rad = math.radians(dir_angle)
+        offset_x = int(dist * math.cos(angle_rad))
+        offset_y = int(dist * math.sin(angle_rad))
+        
+        color, alpha = theme_resolver.resolve_color_in(outer_shdw)
+        
+        # Почти прозрачная тень - игнорируем
+        if alpha < 0.1:
+            return styles
+        color = css_color(color or "#000000", alpha)
+        
+        styles['box-shadow'] = f"{offset_x}px {offset_y}px {blur}px {color}"
+        print(f"         🌑 Тень: offset=({offset_x},{offset_y}) blur={blur}px color={color}")
         
         return styles
     
-    def extract_transform_style(self, shape):
-        """
-        Полное извлечение трансформаций
-        Поддерживает: rotation, flip horizontal/vertical
-        """
+    def _sppr_transform(self, xfrm):
+        """Поворот и отражение по элементу xfrm"""
         styles = {}
         transforms = []
         
-        try:
-            # Поворот
-            if hasattr(shape, 'rotation') and shape.rotation != 0:
-                transforms.append(f"rotate({shape.rotation}deg)")
-                print(f"         🔄 Поворот: {shape.rotation}°")
-            
-            # Отражение (через XML)
-            elem = shape._element
-            xfrm = elem.find('.//{http://schemas.openxmlformats.org/presentationml/2006/main}xfrm')
-            
-            if xfrm is None:
-                # Попробуем другой путь для групп и других типов
-                xfrm = elem.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}xfrm')
-            
-            if xfrm is not None:
-                flip_h = xfrm.get('flipH')
-                flip_v = xfrm.get('flipV')
-                
-                if flip_h == '1':
-                    transforms.append("scaleX(-1)")
-                    print(f"         ↔️ Отражение: горизонтальное")
-                
-                if flip_v == '1':
-                    transforms.append("scaleY(-1)")
-                    print(f"         ↕️ Отражение: вертикальное")
-            
-            # Применяем трансформации
-            if transforms:
-                styles['transform'] = ' '.join(transforms)
-                styles['transform-origin'] = 'center center'
+        # Угол хранится в 1/60000 градуса, как в shape.rotation
+        rotation = int(xfrm.get('rot', 0)) % 21600000 / 60000.0
+        if rotation != 0:
+            transforms.append(f"rotate({rotation}deg)")
+            print(f"         🔄 Поворот: {rotation}°")
         
-        except Exception as e:
-            pass
+        if xfrm.get('flipH') == '1':
+            transforms.append("scaleX(-1)")
+            print(f"         ↔️ Отражение: горизонтальное")
+        
+        if xfrm.get('flipV') == '1':
+            transforms.append("scaleY(-1)")
+            print(f"         ↕️ Отражение: вертикальное")
+        
+        if transforms:
+            styles['transform'] = ' '.join(transforms)
+            styles['transform-origin'] = 'center center'
         
         return styles
 
 
+    def extract_svg_paint(self, shape, css_styles):
+        """
+        Заливка и контур фигуры для SVG-слоя (v17.3)
+        
+        Args:
+            shape: Фигура
+            css_styles: Стили, уже извлеченные для фигуры (extract_element_styles) -
+                        повторно XML не разбирается
+        
+        Returns:
+            dict: 'f' - цвет заливки, 'g' - градиент {'k', 'a', 's'},
+                  's'/'sw'/'da' - цвет, толщина и пунктир контура
+        """
+        paint = {}
+        
+        if css_styles.get('background-color'):
+            paint['f'] = css_styles['background-color']
+        elif 'gradient' in css_styles.get('background', ''):
+            try:
+                gradient = self.parse_gradient(self._find_grad_fill(shape.fill))
+                if gradient['stops']:
+                    paint['g'] = {
+                        'k': 'linear' if gradient['kind'] in ('linear', 'fallback') else 'radial',
+                        'a': gradient['angle'],
+                        's': gradient['stops'],
+                    }
+            except Exception:
+                pass
+        
+        # Контур - те же условия, что и для CSS-границ
+        if css_styles.get('border-width'):
+            width = float(css_styles['border-width'].rstrip('px'))
+            paint['s'] = css_styles.get('border-color', '#000000')
+            paint['sw'] = width
+            dash = {'dashed': f"{width * 4:g} {width * 3:g}", 'dotted': f"{width:g} {width:g}"}
+            if css_styles.get('border-style') in dash:
+                paint['da'] = dash[css_styles['border-style']]
+        
+        return paint
+
+
 # Singleton instance
 style_extractor = StyleExtractor()
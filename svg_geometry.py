@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль построения SVG-геометрии фигур (v17.3)
+Реальные контуры из custGeom и preset-геометрии вместо прямоугольных <div>
+"""
+
+import math
+
+
+A_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+
+# Фигуры, у которых нет заливки - только контур
+LINE_PRESETS = {
+    'line', 'straightConnector1', 'bentConnector2', 'bentConnector3',
+    'curvedConnector3', 'arc',
+}
+
+
+def _fmt(value):
+    """Компактная запись координаты (2 знака после запятой)"""
+    text = f"{value:.2f}".rstrip('0').rstrip('.')
+    return text if text != '-0' else '0'
+
+
+def _polygon(points):
+    """Замкнутый многоугольник из списка точек"""
+    head, *tail = points
+    return f"M{_fmt(head[0])} {_fmt(head[1])}" + ''.join(
+        f"L{_fmt(x)} {_fmt(y)}" for x, y in tail) + 'Z'
+
+
+class SVGGeometry:
+    """Преобразует геометрию фигуры PPTX в SVG path (в пикселях слайда)"""
+
+    EMU_PER_PX = 9525
+
+    def _adjust_values(self, prst_geom):
+        """Читает значения adj из a:avLst (формулы вида 'val 16667')"""
+        values = {}
+        av_lst = prst_geom.find(f'{A_NS}avLst')
+        if av_lst is None:
+            return values
+        for gd in av_lst.findall(f'{A_NS}gd'):
+            fmla = gd.get('fmla', '').split()
+            if len(fmla) == 2 and fmla[0] == 'val':
+                try:
+                    values[gd.get('name')] = int(fmla[1])
+                except ValueError:
+                    pass
+        return values
+
+    def build_paths(self, sp_pr, x, y, w, h):
+        """
+        Строит контуры фигуры
+
+        Args:
+            sp_pr: Элемент spPr фигуры
+            x, y, w, h: Положение и размер фигуры в пикселях слайда
+
+        Returns:
+            list: [(d, заливать, обводить), ...] или None, если геометрия неизвестна
+        """
+        cust_geom = sp_pr.find(f'{A_NS}custGeom')
+        if cust_geom is not None:
+            return self.custom_geometry_paths(cust_geom, x, y, w, h)
+
+        prst_geom = sp_pr.find(f'{A_NS}prstGeom')
+        if prst_geom is not None:
+            prst = prst_geom.get('prst', 'rect')
+            d = self.preset_path(prst, self._adjust_values(prst_geom), x, y, w, h)
+            if d is None:
+                # Неизвестный пресет - как и раньше, прямоугольник
+                d = self.preset_path('rect', {}, x, y, w, h)
+            return [(d, prst not in LINE_PRESETS, True)]
+
+        return [(self.preset_path('rect', {}, x, y, w, h), True, True)]
+
+    @staticmethod
+    def _ellipse_point(w_r, h_r, angle_deg):
+        """Точка на эллипсе для угла в нотации DrawingML (визуальный угол)"""
+        angle = math.radians(angle_deg)
+        t = math.atan2(w_r * math.sin(angle), h_r * math.cos(angle))
+        return w_r * math.cos(t), h_r * math.sin(t)
+
+    def custom_geometry_paths(self, cust_geom, x, y, w, h):
+        """Контуры a:custGeom/a:pathLst с масштабированием в рамку фигуры"""
+        path_lst = cust_geom.find(f'{A_NS}pathLst')
+        if path_lst is None:
+            return None
+
+        paths = []
+        try:
+            for path in path_lst.findall(f'{A_NS}path'):
+                path_w = int(path.get('w', 0)) or None
+                path_h = int(path.get('h', 0)) or None
+                sx = w / path_w if path_w else 1 / self.EMU_PER_PX
+                sy = h / path_h if path_h else 1 / self.EMU_PER_PX
+
+                def point(pt):
+                    return x + int(pt.get('x')) * sx, y + int(pt.get('y')) * sy
+
+                commands = []
+                current = (x, y)
+                for cmd in path:
+                    tag = cmd.tag[len(A_NS):]
+                    pts = [point(pt) for pt in cmd.findall(f'{A_NS}pt')]
+
+                    if tag == 'moveTo':
+                        current = pts[0]
+                        commands.append(f"M{_fmt(current[0])} {_fmt(current[1])}")
+                    elif tag == 'lnTo':
+                        current = pts[0]
+                        commands.append(f"L{_fmt(current[0])} {_fmt(current[1])}")
+                    elif tag == 'cubicBezTo':
+                        commands.append('C' + ' '.join(f"{_fmt(px)} {_fmt(py)}" for px, py in pts))
+                        current = pts[-1]
+                    elif tag == 'quadBezTo':
+                        commands.append('Q' + ' '.join(f"{_fmt(px)} {_fmt(py)}" for px, py in pts))
+                        current = pts[-1]
+                    elif tag == 'arcTo':
+                        arc, current = self._arc_to(cmd, current, sx, sy)
+                        commands.append(arc)
+                    elif tag == 'close':
+                        commands.append('Z')
+
+                if commands:
+                    paths.append((
+                        ''.join(commands),
+                        path.get('fill', 'norm') != 'none',
+                        path.get('stroke', '1') not in ('0', 'false'),
+                    ))
+        except (TypeError, ValueError):
+            # Координаты заданы ссылками на guide-формулы - оставляем рамку
+            return None
+
+        return paths or None
+
+    def _arc_to(self, cmd, current, sx, sy):
+        """Преобразует a:arcTo в одну или две SVG-дуги"""
+        w_r = int(cmd.get('wR')) * sx
+        h_r = int(cmd.get('hR')) * sy
+        st_ang = int(cmd.get('stAng')) / 60000
+        sw_ang = int(cmd.get('swAng')) / 60000
+
+        start_x, start_y = self._ellipse_point(w_r, h_r, st_ang)
+        cx, cy = current[0] - start_x, current[1] - start_y
+
+        # Полный оборот SVG-дугой не описать - делим на две половины
+        segments = [sw_ang] if abs(sw_ang) < 360 else [sw_ang / 2, sw_ang / 2]
+        commands = []
+        angle = st_ang
+        end = current
+        for sweep in segments:
+            angle += sweep
+            ex, ey = self._ellipse_point(w_r, h_r, angle)
+            end = (cx + ex, cy + ey)
+            commands.append(
+                f"A{_fmt(w_r)} {_fmt(h_r)} 0 {1 if abs(sweep) > 180 else 0} {1 if sweep > 0 else 0} "
+                f"{_fmt(end[0])} {_fmt(end[1])}")
+        return ''.join(commands), end
+
+    def preset_path(self, prst, adj, x, y, w, h):
+        """Контур для preset-геометрии (основные пресеты PowerPoint)"""
+        ss = min(w, h)
+        r, b = x + w, y + h
+        mx, my = x + w / 2, y + h / 2
+
+        def a(name, default):
+            return adj.get(name, default) / 100000
+
+        if prst == 'rect':
+            return _polygon([(x, y), (r, y), (r, b), (x, b)])
+
+        if prst == 'roundRect':
+            rad = min(ss * a('adj', 16667), ss / 2)
+            return (f"M{_fmt(x + rad)} {_fmt(y)}H{_fmt(r - rad)}"
+                    f"A{_fmt(rad)} {_fmt(rad)} 0 0 1 {_fmt(r)} {_fmt(y + rad)}V{_fmt(b - rad)}"
+                    f"A{_fmt(rad)} {_fmt(rad)} 0 0 1 {_fmt(r - rad)} {_fmt(b)}H{_fmt(x + rad)}"
+                    f"A{_fmt(rad)} {_fmt(rad)} 0 0 1 {_fmt(x)} {_fmt(b - rad)}V{_fmt(y + rad)}"
+                    f"A{_fmt(rad)} {_fmt(rad)} 0 0 1 {_fmt(x + rad)} {_fmt(y)}Z")
+
+        if prst == 'ellipse':
+            return (f"M{_fmt(x)} {_fmt(my)}"
+                    f"A{_fmt(w / 2)} {_fmt(h / 2)} 0 1 1 {_fmt(r)} {_fmt(my)}"
+                    f"A{_fmt(w / 2)} {_fmt(h / 2)} 0 1 1 {_fmt(x)} {_fmt(my)}Z")
+
+        if prst == 'triangle':
+            return _polygon([(x + w * a('adj', 50000), y), (r, b), (x, b)])
+
+        if prst == 'rtTriangle':
+            return _polygon([(x, y), (r, b), (x, b)])
+
+        if prst == 'diamond':
+            return _polygon([(mx, y), (r, my), (mx, b), (x, my)])
+
+        if prst == 'parallelogram':
+            dx = ss * a('adj', 25000)
+            return _polygon([(x + dx, y), (r, y), (r - dx, b), (x, b)])
+
+        if prst == 'trapezoid':
+            dx = ss * a('adj', 25000)
+            return _polygon([(x, b), (x + dx, y), (r - dx, y), (r, b)])
+
+        if prst == 'hexagon':
+            dx = ss * a('adj', 25000)
+            return _polygon([(x, my), (x + dx, y), (r - dx, y), (r, my), (r - dx, b), (x + dx, b)])
+
+        if prst == 'octagon':
+            d = ss * a('adj', 29289)
+            return _polygon([(x + d, y), (r - d, y), (r, y + d), (r, b - d),
+                             (r - d, b), (x + d, b), (x, b - d), (x, y + d)])
+
+        if prst == 'pentagon':
+            return _polygon([(mx, y), (r, y + h * 0.382), (x + w * 0.809, b),
+                             (x + w * 0.191, b), (x, y + h * 0.382)])
+
+        if prst == 'homePlate':
+            dx = ss * a('adj', 50000)
+            return _polygon([(x, y), (r - dx, y), (r, my), (r - dx, b), (x, b)])
+
+        if prst == 'chevron':
+            dx = ss * a('adj', 50000)
+            return _polygon([(x, y), (r - dx, y), (r, my), (r - dx, b), (x, b), (x + dx, my)])
+
+        if prst == 'plus':
+            d = ss * a('adj', 25000)
+            return _polygon([(x + d, y), (r - d, y), (r - d, y + d), (r, y + d), (r, b - d),
+                             (r - d, b - d), (r - d, b), (x + d, b), (x + d, b - d),
+                             (x, b - d), (x, y + d), (x + d, y + d)])
+
+        if prst in ('line', 'straightConnector1'):
+            return f"M{_fmt(x)} {_fmt(y)}L{_fmt(r)} {_fmt(b)}"
+
+        if prst == 'bentConnector2':
+            return f"M{_fmt(x)} {_fmt(y)}H{_fmt(r)}V{_fmt(b)}"
+
+        if prst == 'bentConnector3':
+            bend = x + w * a('adj1', 50000)
+            return f"M{_fmt(x)} {_fmt(y)}H{_fmt(bend)}V{_fmt(b)}H{_fmt(r)}"
+
+        if prst == 'curvedConnector3':
+            bend = x + w * a('adj1', 50000)
+            return (f"M{_fmt(x)} {_fmt(y)}C{_fmt(bend)} {_fmt(y)} {_fmt(bend)} {_fmt(b)} "
+                    f"{_fmt(r)} {_fmt(b)}")
+
+        return None
+
+    @staticmethod
+    def transform(rotation, flip_h, flip_v, x, y, w, h):
+        """SVG transform: сначала отражение, затем поворот (как в PowerPoint)"""
+        cx, cy = _fmt(x + w / 2), _fmt(y + h / 2)
+        parts = []
+        if rotation:
+            parts.append(f"rotate({_fmt(rotation)} {cx} {cy})")
+        if flip_h or flip_v:
+            parts.append(f"translate({cx} {cy}) scale({-1 if flip_h else 1} {-1 if flip_v else 1}) "
+                         f"translate({-float(cx):g} {-float(cy):g})")
+        return ' '.join(parts) or None
+
+    def render_layer(self, vectors, width, height, z_index, uid):
+        """
+        Собирает фигуры в один <svg> поверх слайда
+
+        Args:
+            vectors: Список описаний фигур (shape_data['content'] типа 'vector')
+            width, height: Размер слайда в пикселях (viewBox)
+            z_index: z-index слоя (z-index первой фигуры группы)
+            uid: Префикс для id градиентов (уникален в пределах страницы)
+
+        Returns:
+            str: Разметка <svg>
+        """
+        defs = []
+        body = []
+
+        for index, vector in enumerate(vectors):
+            fill = vector.get('f') or 'none'
+            gradient = vector.get('g')
+            if gradient:
+                grad_id = f"{uid}g{index}"
+                defs.append(self.gradient_def(grad_id, gradient))
+                fill = f"url(#{grad_id})"
+
+            attrs = []
+            if vector.get('tf'):
+                attrs.append(f'transform="{vector["tf"]}"')
+            if vector.get('op'):
+                attrs.append(f'opacity="{vector["op"]}"')
+            if vector.get('fx'):
+                attrs.append(f'style="filter: {vector["fx"]}"')
+
+            paths = []
+            for d, do_fill, do_stroke in vector['d']:
+                path_attrs = [f'd="{d}"', f'fill="{fill if do_fill else "none"}"']
+                if do_stroke and vector.get('s'):
+                    path_attrs.append(f'stroke="{vector["s"]}" stroke-width="{vector["sw"]:g}"')
+                    if vector.get('da'):
+                        path_attrs.append(f'stroke-dasharray="{vector["da"]}"')
+                paths.append(f"<path {' '.join(path_attrs)}/>")
+
+            if len(paths) == 1 and not attrs:
+                body.append(paths[0])
+            else:
+                body.append(f"<g {' '.join(attrs)}>{''.join(paths)}</g>" if attrs else ''.join(paths))
+
+        defs_markup = f"<defs>{''.join(defs)}</defs>" if defs else ''
+        return (f'<svg class="shape-layer" viewBox="0 0 {width} {height}" preserveAspectRatio="none" '
+                f'style="z-index: {z_index}">{defs_markup}{"".join(body)}</svg>')
+
+    @staticmethod
+    def gradient_def(grad_id, gradient):
+        """Определение <linearGradient>/<radialGradient> для заливки"""
+        stops = ''.join(
+            f'<stop offset="{_fmt(pos)}%" stop-color="{color}"/>' for pos, color in gradient['s'])
+        if gradient['k'] == 'linear':
+            return (f'<linearGradient id="{grad_id}" gradientTransform="rotate({_fmt(gradient["a"])} .5 .5)">'
+                    f'{stops}</linearGradient>')
+        return f'<radialGradient id="{grad_id}">{stops}</radialGradient>'
+
+
+# Singleton instance
+svg_geometry = SVGGeometry()
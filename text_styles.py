@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль наследования стилей текста (v17.8)
+Цепочка наследования PowerPoint для run:
+    rPr -> pPr/defRPr -> lstStyle фигуры -> lstStyle плейсхолдера макета ->
+    lstStyle плейсхолдера образца -> txStyles образца -> defaultTextStyle презентации
+Все, что ниже lstStyle фигуры, разрешается один раз на
+(макет, тип плейсхолдера, idx, уровень) и кэшируется.
+"""
+
+import weakref
+
+from theme_resolver import theme_resolver, css_color
+
+
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+
+# Порядок CSS-свойств текста (как в extract_text_formatting)
+TEXT_STYLE_ORDER = ('font-family', 'font-size', 'color', 'font-weight', 'font-style', 'text-decoration')
+
+# Тип плейсхолдера -> стиль образца в p:txStyles
+TITLE_PLACEHOLDERS = frozenset(('title', 'ctrTitle'))
+OTHER_PLACEHOLDERS = frozenset(('dt', 'ftr', 'sldNum', 'hdr'))
+
+
+class TextStyleResolver:
+    """Разрешает унаследованные стили текста с кэшем на макет слайда"""
+
+    def __init__(self):
+        # Ключ - часть макета (SlideLayoutPart) -> {(тип, idx, уровень): CSS}
+        self._cache = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _merge(target, source):
+        """Накладывает свойства; None означает явный сброс (b="0", u="none")"""
+        for key, value in source.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+
+    @staticmethod
+    def run_properties_css(rpr):
+        """
+        CSS из элемента свойств текста (a:rPr, a:defRPr)
+
+        Returns:
+            dict: Значение None у свойства означает явное отключение
+        """
+        css = {}
+        if rpr is None:
+            return css
+
+        latin = rpr.find(_A + 'latin')
+        if latin is not None and latin.get('typeface'):
+            font_name = theme_resolver.resolve_font(latin.get('typeface'))
+            if font_name:
+                css['font-family'] = font_name
+
+        size = rpr.get('sz')
+        if size:
+            # Сотые доли пункта -> px (как pt_to_px)
+            css['font-size'] = f"{round(int(size) / 100 * 1.333333)}px"
+
+        fill = rpr.find(_A + 'solidFill')
+        if fill is not None:
+            color, alpha = theme_resolver.resolve_color_in(fill)
+            if color:
+                css['color'] = css_color(color, alpha)
+
+        bold = rpr.get('b')
+        if bold is not None:
+            css['font-weight'] = 'bold' if bold in ('1', 'true') else None
+
+        italic = rpr.get('i')
+        if italic is not None:
+            css['font-style'] = 'italic' if italic in ('1', 'true') else None
+
+        underline = rpr.get('u')
+        if underline is not None:
+            css['text-decoration'] = None if underline == 'none' else 'underline'
+
+        return css
+
+    def _merge_list_style(self, target, lst_style, level):
+        """Накладывает defPPr и lvlNpPr списка стилей для уровня абзаца"""
+        if lst_style is None:
+            return
+        for tag in ('defPPr', f"lvl{level + 1}pPr"):
+            ppr = lst_style.find(_A + tag)
+            if ppr is not None:
+                self._merge(target, self.run_properties_css(ppr.find(_A + 'defRPr')))
+
+    @staticmethod
+    def _placeholder_lst_style(placeholder):
+        """a:lstStyle плейсхолдера макета или образца"""
+        if placeholder is None:
+            return None
+        tx_body = placeholder._element.find(_P + 'txBody')
+        return tx_body.find(_A + 'lstStyle') if tx_body is not None else None
+
+    def inherited_style(self, shape, level):
+        """
+        Унаследованный стиль текста фигуры для уровня абзаца (без собственных
+        lstStyle/pPr фигуры). Результат кэшируется на макет слайда.
+        """
+        layout = shape.part.slide_layout
+        ph = shape._element.ph
+        ph_type = ph.get('type', 'obj') if ph is not None else None
+        ph_idx = ph.get('idx', '0') if ph is not None else None
+        key = (ph_type, ph_idx, level)
+
+        by_layout = self._cache.get(layout.part)
+        if by_layout is None:
+            by_layout = self._cache[layout.part] = {}
+
+        style = by_layout.get(key)
+        if style is not None:
+            return style
+
+        style = {}
+        master = layout.slide_master
+
+        # 1. Стиль текста по умолчанию всей презентации
+        presentation = layout.part.package.presentation_part._element
+        self._merge_list_style(style, presentation.find(_P + 'defaultTextStyle'), level)
+
+        if ph is not None:
+            # 2. txStyles образца: заголовок, основной текст или прочее
+            if ph_type in TITLE_PLACEHOLDERS:
+                tx_style_tag = 'titleStyle'
+            elif ph_type in OTHER_PLACEHOLDERS:
+                tx_style_tag = 'otherStyle'
+            else:
+                tx_style_tag = 'bodyStyle'
+            tx_styles = master._element.find(_P + 'txStyles')
+            if tx_styles is not None:
+                self._merge_list_style(style, tx_styles.find(_P + tx_style_tag), level)
+
+            # 3-4. lstStyle плейсхолдеров образца и макета
+            layout_placeholder = shape._base_placeholder
+            master_placeholder = layout_placeholder._base_placeholder if layout_placeholder is not None else None
+            self._merge_list_style(style, self._placeholder_lst_style(master_placeholder), level)
+            self._merge_list_style(style, self._placeholder_lst_style(layout_placeholder), level)
+
+        style = {k: style[k] for k in TEXT_STYLE_ORDER if style.get(k) is not None}
+        by_layout[key] = style
+        return style
+
+    def paragraph_style(self, shape, text_frame, paragraph):
+        """
+        Базовый стиль run'ов абзаца: унаследованный стиль плюс lstStyle
+        фигуры и pPr/defRPr абзаца
+
+        Returns:
+            dict: Общий для абзаца словарь - не изменять, копировать
+        """
+        level = paragraph.level
+        try:
+            style = self.inherited_style(shape, level)
+        except Exception:
+            # Фигура вне слайда (макет, образец) - наследование не разрешаем
+            style = {}
+
+        lst_style = text_frame._txBody.find(_A + 'lstStyle')
+        ppr = paragraph._p.find(_A + 'pPr')
+        def_rpr = ppr.find(_A + 'defRPr') if ppr is not None else None
+
+        if (lst_style is None or not len(lst_style)) and def_rpr is None:
+            return style
+
+        style = dict(style)
+        self._merge_list_style(style, lst_style, level)
+        self._merge(style, self.run_properties_css(def_rpr))
+        return style
+
+
+# Singleton instance
+text_style_resolver = TextStyleResolver()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль разрешения цветов и шрифтов темы (v17.5)
+Цветовая и шрифтовая схемы темы разбираются один раз на образец слайдов
+(slide master) и кэшируются. Модификаторы цвета (lumMod, lumOff, tint,
+shade, alpha) применяются через мемоизированную функцию.
+"""
+
+import colorsys
+import itertools
+import weakref
+from functools import lru_cache
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+
+COLOR_TAGS = frozenset(_A + tag for tag in (
+    'srgbClr', 'schemeClr', 'sysClr', 'prstClr', 'scrgbClr', 'hslClr'))
+
+# Модификаторы, влияющие на результат; прочие (satMod, hueOff...) пропускаются
+MODIFIER_TAGS = {_A + tag: tag for tag in ('lumMod', 'lumOff', 'tint', 'shade', 'alpha')}
+
+# Сопоставление по умолчанию, если у образца нет p:clrMap
+DEFAULT_CLR_MAP = {
+    'bg1': 'lt1', 'tx1': 'dk1', 'bg2': 'lt2', 'tx2': 'dk2',
+    'accent1': 'accent1', 'accent2': 'accent2', 'accent3': 'accent3',
+    'accent4': 'accent4', 'accent5': 'accent5', 'accent6': 'accent6',
+    'hlink': 'hlink', 'folHlink': 'folHlink',
+}
+
+# Наиболее употребительные предустановленные цвета a:prstClr
+PRESET_COLORS = {
+    'black': '000000', 'white': 'ffffff', 'red': 'ff0000', 'green': '008000',
+    'blue': '0000ff', 'yellow': 'ffff00', 'cyan': '00ffff', 'magenta': 'ff00ff',
+    'gray': '808080', 'grey': '808080', 'dkGray': 'a9a9a9', 'ltGray': 'd3d3d3',
+    'orange': 'ffa500', 'purple': '800080', 'navy': '000080', 'maroon': '800000',
+}
+
+THEME_FONT_SLOTS = {'lt': 'latin', 'ea': 'ea', 'cs': 'cs'}
+
+
+@lru_cache(maxsize=4096)
+def apply_color_modifiers(base_hex, modifiers):
+    """
+    Применяет модификаторы DrawingML к цвету
+
+    Args:
+        base_hex: Базовый цвет 'rrggbb' (без #)
+        modifiers: Кортеж пар (имя модификатора, значение в 1/1000 процента)
+
+    Returns:
+        tuple: ('#rrggbb', alpha 0..1)
+    """
+    r, g, b = (int(base_hex[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    alpha = 1.0
+
+    for name, value in modifiers:
+        factor = value / 100000
+
+        if name in ('lumMod', 'lumOff'):
+            # Яркость меняется в пространстве HSL
+            h, l, s = colorsys.rgb_to_hls(r, g, b)
+            l = l * factor if name == 'lumMod' else l + factor
+            r, g, b = colorsys.hls_to_rgb(h, min(max(l, 0.0), 1.0), s)
+        elif name == 'tint':
+            # Смешивание с белым
+            r, g, b = (c * factor + (1 - factor) for c in (r, g, b))
+        elif name == 'shade':
+            # Смешивание с черным
+            r, g, b = (c * factor for c in (r, g, b))
+        elif name == 'alpha':
+            alpha = min(max(factor, 0.0), 1.0)
+
+    channels = (min(max(round(c * 255), 0), 255) for c in (r, g, b))
+    return '#' + ''.join(f"{c:02x}" for c in channels), alpha
+
+
+def css_color(color, alpha=1.0):
+    """Возвращает '#rrggbb' или rgba(), если цвет полупрозрачный"""
+    if color is None or alpha >= 1.0:
+        return color
+    r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r}, {g}, {b}, {alpha:.2f})"
+
+
+class ThemeScheme:
+    """Разобранные цветовая и шрифтовая схемы одного образца слайдов"""
+
+    _keys = itertools.count(1)
+
+    def __init__(self, colors, fonts, clr_map):
+        # Уникальный номер схемы - для ключей кэшей, зависящих от темы
+        self.key = next(self._keys)
+        self.colors = colors      # {'dk1': 'rrggbb', 'accent1': ..., ...}
+        self.fonts = fonts        # {'+mj-lt': 'Calibri Light', '+mn-lt': 'Calibri', ...}
+        self.clr_map = clr_map    # {'bg1': 'lt1', 'tx1': 'dk1', ...}
+
+    def scheme_color(self, name):
+        """Базовый цвет схемы по имени schemeClr (с учетом clrMap)"""
+        return self.colors.get(self.clr_map.get(name, name))
+
+
+class ThemeResolver:
+    """Разрешение schemeClr и шрифтов темы с кэшем на образец слайдов"""
+
+    def __init__(self):
+        # Ключ - часть образца (SlideMasterPart); кэш не удерживает презентацию
+        self._schemes = weakref.WeakKeyDictionary()
+        self.current = None
+
+    def for_master(self, slide_master):
+        """Возвращает схему темы образца, разбирая тему только при первом обращении"""
+        part = slide_master.part
+        scheme = self._schemes.get(part)
+        if scheme is None:
+            scheme = self._parse_master(slide_master)
+            self._schemes[part] = scheme
+        return scheme
+
+    def use_master(self, slide_master):
+        """Делает тему образца текущей для последующих resolve_* вызовов"""
+        try:
+            self.current = self.for_master(slide_master)
+        except Exception as e:
+            print(f"  ⚠️ Не удалось разобрать тему: {e}")
+            self.current = None
+        return self.current
+
+    def _parse_master(self, slide_master):
+        """Разбирает clrMap образца и связанную с ним тему"""
+        clr_map = dict(DEFAULT_CLR_MAP)
+        clr_map_elem = slide_master._element.find(_P + 'clrMap')
+        if clr_map_elem is not None:
+            clr_map.update(clr_map_elem.attrib)
+
+        colors = {}
+        fonts = {}
+        try:
+            theme_part = slide_master.part.part_related_by(RT.THEME)
+        except KeyError:
+            return ThemeScheme(colors, fonts, clr_map)
+
+        theme = etree.fromstring(theme_part.blob)
+        elements = theme.find(_A + 'themeElements')
+        if elements is None:
+            return ThemeScheme(colors, fonts, clr_map)
+
+        clr_scheme = elements.find(_A + 'clrScheme')
+        if clr_scheme is not None:
+            for slot in clr_scheme:
+                for color_elem in slot:
+                    if color_elem.tag == _A + 'srgbClr':
+                        colors[etree.QName(slot).localname] = color_elem.get('val', '000000').lower()
+                    elif color_elem.tag == _A + 'sysClr':
+                        colors[etree.QName(slot).localname] = color_elem.get('lastClr', '000000').lower()
+
+        font_scheme = elements.find(_A + 'fontScheme')
+        if font_scheme is not None:
+            for prefix, group in (('mj', 'majorFont'), ('mn', 'minorFont')):
+                group_elem = font_scheme.find(_A + group)
+                if group_elem is None:
+                    continue
+                for suffix, tag in THEME_FONT_SLOTS.items():
+                    typeface = group_elem.find(_A + tag)
+                    if typeface is not None and typeface.get('typeface'):
+                        fonts[f"+{prefix}-{suffix}"] = typeface.get('typeface')
+
+        return ThemeScheme(colors, fonts, clr_map)
+
+    def _base_color(self, color_elem):
+        """Базовый цвет элемента *Clr без модификаторов ('rrggbb' или None)"""
+        tag = color_elem.tag
+
+        if tag == _A + 'srgbClr':
+            return color_elem.get('val', '').lower() or None
+        if tag == _A + 'schemeClr':
+            return self.current.scheme_color(color_elem.get('val')) if self.current else None
+        if tag == _A + 'sysClr':
+            return color_elem.get('lastClr', '').lower() or None
+        if tag == _A + 'prstClr':
+            return PRESET_COLORS.get(color_elem.get('val'))
+        if tag == _A + 'scrgbClr':
+            # Линейные компоненты в 1/1000 процента -> sRGB
+            channels = []
+            for attr in ('r', 'g', 'b'):
+                linear = int(color_elem.get(attr, 0)) / 100000
+                srgb = 12.92 * linear if linear <= 0.0031308 else 1.055 * linear ** (1 / 2.4) - 0.055
+                channels.append(min(max(round(srgb * 255), 0), 255))
+            return ''.join(f"{c:02x}" for c in channels)
+        if tag == _A + 'hslClr':
+            r, g, b = colorsys.hls_to_rgb(
+                int(color_elem.get('hue', 0)) / 21600000,
+                int(color_elem.get('lum', 0)) / 100000,
+                int(color_elem.get('sat', 0)) / 100000,
+            )
+            return ''.join(f"{round(c * 255):02x}" for c in (r, g, b))
+        return None
+
+    def resolve_color(self, color_elem):
+        """
+        Разрешает элемент цвета DrawingML (srgbClr, schemeClr, sysClr...)
+
+        Returns:
+            tuple: ('#rrggbb' или None, alpha 0..1)
+        """
+        if color_elem is None:
+            return None, 1.0
+
+        base = self._base_color(color_elem)
+        if not base or len(base) != 6:
+            return None, 1.0
+
+        modifiers = tuple(
+            (MODIFIER_TAGS[child.tag], int(child.get('val', 0)))
+            for child in color_elem if child.tag in MODIFIER_TAGS
+        )
+        return apply_color_modifiers(base, modifiers)
+
+    def resolve_color_in(self, parent):
+        """Разрешает первый дочерний элемент цвета (solidFill, gs, outerShdw...)"""
+        if parent is None:
+            return None, 1.0
+        for child in parent:
+            if child.tag in COLOR_TAGS:
+                return self.resolve_color(child)
+        return None, 1.0
+
+    def resolve_color_format(self, color_format):
+        """Разрешает python-pptx ColorFormat (font.color, fill.fore_color)"""
+        color = getattr(color_format, '_color', None)
+        return self.resolve_color(getattr(color, '_xClr', None))
+
+    def resolve_font(self, name):
+        """Заменяет ссылку на шрифт темы (+mj-lt, +mn-ea...) реальным именем"""
+        if not name or not name.startswith('+'):
+            return name
+        if self.current is None:
+            return None
+        return self.current.fonts.get(name) or None
+
+
+# Singleton instance
+theme_resolver = ThemeResolver()